@@ -0,0 +1,41 @@
+"""
+Экспорт метрик Prometheus из Celery-воркера.
+
+Метрики задач (очередь переиндексации товаров, векторизация) увеличиваются
+в процессах воркера, а /metrics из django_prometheus отдает только
+веб-процесс. Поэтому воркер поднимает свой HTTP-сервер на WORKER_METRICS_PORT.
+
+Процессы пула prefork пишут значения в файлы каталога PROMETHEUS_MULTIPROC_DIR
+(режим multiprocess prometheus_client), а сервер главного процесса суммирует
+их при каждом сборе. Без этой переменной (например, с пулом solo) отдается
+обычный реестр процесса.
+"""
+import os
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    multiprocess,
+    start_http_server,
+)
+
+
+def multiprocess_enabled() -> bool:
+    """Пишут ли процессы метрики в общий каталог (переменная задается до импорта prometheus_client)."""
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def start_worker_metrics_server(port: int) -> None:
+    """Запускает HTTP-сервер метрик воркера в фоновом потоке."""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    start_http_server(port, registry=registry)
+
+
+def mark_worker_process_dead(pid: int) -> None:
+    """Убирает файлы живых gauge завершившегося процесса пула; счетчики сохраняются."""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:57
+
+from django.db import migrations, models
+from pgvector.django import VectorExtension
+import pgvector.django.vector
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        VectorExtension(),
+        migrations.CreateModel(
+            name='EmbeddingCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='Хэш текста')),
+                ('model_name', models.CharField(max_length=200, verbose_name='Модель')),
+                ('embedding', pgvector.django.vector.VectorField(verbose_name='Вектор')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'Кэш вектора',
+                'verbose_name_plural': 'Кэш векторов',
+                'constraints': [models.UniqueConstraint(fields=('model_name', 'content_hash'), name='core_embedding_cache_model_hash_uniq')],
+            },
+        ),
+    ]
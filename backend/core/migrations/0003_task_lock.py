@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_embedding_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Операция')),
+                ('token', models.UUIDField(verbose_name='Токен владельца')),
+                ('expires_at', models.DateTimeField(verbose_name='Истекает')),
+            ],
+            options={
+                'verbose_name': 'Блокировка операции',
+                'verbose_name_plural': 'Блокировки операций',
+            },
+        ),
+    ]
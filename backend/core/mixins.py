@@ -1,7 +1,13 @@
+import hashlib
+
 from django.db import models
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 
+from core.models import ResourceVersion
+
 
 class ExtIdMixin(models.Model):
     ext_id = models.CharField(
@@ -29,3 +35,41 @@ class TimestampsMixin(models.Model):
 
     class Meta:
         abstract = True
+
+
+class ConditionalGetMixin:
+    """
+    Условный GET (ETag/Last-Modified) для справочников DRF.
+
+    Валидаторы строятся по версии ресурса version_resource (core.ResourceVersion),
+    которую увеличивают сигналы при записи, поэтому ответ 304 Not Modified
+    стоит одного запроса по первичному ключу и не читает саму таблицу.
+    """
+    version_resource = None
+    # Ответы требуют авторизации: хранить их может только браузер, и только с перепроверкой
+    cache_control = 'private, no-cache'
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_get(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional_get(request, super().retrieve, *args, **kwargs)
+
+    def _conditional_get(self, request, handler, *args, **kwargs):
+        version, updated_at = ResourceVersion.state(self.version_resource)
+        # Разные параметры запроса и форматы ответа — разные представления ресурса
+        variant = f"{self.version_resource}:{version}:{request.get_full_path()}:{request.META.get('HTTP_ACCEPT', '')}"
+        etag = '"' + hashlib.md5(variant.encode()).hexdigest() + '"'
+        last_modified = int(updated_at.timestamp()) if updated_at else None
+
+        response = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = self.cache_control
+        response['Vary'] = 'Accept, Cookie, Authorization'
+        return response
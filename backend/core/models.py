@@ -0,0 +1,157 @@
+from datetime import timedelta
+import uuid
+
+from django.db import connection, models, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from pgvector.django import VectorField
+
+
+class ResourceVersion(models.Model):
+    """
+    Счетчик версий ресурса (например, дерева каталога) для кэша и ETag.
+
+    Версия увеличивается после коммита изменения, поэтому читатель, увидевший
+    новую версию, увидит и новые данные. Кэш по ключу с версией не требует
+    явной очистки: после увеличения версии старая запись просто не читается.
+    """
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name=_('Ресурс')
+    )
+    version = models.BigIntegerField(
+        default=0,
+        verbose_name=_('Версия')
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_('Дата изменения')
+    )
+
+    class Meta:
+        verbose_name = _('Версия ресурса')
+        verbose_name_plural = _('Версии ресурсов')
+
+    def __str__(self):
+        return f"{self.name}: {self.version}"
+
+    @classmethod
+    def current(cls, name):
+        """Текущая версия ресурса (0, если он еще не менялся)."""
+        return cls.objects.filter(name=name).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def state(cls, name):
+        """Пара (версия, время изменения); для ресурса без изменений — (0, None)."""
+        return cls.objects.filter(name=name).values_list('version', 'updated_at').first() or (0, None)
+
+    @classmethod
+    def bump(cls, *names):
+        """Увеличивает версии ресурсов после коммита текущей транзакции."""
+        transaction.on_commit(lambda: cls._increment(names))
+
+    @classmethod
+    def _increment(cls, names):
+        with connection.cursor() as cursor:
+            for name in names:
+                cursor.execute(
+                    f'INSERT INTO {cls._meta.db_table} (name, version, updated_at) VALUES (%s, 1, NOW()) '
+                    f'ON CONFLICT (name) DO UPDATE SET version = {cls._meta.db_table}.version + 1, updated_at = NOW()',
+                    [name],
+                )
+
+
+class TaskLock(models.Model):
+    """
+    Блокировка операции, которую по очереди выполняют несколько задач Celery
+    (advisory-блокировка PostgreSQL живет не дольше одного соединения).
+
+    Взявший блокировку получает токен и снимает ее тем же токеном, поэтому
+    запоздавшая задача прежнего владельца не снимет чужую блокировку.
+    Блокировку упавшего владельца через timeout секунд может взять другой.
+    """
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name=_('Операция')
+    )
+    token = models.UUIDField(
+        verbose_name=_('Токен владельца')
+    )
+    expires_at = models.DateTimeField(
+        verbose_name=_('Истекает')
+    )
+
+    class Meta:
+        verbose_name = _('Блокировка операции')
+        verbose_name_plural = _('Блокировки операций')
+
+    def __str__(self):
+        return f"{self.name} до {self.expires_at}"
+
+    @classmethod
+    def acquire(cls, name, timeout):
+        """
+        Берет блокировку на timeout секунд.
+
+        Returns:
+            str: токен владельца или None, если блокировку держит другой
+        """
+        token = uuid.uuid4()
+        now = timezone.now()
+        table = cls._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (name, token, expires_at) VALUES (%s, %s, %s) '
+                f'ON CONFLICT (name) DO UPDATE SET token = EXCLUDED.token, expires_at = EXCLUDED.expires_at '
+                f'WHERE {table}.expires_at < %s RETURNING token',
+                [name, token, now + timedelta(seconds=timeout), now],
+            )
+            acquired = cursor.fetchone() is not None
+        return str(token) if acquired else None
+
+    @classmethod
+    def release(cls, name, token):
+        """Снимает блокировку, если ее держит владелец token; возвращает, снята ли она."""
+        return cls.objects.filter(name=name, token=token).delete()[0] > 0
+
+
+class EmbeddingCache(models.Model):
+    """
+    Кэш векторов текстов для сервиса векторизации (embedding_service).
+
+    Ключ — хэш текста и имя модели: одинаковый текст векторизуется один раз,
+    сколько бы векторных таблиц его ни использовали. Размерность не задана,
+    чтобы в кэше могли жить векторы разных моделей.
+    """
+    content_hash = models.CharField(
+        max_length=64,
+        verbose_name=_('Хэш текста')
+    )
+    model_name = models.CharField(
+        max_length=200,
+        verbose_name=_('Модель')
+    )
+    embedding = VectorField(
+        verbose_name=_('Вектор')
+    )
+    # Индекс для очистки кэша по возрасту (embedding_service.prune_cache)
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name=_('Дата создания')
+    )
+
+    class Meta:
+        verbose_name = _('Кэш вектора')
+        verbose_name_plural = _('Кэш векторов')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['model_name', 'content_hash'],
+                name='core_embedding_cache_model_hash_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.model_name}: {self.content_hash}"
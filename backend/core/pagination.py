@@ -0,0 +1,114 @@
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+# Начиная с какой оценки количества строк точный COUNT(*) не выполняется
+ESTIMATED_COUNT_THRESHOLD = 100_000
+
+
+def estimate_count(queryset, threshold=ESTIMATED_COUNT_THRESHOLD):
+    """
+    Количество строк queryset: оценка планировщика PostgreSQL, если она
+    не меньше threshold, иначе точный COUNT(*).
+
+    Для запроса без условий оценка берется из pg_class.reltuples,
+    для остальных — из EXPLAIN. Возвращает пару (количество, оценка ли это).
+    """
+    if not isinstance(queryset, QuerySet):
+        return len(queryset), False
+
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql' or queryset.query.is_sliced:
+        return queryset.count(), False
+
+    queryset = queryset.order_by()
+    if not queryset.query.where and not queryset.query.distinct:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        estimate = row[0] if row else -1
+    else:
+        plan = json.loads(queryset.explain(format='json'))
+        estimate = int(plan[0]['Plan']['Plan Rows'])
+
+    # reltuples = -1, пока таблицу ни разу не анализировали
+    if estimate >= threshold:
+        return estimate, True
+    return queryset.count(), False
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator для больших таблиц: вместо точного COUNT(*) использует оценку
+    PostgreSQL, когда строк заведомо много (см. estimate_count).
+    """
+    count_threshold = ESTIMATED_COUNT_THRESHOLD
+    count_is_estimated = False
+
+    @cached_property
+    def count(self):
+        count, self.count_is_estimated = estimate_count(self.object_list, self.count_threshold)
+        return count
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Keyset-пагинация по -id: следующая страница выбирается условием
+    id < последнего id, поэтому любая страница стоит как первая.
+    Общее количество не считается, пока его не запросят (?with_count=true).
+    """
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    count_query_param = 'with_count'
+
+    def get_ordering(self, request, queryset, view):
+        # Сортировка фиксирована: keyset требует уникального и индексированного ключа
+        return (self.ordering,)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.queryset = queryset
+        self.with_count = request.query_params.get(self.count_query_param) in ('1', 'true')
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'page_size': self.page_size,
+            'results': data,
+        }
+        if self.with_count:
+            response['count'], response['count_is_estimated'] = estimate_count(self.queryset)
+        return Response(response)
+
+
+class CursorModePaginationMixin:
+    """
+    Добавляет к постраничной пагинации режим ?pagination=cursor
+    (KeysetCursorPagination с тем же размером страницы) для бесконечной прокрутки.
+    """
+    mode_query_param = 'pagination'
+    cursor_pagination_class = KeysetCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if request.query_params.get(self.mode_query_param) != 'cursor':
+            return super().paginate_queryset(queryset, request, view)
+
+        self.cursor_paginator = self.cursor_pagination_class()
+        self.cursor_paginator.page_size = self.page_size
+        self.cursor_paginator.max_page_size = self.max_page_size
+        return self.cursor_paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
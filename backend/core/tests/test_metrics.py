@@ -0,0 +1,25 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from prometheus_client import REGISTRY
+
+from core.metrics import mark_worker_process_dead, start_worker_metrics_server
+
+
+@patch("core.metrics.start_http_server")
+class WorkerMetricsServerTestCase(SimpleTestCase):
+    def test_single_process_registry(self, start_http_server) -> None:
+        with patch.dict("os.environ", {}, clear=False) as environ:
+            environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+            start_worker_metrics_server(9808)
+        start_http_server.assert_called_once_with(9808, registry=REGISTRY)
+
+    @patch("core.metrics.multiprocess")
+    def test_multiprocess_registry(self, multiprocess, start_http_server) -> None:
+        with patch.dict("os.environ", {"PROMETHEUS_MULTIPROC_DIR": "/tmp/celery-metrics"}):
+            start_worker_metrics_server(9808)
+            mark_worker_process_dead(42)
+        registry = start_http_server.call_args.kwargs["registry"]
+        self.assertIsNot(registry, REGISTRY)
+        multiprocess.MultiProcessCollector.assert_called_once_with(registry)
+        multiprocess.mark_process_dead.assert_called_once_with(42)
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from core.models import TaskLock
+from core.tests import BaseTestCase
+
+
+class TaskLockTestCase(BaseTestCase):
+    def test_lock_is_exclusive_until_released(self) -> None:
+        token = TaskLock.acquire("reindex", 60)
+        self.assertIsNotNone(token)
+        self.assertIsNone(TaskLock.acquire("reindex", 60))
+        # Другие операции блокируются независимо
+        self.assertIsNotNone(TaskLock.acquire("embed", 60))
+
+        self.assertTrue(TaskLock.release("reindex", token))
+        self.assertIsNotNone(TaskLock.acquire("reindex", 60))
+
+    def test_expired_lock_is_taken_over(self) -> None:
+        stale_token = TaskLock.acquire("reindex", 60)
+        TaskLock.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        token = TaskLock.acquire("reindex", 60)
+        self.assertIsNotNone(token)
+        # Прежний владелец не снимает чужую блокировку
+        self.assertFalse(TaskLock.release("reindex", stale_token))
+        self.assertTrue(TaskLock.release("reindex", token))
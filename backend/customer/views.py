@@ -5,6 +5,8 @@ from rest_framework.pagination import PageNumberPagination
 from django.db.models import Q, Count
 from django_utils_kit.viewsets import ImprovedViewSet
 
+from core.pagination import CursorModePaginationMixin
+
 from .models import Company
 from .serializers import (
     CompanyListSerializer, CompanyDetailSerializer,
@@ -13,7 +15,7 @@ from .serializers import (
 from .permissions import CompanyPermission
 
 
-class CompanyPagination(PageNumberPagination):
+class CompanyPagination(CursorModePaginationMixin, PageNumberPagination):
     page_size = 25
     page_size_query_param = 'page_size'
     max_page_size = 100
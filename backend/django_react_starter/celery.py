@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import worker_init, worker_process_shutdown
 from django.conf import settings
 from kombu import Exchange, Queue
 
@@ -40,9 +41,27 @@ app.conf.task_queues = [
 
 # Импортируем задачи после настройки Django
 from user.tasks import scheduled_cron_tasks as user_schedule
+from goods.tasks import scheduled_cron_tasks as goods_schedule
 
 app.conf.beat_schedule = {
     **user_schedule,
+    **goods_schedule,
 }
 
 app.conf.timezone = "UTC"
+
+
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    """Метрики задач отдаются с воркера: /metrics Django их не видит."""
+    from core.metrics import start_worker_metrics_server
+
+    if settings.WORKER_METRICS_PORT:
+        start_worker_metrics_server(settings.WORKER_METRICS_PORT)
+
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    from core.metrics import mark_worker_process_dead
+
+    mark_worker_process_dead(pid or os.getpid())
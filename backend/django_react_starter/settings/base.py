@@ -49,6 +49,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # Third party
     "rest_framework",
     "drf_spectacular",
@@ -266,6 +267,46 @@ SENTRY_INITIALIZED = False
 # --------------------------------------------------------------------------------
 MEILISEARCH_HOST = os.getenv("MEILISEARCH_HOST", "http://meilisearch:7700")
 MEILISEARCH_API_KEY = os.getenv("MEILISEARCH_API_KEY", "")
+# Компактная транслитерация: варианты написания хранятся в synonyms индекса,
+# а не в полях transliterated_* каждого документа
+MEILISEARCH_COMPACT_TRANSLITERATION = (
+    os.getenv("MEILISEARCH_COMPACT_TRANSLITERATION", "false").lower() == "true"
+)
+# Время жизни кэша подсказок автодополнения (секунды)
+GOODS_SUGGEST_CACHE_TTL = int(os.getenv("GOODS_SUGGEST_CACHE_TTL", 30))
+# Время жизни кэша дерева каталога (секунды); сбрасывается и раньше — при изменениях каталога
+GOODS_CATALOG_TREE_CACHE_TTL = int(os.getenv("GOODS_CATALOG_TREE_CACHE_TTL", 300))
+# Очередь переиндексации товаров: период сброса (секунды) и размер пачки
+GOODS_INDEX_QUEUE_FLUSH_INTERVAL = int(os.getenv("GOODS_INDEX_QUEUE_FLUSH_INTERVAL", 5))
+GOODS_INDEX_QUEUE_BATCH_SIZE = int(os.getenv("GOODS_INDEX_QUEUE_BATCH_SIZE", 5000))
+# Через сколько секунд пачку, взятую упавшим или зависшим сбросом, можно взять снова
+GOODS_INDEX_QUEUE_CLAIM_TIMEOUT = int(os.getenv("GOODS_INDEX_QUEUE_CLAIM_TIMEOUT", 300))
+# Сколько секунд хранить обработанные записи очереди; должно превышать
+# длительность полной переиндексации, которая повторяет изменения по ним
+GOODS_INDEX_QUEUE_RETENTION = int(os.getenv("GOODS_INDEX_QUEUE_RETENTION", 24 * 60 * 60))
+# Сколько секунд держится блокировка полной переиндексации товаров: после этого
+# срока упавшую переиндексацию может сменить новая; должно превышать ее длительность
+GOODS_REINDEX_LOCK_TIMEOUT = int(os.getenv("GOODS_REINDEX_LOCK_TIMEOUT", 6 * 60 * 60))
+# Период назначения номеров ленте изменений каталога (секунды): задержка появления изменения в ленте
+GOODS_CHANGE_FEED_INTERVAL = int(os.getenv("GOODS_CHANGE_FEED_INTERVAL", 5))
+
+
+# --------------------------------------------------------------------------------
+# > Embeddings
+# --------------------------------------------------------------------------------
+# Эмбеддер сервиса векторизации (embedding_service): HashingEmbedder работает
+# без моделей и сети, SentenceTransformerEmbedder использует локальную модель
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "embedding_service.HashingEmbedder")
+EMBEDDING_MODEL = os.getenv(
+    "EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+)
+# Сколько текстов передавать модели за один вызов
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+# Пересчет векторных таблиц в Celery: id в одной задаче и число задач одновременно
+EMBEDDING_CHUNK_SIZE = int(os.getenv("EMBEDDING_CHUNK_SIZE", 1000))
+EMBEDDING_MAX_PARALLEL = int(os.getenv("EMBEDDING_MAX_PARALLEL", 4))
+# Сколько секунд хранить в кэше векторы текстов, которых больше нет в векторных таблицах
+EMBEDDING_CACHE_RETENTION = int(os.getenv("EMBEDDING_CACHE_RETENTION", 30 * 24 * 60 * 60))
 
 
 # --------------------------------------------------------------------------------
@@ -290,6 +331,8 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "UTC"
+# Порт HTTP-сервера метрик Prometheus Celery-воркера (core.metrics); 0 — не запускать
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", 9808))
 
 # Queues
 RABBITMQ_USER_QUEUE = os.getenv("RABBITMQ_USER_QUEUE", "user-queue")
@@ -0,0 +1,223 @@
+"""
+Сервис векторизации текстов для векторных таблиц (pgvector)
+
+Тексты векторизуются пачками подключаемым эмбеддером (settings.EMBEDDING_BACKEND),
+а готовые векторы складываются в кэш core.EmbeddingCache по хэшу текста и имени
+модели. Неизменный текст не векторизуется повторно, даже если его вектор нужен
+другой таблице или таблица перестраивается с нуля: пересчет векторной таблицы
+сводится к чтению кэша и векторизации только новых текстов.
+
+Большие объемы обрабатываются цепочкой Celery-задач по chunk_size id: одновременно
+выполняется не больше max_parallel задач (см. chunked_workflow). Векторы, на
+которые больше не ссылается ни одна таблица, удаляются из кэша через
+EMBEDDING_CACHE_RETENTION секунд (prune_cache). Пропускная
+способность видна в Prometheus: embedding_texts_total (rate по result="embedded"
+и result="cache_hit") и embedding_batch_seconds. Задачи увеличивают их в процессах
+воркера, поэтому собираются они с сервера метрик воркера (core.metrics).
+"""
+
+from datetime import timedelta
+from functools import lru_cache
+import hashlib
+import logging
+import math
+import re
+import time
+from typing import Iterable, List, Optional, Sequence
+
+from celery import chain, group, shared_task
+from django.conf import settings
+from django.db.models import Exists, OuterRef, QuerySet
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from prometheus_client import Counter, Histogram
+
+from core.models import EmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+# Размерность векторов по умолчанию; 384 — размер распространенных
+# локальных моделей sentence-transformers (MiniLM)
+EMBEDDING_DIMENSIONS = 384
+
+# Сколько хэшей искать в кэше одним запросом IN
+CACHE_LOOKUP_BATCH_SIZE = 5000
+
+EMBEDDING_TEXTS = Counter(
+    'embedding_texts_total',
+    'Тексты, прошедшие через сервис векторизации',
+    ['model', 'result'],
+)
+EMBEDDING_BATCH_SECONDS = Histogram(
+    'embedding_batch_seconds',
+    'Время векторизации одной пачки текстов моделью',
+    ['model'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+
+class HashingEmbedder:
+    """
+    Эмбеддер без модели: слова и n-граммы символов хэшируются в координаты
+    вектора (feature hashing). Похожими считаются тексты с общими токенами:
+    одна серия part number, бренд, подгруппа, значения параметров.
+    """
+    name = 'hashing-v1'
+    ngram_size = 3
+
+    def __init__(self, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        return [self._embed_one(text) for text in texts]
+
+    def _embed_one(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for feature, weight in self._features(text):
+            digest = hashlib.md5(feature.encode()).digest()
+            index = int.from_bytes(digest[:4], 'little') % self.dimensions
+            # Знак из хэша уменьшает влияние коллизий
+            vector[index] += weight if digest[4] & 1 else -weight
+        norm = math.sqrt(sum(value * value for value in vector))
+        return [value / norm for value in vector] if norm else vector
+
+    def _features(self, text: str) -> Iterable[tuple]:
+        for word in re.findall(r'\w+', text.lower()):
+            yield f'w:{word}', 1.0
+            padded = f'^{word}$'
+            for start in range(len(padded) - self.ngram_size + 1):
+                yield f'g:{padded[start:start + self.ngram_size]}', 0.5
+
+
+class SentenceTransformerEmbedder:
+    """
+    Локальная модель sentence-transformers (settings.EMBEDDING_MODEL).
+    Размерность модели должна совпадать с размерностью векторной таблицы.
+    """
+    def __init__(self, model_name: Optional[str] = None):
+        from sentence_transformers import SentenceTransformer
+
+        self.name = model_name or settings.EMBEDDING_MODEL
+        self.model = SentenceTransformer(self.name)
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        return self.model.encode(list(texts), normalize_embeddings=True).tolist()
+
+
+@lru_cache(maxsize=1)
+def get_embedder():
+    """Эмбеддер из настроек; создается один раз на процесс."""
+    return import_string(settings.EMBEDDING_BACKEND)()
+
+
+def content_hash(text: str) -> str:
+    """Ключ кэша для текста (вместе с именем модели)."""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def embed_texts(texts: Sequence[str], embedder=None, batch_size: Optional[int] = None) -> List[List[float]]:
+    """
+    Векторы текстов в исходном порядке. Векторы ищутся в кэше, модель
+    вызывается пачками по batch_size только для новых текстов, повторы
+    внутри списка векторизуются один раз.
+    """
+    embedder = embedder or get_embedder()
+    batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+    hashes = [content_hash(text) for text in texts]
+    unique_texts = dict(zip(hashes, texts))
+
+    vectors = {}
+    keys = list(unique_texts)
+    for start in range(0, len(keys), CACHE_LOOKUP_BATCH_SIZE):
+        vectors.update(
+            EmbeddingCache.objects
+            .filter(model_name=embedder.name, content_hash__in=keys[start:start + CACHE_LOOKUP_BATCH_SIZE])
+            .values_list('content_hash', 'embedding')
+        )
+    missing = [key for key in keys if key not in vectors]
+    EMBEDDING_TEXTS.labels(embedder.name, 'cache_hit').inc(len(keys) - len(missing))
+
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        started = time.perf_counter()
+        embedded = embedder.embed([unique_texts[key] for key in batch])
+        EMBEDDING_BATCH_SECONDS.labels(embedder.name).observe(time.perf_counter() - started)
+        EMBEDDING_TEXTS.labels(embedder.name, 'embedded').inc(len(batch))
+
+        # Параллельная задача могла уже записать те же тексты
+        EmbeddingCache.objects.bulk_create(
+            [
+                EmbeddingCache(content_hash=key, model_name=embedder.name, embedding=vector)
+                for key, vector in zip(batch, embedded)
+            ],
+            ignore_conflicts=True,
+        )
+        vectors.update(zip(batch, embedded))
+
+    if missing:
+        logger.info(f"Векторизовано {len(missing)} новых текстов из {len(keys)} ({embedder.name})")
+    return [vectors[key] for key in hashes]
+
+
+def split_chunks(ids: Sequence[int], chunk_size: int) -> List[List[int]]:
+    """Делит список id на пачки по chunk_size."""
+    ids = list(ids)
+    return [ids[start:start + chunk_size] for start in range(0, len(ids), chunk_size)]
+
+
+def chunked_workflow(task, ids: Sequence[int], chunk_size: Optional[int] = None, max_parallel: Optional[int] = None):
+    """
+    Celery-цепочка вызовов task(chunk) по пачкам id: пачки идут волнами
+    по max_parallel задач, следующая волна начинается после завершения
+    предыдущей. Так пересчет большой таблицы не занимает все воркеры
+    очереди и не перегружает модель. Возвращает подпись для apply_async().
+
+    Упавшая пачка останавливает все следующие волны; об этом пишет в лог
+    обработчик ошибки log_workflow_error, привязанный к каждой пачке.
+    """
+    chunks = split_chunks(ids, chunk_size or settings.EMBEDDING_CHUNK_SIZE)
+    max_parallel = max_parallel or settings.EMBEDDING_MAX_PARALLEL
+    signatures = [
+        task.si(chunk).on_error(log_workflow_error.si(task.name, number, len(chunks), len(chunk)))
+        for number, chunk in enumerate(chunks, start=1)
+    ]
+    waves = [
+        group(signatures[start:start + max_parallel])
+        for start in range(0, len(signatures), max_parallel)
+    ]
+    return chain(*waves)
+
+
+@shared_task
+def log_workflow_error(task_name: str, number: int, total: int, size: int) -> None:
+    """
+    Обработчик ошибки пачки chunked_workflow. Вызывается воркером упавшей
+    задачи; следующие волны цепочки уже не запустятся, и их нужно
+    перезапустить (векторы неизменных текстов возьмутся из кэша).
+    """
+    logger.error(
+        f"Пачка {number} из {total} ({size} id) задачи {task_name} завершилась ошибкой: "
+        f"следующие волны цепочки не запущены"
+    )
+
+
+def prune_cache(retention: int, keep: Iterable[QuerySet] = ()) -> int:
+    """
+    Удаляет из кэша векторы старше retention секунд, кроме тех, на которые
+    ссылается хотя бы одна векторная таблица из keep (queryset с полями
+    content_hash и model_name). Так в кэше остаются векторы текущих текстов,
+    нужные для пересборки таблиц, а векторы прежних версий текстов уходят.
+
+    Returns:
+        int: количество удаленных векторов
+    """
+    cutoff = timezone.now() - timedelta(seconds=retention)
+    stale = EmbeddingCache.objects.filter(created_at__lt=cutoff)
+    for table in keep:
+        stale = stale.exclude(
+            Exists(table.filter(content_hash=OuterRef('content_hash'), model_name=OuterRef('model_name')))
+        )
+    deleted = stale.delete()[0]
+    if deleted:
+        logger.info(f"Из кэша векторов удалено {deleted} устаревших записей")
+    return deleted
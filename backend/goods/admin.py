@@ -1,4 +1,5 @@
 from django.contrib import admin
+from core.pagination import EstimatedCountPaginator
 from .models import Product, ProductSubgroup, ProductGroup, Brand
 
 
@@ -7,6 +8,9 @@ class ProductAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'subgroup', 'brand', 'deleted_at')
     list_filter = ('deleted_at', 'subgroup', 'brand')
     search_fields = ('name', 'subgroup__name', 'brand__name')
+    # Оценка количества вместо COUNT(*) по всей таблице на каждой странице
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     def get_queryset(self, request):
         # Показываем ВСЕ товары (включая удаленные) в админке
@@ -0,0 +1,197 @@
+"""
+Пакетное создание и обновление товаров (импорт из таблиц).
+
+Строки проверяются сериализатором без запросов к базе, ссылки на
+подгруппы, бренды и менеджеров — одним запросом IN на каждую модель.
+Корректные строки сохраняются через bulk_create/bulk_update в одной
+транзакции, все затронутые товары ставятся в очередь индексации одной
+вставкой. Строки с ошибками пропускаются и возвращаются с номерами.
+Не-администратор может обновлять только товары, за которые отвечает
+(как менеджер товара, его бренда или подгруппы), как и в PATCH.
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+from django.db import transaction
+from rest_framework import serializers
+
+from core.models import ResourceVersion
+from goods.models import (
+    CATALOG_TREE_RESOURCE,
+    Brand,
+    Product,
+    ProductIndexQueue,
+    ProductParameter,
+    ProductSubgroup,
+)
+from goods.utils import TransliterationUtils
+from user.models import User
+
+logger = logging.getLogger(__name__)
+
+# Размер пачки для bulk_create/bulk_update
+BATCH_SIZE = 1000
+
+# Поля товара, которые можно передать в строке
+PRODUCT_FIELDS = [
+    'name', 'complex_name', 'description', 'tech_params', 'ext_id',
+    'subgroup_id', 'brand_id', 'product_manager_id',
+]
+
+
+class ProductBatchRowSerializer(serializers.Serializer):
+    """Строка пакета: id или ext_id существующего товара — обновление, иначе создание."""
+    id = serializers.IntegerField(required=False)
+    ext_id = serializers.CharField(max_length=100, required=False, allow_null=True)
+    name = serializers.CharField(max_length=200, required=False)
+    complex_name = serializers.CharField(max_length=512, required=False, allow_blank=True)
+    description = serializers.CharField(required=False, allow_blank=True)
+    tech_params = serializers.DictField(required=False)
+    subgroup_id = serializers.IntegerField(required=False)
+    brand_id = serializers.IntegerField(required=False, allow_null=True)
+    product_manager_id = serializers.IntegerField(required=False, allow_null=True)
+
+
+def upsert_products(rows: List[Dict[str, Any]], user: Optional[User] = None) -> Dict[str, Any]:
+    """
+    Создает и обновляет товары по списку строк.
+
+    Args:
+        rows: строки пакета
+        user: автор загрузки; если это не администратор, обновляются только его товары
+
+    Returns:
+        dict: {'created': [id, ...], 'updated': [id, ...], 'errors': [{'row': номер, 'errors': {...}}, ...]}
+    """
+    restricted_user_id = user.id if user is not None and user.role != User.RoleChoices.ADMIN else None
+    errors = []
+    valid = []
+    for number, row in enumerate(rows):
+        serializer = ProductBatchRowSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((number, serializer.validated_data))
+        else:
+            errors.append({'row': number, 'errors': serializer.errors})
+
+    with transaction.atomic():
+        products_by_id = Product.objects.select_for_update().in_bulk(
+            {data['id'] for _, data in valid if 'id' in data}
+        )
+        products_by_ext_id = Product.objects.select_for_update().in_bulk(
+            {data['ext_id'] for _, data in valid if 'id' not in data and data.get('ext_id')},
+            field_name='ext_id',
+        )
+        existing = [*products_by_id.values(), *products_by_ext_id.values()]
+        # Владельцы ext_id, включая мягко удаленные товары (ext_id уникален по всей таблице)
+        ext_id_owners = dict(
+            Product.global_objects.filter(
+                ext_id__in={data['ext_id'] for _, data in valid if data.get('ext_id')}
+            ).values_list('ext_id', 'id')
+        )
+
+        # Менеджеры нужны и для подгрупп/брендов, которые строка не меняет
+        subgroup_managers = dict(
+            ProductSubgroup.objects.filter(
+                id__in={data['subgroup_id'] for _, data in valid if 'subgroup_id' in data}
+                | {product.subgroup_id for product in existing}
+            ).values_list('id', 'product_manager_id')
+        )
+        brand_managers = dict(
+            Brand.objects.filter(
+                id__in={data['brand_id'] for _, data in valid if data.get('brand_id')}
+                | {product.brand_id for product in existing if product.brand_id}
+            ).values_list('id', 'product_manager_id')
+        )
+        manager_ids = set(
+            User.objects.filter(
+                id__in={data['product_manager_id'] for _, data in valid if data.get('product_manager_id')}
+            ).values_list('id', flat=True)
+        )
+
+        to_create, to_update = [], {}
+        params_changed = set()
+        seen_ext_ids = set()
+        for number, data in valid:
+            row_errors = _reference_errors(data, subgroup_managers, brand_managers, manager_ids)
+            if 'id' in data:
+                product = products_by_id.get(data['id'])
+                if product is None:
+                    row_errors['id'] = ['Товар не найден']
+            else:
+                product = products_by_ext_id.get(data.get('ext_id'))
+                if product is None:
+                    for field in ('name', 'subgroup_id'):
+                        if field not in data:
+                            row_errors[field] = ['Обязательное поле для нового товара']
+            if data.get('ext_id'):
+                owner_id = ext_id_owners.get(data['ext_id'])
+                if data['ext_id'] in seen_ext_ids:
+                    row_errors['ext_id'] = ['ext_id повторяется в пакете']
+                elif owner_id is not None and (product is None or owner_id != product.pk):
+                    row_errors['ext_id'] = ['ext_id уже занят другим товаром']
+                seen_ext_ids.add(data['ext_id'])
+            if product is not None and restricted_user_id is not None and restricted_user_id not in (
+                product.product_manager_id,
+                brand_managers.get(product.brand_id),
+                subgroup_managers.get(product.subgroup_id),
+            ):
+                row_errors['id'] = ['Нет прав на изменение товара']
+            elif product is not None and product.pk in to_update:
+                row_errors['id'] = ['Товар повторяется в пакете']
+            if row_errors:
+                errors.append({'row': number, 'errors': row_errors})
+                continue
+
+            if product is None:
+                product = Product()
+                to_create.append(product)
+            else:
+                to_update[product.pk] = product
+                if 'tech_params' in data:
+                    params_changed.add(product.pk)
+            for field in PRODUCT_FIELDS:
+                if field in data:
+                    setattr(product, field, data[field])
+            # save() не вызывается, поэтому производные поля считаются здесь
+            product.part_number_key = TransliterationUtils.normalize_part_number(
+                product.name or product.complex_name
+            )
+            product.effective_manager_id = (
+                product.product_manager_id
+                or brand_managers.get(product.brand_id)
+                or subgroup_managers.get(product.subgroup_id)
+            )
+
+        Product.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        Product.objects.bulk_update(
+            to_update.values(),
+            PRODUCT_FIELDS + ['part_number_key', 'effective_manager_id'],
+            batch_size=BATCH_SIZE,
+        )
+        created = [product.pk for product in to_create]
+        updated = list(to_update)
+        ProductIndexQueue.enqueue_ids(created + updated)
+        # Параметры перестраиваются у новых товаров и у товаров с новыми tech_params
+        ProductParameter.rebuild(
+            created + [product_id for product_id in updated if product_id in params_changed]
+        )
+        if created or updated:
+            ResourceVersion.bump(CATALOG_TREE_RESOURCE)
+
+    errors.sort(key=lambda error: error['row'])
+    logger.info(
+        f"Пакетная загрузка товаров: создано {len(created)}, обновлено {len(updated)}, ошибок {len(errors)}"
+    )
+    return {'created': created, 'updated': updated, 'errors': errors}
+
+
+def _reference_errors(data, subgroup_managers, brand_managers, manager_ids) -> Dict[str, List[str]]:
+    """Ошибки ссылок строки по заранее выбранным подгруппам, брендам и менеджерам."""
+    row_errors = {}
+    if 'subgroup_id' in data and data['subgroup_id'] not in subgroup_managers:
+        row_errors['subgroup_id'] = ['Подгруппа не найдена']
+    if data.get('brand_id') and data['brand_id'] not in brand_managers:
+        row_errors['brand_id'] = ['Бренд не найден']
+    if data.get('product_manager_id') and data['product_manager_id'] not in manager_ids:
+        row_errors['product_manager_id'] = ['Менеджер не найден']
+    return row_errors
@@ -0,0 +1,102 @@
+"""
+Дерево каталога для навигации: группы -> подгруппы -> бренды с количеством товаров.
+
+Дерево строится одним агрегирующим запросом и кэшируется по версии
+ресурса CATALOG_TREE_RESOURCE (core.ResourceVersion). Версию увеличивают
+сигналы при изменении групп, подгрупп, брендов и состава товаров, поэтому
+кэш не нужно очищать явно. ETag — хэш содержимого: если после пересчета
+дерево не изменилось, клиент по-прежнему получает 304.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from core.models import ResourceVersion
+from goods.models import CATALOG_TREE_RESOURCE, ProductGroup
+
+
+def build_catalog_tree() -> Dict[str, Any]:
+    """
+    Строит дерево каталога одним запросом: группы с LEFT JOIN на подгруппы
+    и товары, сгруппированные по подгруппе и бренду. Группы без подгрупп
+    и подгруппы без товаров попадают в дерево с нулевым количеством.
+    """
+    rows = (
+        ProductGroup.objects
+        .values(
+            'id',
+            'name',
+            'subgroups__id',
+            'subgroups__name',
+            'subgroups__products__brand_id',
+            'subgroups__products__brand__name',
+        )
+        .annotate(product_count=Count(
+            'subgroups__products', filter=Q(subgroups__products__deleted_at__isnull=True)
+        ))
+        .order_by('name', 'id', 'subgroups__name', 'subgroups__id', 'subgroups__products__brand__name')
+    )
+
+    groups = {}
+    brands = {}
+    for row in rows:
+        group = groups.setdefault(row['id'], {
+            'id': row['id'],
+            'name': row['name'],
+            'product_count': 0,
+            'subgroups': {},
+        })
+        if row['subgroups__id'] is None:
+            continue
+        subgroup = group['subgroups'].setdefault(row['subgroups__id'], {
+            'id': row['subgroups__id'],
+            'name': row['subgroups__name'],
+            'product_count': 0,
+            'brands': [],
+        })
+        count = row['product_count']
+        if not count:
+            continue
+        group['product_count'] += count
+        subgroup['product_count'] += count
+        brand_id = row['subgroups__products__brand_id']
+        if brand_id is None:
+            continue
+        brand_name = row['subgroups__products__brand__name']
+        subgroup['brands'].append({
+            'id': brand_id,
+            'name': brand_name,
+            'product_count': count,
+        })
+        brand = brands.setdefault(brand_id, {
+            'id': brand_id,
+            'name': brand_name,
+            'product_count': 0,
+        })
+        brand['product_count'] += count
+
+    for group in groups.values():
+        group['subgroups'] = list(group['subgroups'].values())
+    return {
+        'groups': list(groups.values()),
+        'brands': sorted(brands.values(), key=lambda brand: brand['name']),
+        'product_count': sum(group['product_count'] for group in groups.values()),
+    }
+
+
+def get_catalog_tree() -> Tuple[str, Dict[str, Any]]:
+    """Дерево каталога из кэша текущей версии или построенное заново. Возвращает (etag, дерево)."""
+    cache_key = f'goods:catalog_tree:{ResourceVersion.current(CATALOG_TREE_RESOURCE)}'
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    tree = build_catalog_tree()
+    raw = json.dumps(tree, ensure_ascii=False, sort_keys=True)
+    etag = '"' + hashlib.md5(raw.encode()).hexdigest() + '"'
+    cache.set(cache_key, (etag, tree), settings.GOODS_CATALOG_TREE_CACHE_TTL)
+    return etag, tree
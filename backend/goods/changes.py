@@ -0,0 +1,111 @@
+"""
+Лента изменений каталога: группы, подгруппы, бренды и товары.
+
+Триггеры (миграции 0010 и 0015) сбрасывают change_seq строки в NULL при
+вставке и при изменении ее полей, а при удалении пишут CatalogTombstone.
+Номера назначает assign_change_sequence из периодической задачи
+assign_catalog_change_sequence — по одному процессу за раз под
+advisory-блокировкой и только закоммиченным строкам. Поэтому номера
+видимых строк растут в порядке коммита, и клиент, запомнивший последний
+номер, не пропустит изменение, закоммиченное позже более раннего номера.
+Изменение попадает в ленту с задержкой до GOODS_CHANGE_FEED_INTERVAL.
+
+Это покрывает запись через API, bulk-операции импорта и сырой SQL
+одинаково: отдельно вести номер в коде не нужно.
+"""
+import heapq
+from typing import Any, Dict, Iterable, List
+
+from django.db import connection, transaction
+
+from goods.models import Brand, CatalogTombstone, Product, ProductGroup, ProductSubgroup
+
+# Ключ pg_advisory_xact_lock для назначения номеров
+ASSIGN_LOCK_KEY = 4_800_048
+
+# Тип объекта -> (модель, компактный набор полей)
+CHANGE_SOURCES = {
+    'group': (ProductGroup, ['id', 'name', 'ext_id']),
+    'subgroup': (ProductSubgroup, ['id', 'name', 'ext_id', 'group_id', 'product_manager_id']),
+    'brand': (Brand, ['id', 'name', 'ext_id', 'product_manager_id']),
+    'product': (Product, [
+        'id', 'name', 'ext_id', 'subgroup_id', 'brand_id', 'effective_manager_id', 'deleted_at',
+    ]),
+}
+
+
+def assign_change_sequence() -> bool:
+    """
+    Назначает номера изменений закоммиченным измененным строкам и записям об удалении.
+    Если номера уже назначает другой процесс, ничего не делает и возвращает False.
+    """
+    tables = [model._meta.db_table for model, _fields in CHANGE_SOURCES.values()]
+    tables.append(CatalogTombstone._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_xact_lock(%s)', [ASSIGN_LOCK_KEY])
+        if not cursor.fetchone()[0]:
+            return False
+        # Триггер пропускает только записи с этим флагом
+        cursor.execute("SELECT set_config('goods.assigning_change_seq', 'on', true)")
+        for table in tables:
+            cursor.execute(
+                f"UPDATE {table} SET change_seq = nextval('goods_change_seq') WHERE change_seq IS NULL"
+            )
+        # Флаг живет до конца внешней транзакции, если она есть: снимаем его сразу
+        cursor.execute("SELECT set_config('goods.assigning_change_seq', 'off', true)")
+    return True
+
+
+def fetch_changes(since: int, limit: int) -> Dict[str, Any]:
+    """
+    Изменения с номером больше since, не больше limit штук, по возрастанию номера.
+
+    Returns:
+        dict: {'changes': [...], 'next_since': номер для следующего запроса, 'has_more': bool}
+    """
+    sources = []
+    for kind, (model, fields) in CHANGE_SOURCES.items():
+        rows = (
+            model._base_manager
+            .filter(change_seq__gt=since)
+            .order_by('change_seq')
+            .values('change_seq', *fields)[:limit + 1]
+        )
+        sources.append(_compact_rows(kind, rows))
+    tombstones = (
+        CatalogTombstone.objects
+        .filter(change_seq__gt=since)
+        .order_by('change_seq')
+        .values_list('change_seq', 'kind', 'object_id')[:limit + 1]
+    )
+    sources.append(
+        {'seq': seq, 'type': kind, 'id': object_id, 'deleted': True}
+        for seq, kind, object_id in tombstones
+    )
+    return merge_changes(sources, since, limit)
+
+
+def merge_changes(sources: Iterable[Iterable[Dict[str, Any]]], since: int, limit: int) -> Dict[str, Any]:
+    """Сливает упорядоченные по seq источники в одну страницу ленты."""
+    merged = list(heapq.merge(*sources, key=lambda change: change['seq']))
+    changes = merged[:limit]
+    return {
+        'changes': changes,
+        'next_since': changes[-1]['seq'] if changes else since,
+        'has_more': len(merged) > limit,
+    }
+
+
+def _compact_rows(kind: str, rows) -> List[Dict[str, Any]]:
+    changes = []
+    for row in rows:
+        seq = row.pop('change_seq')
+        deleted_at = row.pop('deleted_at', None)
+        changes.append({
+            'seq': seq,
+            'type': kind,
+            'id': row['id'],
+            'deleted': deleted_at is not None,
+            'data': None if deleted_at is not None else row,
+        })
+    return changes
@@ -0,0 +1,145 @@
+"""
+Поиск расхождений между товарами в PostgreSQL и индексом MeiliSearch.
+
+Товары и документы сравниваются по отпечаткам (хэш полей, которые видит
+поиск) диапазонами id, поэтому ни одна из сторон не загружается целиком.
+Результат — списки id:
+- missing: товар есть в базе, документа в индексе нет;
+- stale: документ есть, но его поля устарели;
+- orphaned: документ есть, а товара нет (удален или мягко удален).
+"""
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db.models import Q
+
+from goods.indexers import ProductIndexer
+from goods.models import Product
+
+logger = logging.getLogger(__name__)
+
+# Поля документа, по которым считается отпечаток
+FINGERPRINT_FIELDS = [
+    "name",
+    "brand_id",
+    "brand_name",
+    "subgroup_id",
+    "subgroup_name",
+    "group_id",
+    "group_name",
+    "product_manager_id",
+    "product_manager_name",
+    "tech_params",
+]
+
+# Сколько документов запрашивать из MeiliSearch за один раз
+DOCUMENTS_PAGE_SIZE = 1000
+
+
+def fingerprint(document: Dict[str, Any]) -> str:
+    """Отпечаток документа: пустые строки и None считаются одинаковыми."""
+    values = [document.get(field) or None for field in FINGERPRINT_FIELDS]
+    raw = json.dumps(values, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def db_fingerprints(start: Optional[int], end: Optional[int]) -> Dict[int, str]:
+    """Отпечатки товаров базы с id в диапазоне [start, end)."""
+    columns = [("name", "name"), ("tech_params", "tech_params")]
+    for part in ("brand", "subgroup", "group", "manager"):
+        columns.extend(ProductIndexer.RELATED_PARTS[part].items())
+
+    rows = Product.objects.filter(_range_q(start, end)).values_list(
+        "id", *(expression for _field, expression in columns)
+    )
+    fingerprints = {}
+    for row in rows.iterator(chunk_size=ProductIndexer.CHUNK_SIZE):
+        document = {field: value for (field, _expression), value in zip(columns, row[1:])}
+        fingerprints[row[0]] = fingerprint(document)
+    return fingerprints
+
+
+def index_fingerprints(start: Optional[int], end: Optional[int]) -> Dict[int, str]:
+    """Отпечатки документов индекса с id в диапазоне [start, end)."""
+    index = ProductIndexer.meilisearch_client().index(ProductIndexer.index_name())
+    conditions = []
+    if start is not None:
+        conditions.append(f"id >= {start}")
+    if end is not None:
+        conditions.append(f"id < {end}")
+
+    fingerprints = {}
+    offset = 0
+    while True:
+        page = index.get_documents({
+            "fields": ["id", *FINGERPRINT_FIELDS],
+            "filter": " AND ".join(conditions) or None,
+            "limit": DOCUMENTS_PAGE_SIZE,
+            "offset": offset,
+        })
+        for document in page.results:
+            document = dict(document)
+            fingerprints[int(document["id"])] = fingerprint(document)
+        offset += len(page.results)
+        if not page.results or offset >= page.total:
+            return fingerprints
+
+
+def find_index_drift(range_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Сравнивает базу и индекс по диапазонам id.
+
+    Returns:
+        dict: {'checked': число товаров, 'missing': [...], 'stale': [...], 'orphaned': [...]}
+    """
+    report = {"missing": [], "stale": [], "orphaned": []}
+    checked = 0
+    for start, end in _ranges(range_size):
+        in_db = db_fingerprints(start, end)
+        in_index = index_fingerprints(start, end)
+        checked += len(in_db)
+
+        for product_id, db_fingerprint in in_db.items():
+            if product_id not in in_index:
+                report["missing"].append(product_id)
+            elif in_index[product_id] != db_fingerprint:
+                report["stale"].append(product_id)
+        report["orphaned"].extend(product_id for product_id in in_index if product_id not in in_db)
+
+    report["checked"] = checked
+    logger.info(
+        f"Проверено {checked} товаров: нет в индексе {len(report['missing'])}, "
+        f"устарели {len(report['stale'])}, лишние {len(report['orphaned'])}"
+    )
+    return report
+
+
+def repair_index_drift(report: Dict[str, Any]) -> None:
+    """Переиндексирует отсутствующие и устаревшие документы и удаляет лишние."""
+    to_index = report["missing"] + report["stale"]
+    if to_index:
+        ProductIndexer.index_in_chunks(Q(pk__in=to_index), ProductIndexer.index_name())
+    if report["orphaned"]:
+        ProductIndexer.unindex_multiple(report["orphaned"])
+
+
+def _ranges(range_size: Optional[int]) -> List[Tuple[Optional[int], Optional[int]]]:
+    """
+    Диапазоны товаров базы плюс открытые края: документы с id за пределами
+    товаров базы тоже должны попасть в проверку как лишние.
+    """
+    ranges = ProductIndexer.id_ranges(range_size)
+    if not ranges:
+        return [(None, None)]
+    return [(None, ranges[0][0]), *ranges, (ranges[-1][1], None)]
+
+
+def _range_q(start: Optional[int], end: Optional[int]) -> Q:
+    query = Q()
+    if start is not None:
+        query &= Q(id__gte=start)
+    if end is not None:
+        query &= Q(id__lt=end)
+    return query
@@ -0,0 +1,149 @@
+"""
+Векторные представления товаров (pgvector) для поиска похожих товаров.
+
+Текст товара (part number, бренд, группа, подгруппа, технические параметры)
+превращается в вектор сервисом векторизации (embedding_service) и хранится
+в ProductEmbedding с HNSW-индексом по косинусному расстоянию. Сервис берет
+векторы неизменных текстов из кэша, поэтому полный пересчет таблицы после
+ее очистки не вызывает модель повторно.
+
+Измененные товары берутся из очереди индексации (ProductIndexQueue): сброс
+очереди ставит одну векторизацию на пачку и только для товаров, у которых
+изменился текст, а не одну задачу на каждое сохранение. Переименование
+бренда, подгруппы или группы пересчитывает векторы их товаров из частичного
+обновления индекса (update_related_product_documents). Запрос похожих
+товаров модель не вызывает: вектор без пары ставится в очередь.
+"""
+import logging
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django.db import transaction
+from pgvector.django import CosineDistance
+
+from embedding_service import chunked_workflow, content_hash, embed_texts, get_embedder
+from goods.models import Product, ProductEmbedding
+
+logger = logging.getLogger(__name__)
+
+# Сколько векторов записывать одной вставкой
+EMBED_BATCH_SIZE = 256
+
+# Части документа индекса (ProductIndexer.RELATED_PARTS), названия которых входят в текст товара
+EMBEDDING_RELATED_PARTS = {'brand', 'subgroup', 'group'}
+
+
+def product_embedding_text(row: Dict) -> str:
+    """Текст товара для векторизации из строки embedding_rows()."""
+    parts = [
+        row['name'],
+        row['brand__name'],
+        row['subgroup__group__name'],
+        row['subgroup__name'],
+    ]
+    parts.extend(f'{key} {value}' for key, value in (row['tech_params'] or {}).items())
+    return ' '.join(str(part) for part in parts if part)
+
+
+def embedding_rows(product_ids: Iterable[int]):
+    """Поля товаров, из которых строится текст для векторизации."""
+    return Product.objects.filter(id__in=product_ids).values(
+        'id', 'name', 'brand__name', 'subgroup__name', 'subgroup__group__name', 'tech_params'
+    )
+
+
+def embed_products(product_ids: Iterable[int]) -> int:
+    """
+    Пересчитывает векторы товаров; товары с неизменным текстом и той же
+    моделью пропускаются. Удаленные товары не векторизуются.
+
+    Returns:
+        int: количество пересчитанных векторов
+    """
+    embedder = get_embedder()
+    rows = list(embedding_rows(product_ids))
+    texts = {row['id']: product_embedding_text(row) for row in rows}
+    hashes = {product_id: content_hash(text) for product_id, text in texts.items()}
+    current = dict(
+        ProductEmbedding.objects.filter(product_id__in=texts, model_name=embedder.name)
+        .values_list('product_id', 'content_hash')
+    )
+    stale = [product_id for product_id in texts if current.get(product_id) != hashes[product_id]]
+    if not stale:
+        return 0
+
+    vectors = embed_texts([texts[product_id] for product_id in stale], embedder)
+    ProductEmbedding.objects.bulk_create(
+        [
+            ProductEmbedding(
+                product_id=product_id,
+                embedding=vector,
+                content_hash=hashes[product_id],
+                model_name=embedder.name,
+            )
+            for product_id, vector in zip(stale, vectors)
+        ],
+        batch_size=EMBED_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['product'],
+        update_fields=['embedding', 'content_hash', 'model_name', 'updated_at'],
+    )
+    return len(stale)
+
+
+def changed_product_ids(product_ids: Iterable[int]) -> List[int]:
+    """
+    Товары, текст которых не совпадает с текстом сохраненного вектора или у которых вектора нет.
+    Сравниваются только хэши текстов: эмбеддер не загружается, а пересчет под
+    новую модель запускается отдельно (embed_products --async).
+    """
+    rows = list(embedding_rows(product_ids))
+    current = dict(
+        ProductEmbedding.objects.filter(product_id__in=[row['id'] for row in rows])
+        .values_list('product_id', 'content_hash')
+    )
+    return [row['id'] for row in rows if current.get(row['id']) != content_hash(product_embedding_text(row))]
+
+
+def schedule_product_embedding(product_ids: List[int]) -> None:
+    """
+    Ставит пересчет векторов товаров в Celery после коммита текущей транзакции.
+    Большие списки делятся на пачки с ограниченным числом задач одновременно.
+    """
+    if settings.ENVIRONMENT == "test" or not product_ids:
+        return
+
+    from goods.tasks import embed_products as embed_products_task
+
+    def send():
+        try:
+            chunked_workflow(embed_products_task, product_ids).apply_async()
+        except Exception as e:
+            logger.warning(f"Не удалось поставить векторизацию {len(product_ids)} товаров: {e}")
+
+    transaction.on_commit(send)
+
+
+def find_similar_products(product_id: int, limit: int) -> List[tuple]:
+    """
+    Ближайшие по косинусному расстоянию товары (HNSW-индекс).
+    Если у товара еще нет вектора, он ставится на векторизацию в Celery,
+    а результат пуст: модель не загружается в процессе запроса.
+
+    Returns:
+        list: пары (id товара, сходство от -1 до 1), по убыванию сходства
+    """
+    embedding = ProductEmbedding.objects.filter(product_id=product_id).values_list('embedding', flat=True).first()
+    if embedding is None:
+        schedule_product_embedding([product_id])
+        return []
+
+    # Векторы удаленных товаров удаляются вместе с ними, фильтр по товарам не нужен
+    neighbours = (
+        ProductEmbedding.objects
+        .exclude(product_id=product_id)
+        .annotate(distance=CosineDistance('embedding', embedding))
+        .order_by('distance')
+        .values_list('product_id', 'distance')[:limit]
+    )
+    return [(neighbour_id, 1 - distance) for neighbour_id, distance in neighbours]
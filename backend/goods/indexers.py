@@ -1,9 +1,32 @@
-from typing import Any, Dict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+import logging
+import multiprocessing
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import F, Max, Min, Q
+from django.utils import timezone
 from django_meilisearch_indexer.indexers import MeilisearchModelIndexer
+from meilisearch.index import Index
+from meilisearch.models.task import TaskInfo
 
-from goods.models import Product
+from core.models import TaskLock
+from goods.models import (
+    RELATED_INDEX_FIELDS,
+    Brand,
+    Product,
+    ProductGroup,
+    ProductIndexQueue,
+    ProductSubgroup,
+    RelatedIndexQueue,
+)
 from goods.utils import TransliterationUtils
+from user.models import User
+
+logger = logging.getLogger(__name__)
 
 
 class ProductIndexer(MeilisearchModelIndexer[Product]):
@@ -11,8 +34,43 @@ class ProductIndexer(MeilisearchModelIndexer[Product]):
 
     MODEL_CLASS = Product
     PRIMARY_KEY = "id"
+    # Размер пачки: и для чтения из базы, и для одной отправки в MeiliSearch
+    CHUNK_SIZE = 1000
+    # Сколько отправленных пачек может одновременно ждать обработки в MeiliSearch
+    MAX_PENDING_TASKS = 4
+    TASK_TIMEOUT_MS = 5 * 60 * 1000
+    # Запас к времени начала переиндексации при повторе изменений из очереди:
+    # время постановки в очередь ставят и приложение, и база
+    REPLAY_CLOCK_MARGIN = timedelta(minutes=1)
+    # Ширина диапазона id для одной части параллельной переиндексации
+    RANGE_SIZE = 20000
+    # Ключ pg_advisory_xact_lock для дополнения словаря синонимов
+    SYNONYMS_LOCK_KEY = 4_800_026
+    # Имя блокировки core.TaskLock полной переиндексации: временный индекс у нее один
+    REINDEX_LOCK = "goods.products_reindex"
+    # Части документа, которые зависят от связанных объектов: поля документа
+    # и выражения для их расчета (последнее поле — название для транслитерации)
+    RELATED_PARTS = {
+        "brand": {
+            "brand_id": F("brand_id"),
+            "brand_name": F("brand__name"),
+        },
+        "subgroup": {
+            "subgroup_id": F("subgroup_id"),
+            "subgroup_name": F("subgroup__name"),
+        },
+        "group": {
+            "group_id": F("subgroup__group_id"),
+            "group_name": F("subgroup__group__name"),
+        },
+        "manager": {
+            "product_manager_id": F("effective_manager_id"),
+            "product_manager_name": F("effective_manager__username"),
+        },
+    }
     SETTINGS = {
         "filterableAttributes": [
+            "id",  # Нужен для отсечения дубликатов между вариантами при постраничной выдаче
             "subgroup_id",
             "subgroup_name",
             "brand_id", 
@@ -31,7 +89,13 @@ class ProductIndexer(MeilisearchModelIndexer[Product]):
             "group_name",  # Четвертый приоритет - группа
             "product_manager_name",  # Пятый приоритет - менеджер
             "tech_params_searchable",  # Шестой приоритет - технические параметры
-            "transliterated_search",  # Низший приоритет - транслитерированный поиск
+            # Низший приоритет - транслитерированный поиск, по полю на каждый источник,
+            # чтобы изменение бренда или подгруппы обновляло только свой фрагмент
+            "transliterated_search",
+            "transliterated_brand",
+            "transliterated_subgroup",
+            "transliterated_group",
+            "transliterated_manager",
             "complex_name",
             "description"
         ],
@@ -63,7 +127,8 @@ class ProductIndexer(MeilisearchModelIndexer[Product]):
             "description"
         ],
         "stopWords": [],  # Пустой список стоп-слов для технических терминов
-        "synonyms": {},   # Можно добавить синонимы в будущем
+        # synonyms намеренно не задаются здесь: ими управляет update_synonyms,
+        # иначе update_settings при старте приложения затирал бы их
         "distinctAttribute": None,  # Не группируем результаты
         "typoTolerance": {
             "enabled": True,
@@ -72,20 +137,27 @@ class ProductIndexer(MeilisearchModelIndexer[Product]):
                 "twoTypos": 8   # Две опечатки для слов от 8 символов
             },
             "disableOnWords": [],  # Не отключаем проверку опечаток для конкретных слов
-            "disableOnAttributes": ["transliterated_search"]  # Отключаем проверку опечаток для транслитерированного поиска
+            # Отключаем проверку опечаток для транслитерированного поиска
+            "disableOnAttributes": [
+                "transliterated_search",
+                "transliterated_brand",
+                "transliterated_subgroup",
+                "transliterated_group",
+                "transliterated_manager",
+            ]
         },
         "faceting": {
             "maxValuesPerFacet": 100
         },
         "pagination": {
-            "maxTotalHits": 1000
+            "maxTotalHits": 10000  # Предел offset + limit для одного варианта при глубокой пагинации
         }
     }
 
     @classmethod
     def build_object(cls, product: Product) -> Dict[str, Any]:
-        # Получаем менеджера товара
-        manager = product.get_manager()
+        # Итоговый менеджер товара хранится в самом товаре
+        manager = product.effective_manager
         
         # Создаем строку для поиска по техническим параметрам
         tech_params_searchable = ""
@@ -96,18 +168,7 @@ class ProductIndexer(MeilisearchModelIndexer[Product]):
                 if value is not None
             )
         
-        # Создаем поле для транслитерированного поиска
-        # Используем режим без умной фильтрации для индекса, чтобы сохранить все варианты
-        transliterated_search = TransliterationUtils.create_search_text(
-            product.name,
-            product.brand.name if product.brand else "",
-            product.subgroup.name,
-            product.subgroup.group.name,
-            manager.username if manager else "",
-            tech_params_searchable
-        )
-        
-        return {
+        document = {
             "id": product.id,
             "name": product.name,
             "brand_id": product.brand.id if product.brand else None,
@@ -120,9 +181,512 @@ class ProductIndexer(MeilisearchModelIndexer[Product]):
             "product_manager_name": manager.username if manager else "",
             "tech_params": product.tech_params,
             "tech_params_searchable": tech_params_searchable,
-            "transliterated_search": transliterated_search,
         }
 
+        # В компактном режиме варианты транслитерации живут в synonyms индекса,
+        # а документ хранит только канонический текст
+        if not settings.MEILISEARCH_COMPACT_TRANSLITERATION:
+            # Используем режим без умной фильтрации для индекса, чтобы сохранить все варианты
+            document["transliterated_search"] = TransliterationUtils.create_search_text(
+                product.name,
+                tech_params_searchable
+            )
+            for part in cls.RELATED_PARTS:
+                name_field = list(cls.RELATED_PARTS[part])[-1]
+                document[f"transliterated_{part}"] = TransliterationUtils.create_search_text(document[name_field])
+
+        return document
+
     @classmethod
     def index_name(cls) -> str:
-        return "products" 
\ No newline at end of file
+        return "products"
+
+    @classmethod
+    def collect_tokens(cls, query: Optional[Q] = None) -> set:
+        """
+        Собирает уникальные токены текстовых полей, попадающих в индекс: всего
+        каталога или, если задан query, только этих товаров вместе с названиями
+        их бренда, подгруппы, группы и менеджера.
+        """
+        tokens = set()
+
+        if query is None:
+            reference_names = [
+                Brand.objects.values_list("name", flat=True),
+                ProductSubgroup.objects.values_list("name", flat=True),
+                ProductGroup.objects.values_list("name", flat=True),
+                User.objects.filter(role=User.RoleChoices.PRODUCT_MANAGER).values_list("username", flat=True),
+            ]
+            for names in reference_names:
+                for name in names:
+                    tokens.update(TransliterationUtils.tokenize(name))
+            products = Product.objects.values_list("name", "tech_params")
+        else:
+            products = Product.objects.filter(query).values_list(
+                "name",
+                "tech_params",
+                "brand__name",
+                "subgroup__name",
+                "subgroup__group__name",
+                "effective_manager__username",
+            )
+
+        for name, tech_params, *related_names in products.iterator(chunk_size=2000):
+            for text in (name, *related_names):
+                tokens.update(TransliterationUtils.tokenize(text))
+            for value in (tech_params or {}).values():
+                if value is not None:
+                    tokens.update(TransliterationUtils.tokenize(value))
+
+        return tokens
+
+    @classmethod
+    def collect_related_tokens(cls, changes: Iterable[Tuple[str, int]]) -> set:
+        """Токены названий брендов, подгрупп и групп по парам (связь с товаром, id объекта)."""
+        related_models = {relation: model for model, (relation, _fields) in RELATED_INDEX_FIELDS.items()}
+        object_ids = {}
+        for relation, object_id in changes:
+            object_ids.setdefault(relation, []).append(object_id)
+
+        tokens = set()
+        for relation, ids in object_ids.items():
+            for name in related_models[relation].objects.filter(id__in=ids).values_list("name", flat=True):
+                tokens.update(TransliterationUtils.tokenize(name))
+        return tokens
+
+    @classmethod
+    def update_synonyms(cls, index_name: Optional[str] = None) -> TaskInfo:
+        """
+        Отправляет в индекс словарь синонимов транслитерации.
+        Вне компактного режима синонимы сбрасываются.
+        """
+        synonyms = {}
+        if settings.MEILISEARCH_COMPACT_TRANSLITERATION:
+            synonyms = TransliterationUtils.build_synonyms(cls.collect_tokens())
+
+        return cls.meilisearch_client().index(index_name or cls.index_name()).update_synonyms(synonyms)
+
+    @classmethod
+    def extend_synonyms(cls, tokens: Iterable[str], index_name: Optional[str] = None) -> int:
+        """
+        Дополняет словарь синонимов индекса вариантами токенов, которых в нем
+        еще нет, не перечитывая каталог. Вне компактного режима ничего не делает.
+
+        Словарь читается и записывается целиком, поэтому параллельные вызовы
+        выполняются по одному под advisory-блокировкой, а запись ожидается
+        до ее снятия.
+
+        Returns:
+            int: количество добавленных пар вариант -> токен
+        """
+        if not settings.MEILISEARCH_COMPACT_TRANSLITERATION:
+            return 0
+        additions = TransliterationUtils.build_synonyms(tokens)
+        if not additions:
+            return 0
+
+        index = cls.meilisearch_client().index(index_name or cls.index_name())
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [cls.SYNONYMS_LOCK_KEY])
+            synonyms = index.get_synonyms()
+            added = 0
+            for key, canonical in additions.items():
+                current = synonyms.setdefault(key, [])
+                for token in canonical:
+                    if token not in current:
+                        current.append(token)
+                        added += 1
+            if added:
+                cls._wait_for_task(index.update_synonyms(synonyms).task_uid)
+
+        if added:
+            logger.info(f"Индекс {index.uid}: добавлено {added} синонимов транслитерации")
+        return added
+
+    @classmethod
+    def index_all_atomically(
+        cls,
+        chunk_size: Optional[int] = None,
+        progress: Optional[Callable[[int], None]] = None,
+        workers: int = 1,
+    ) -> int:
+        """
+        Blue/green переиндексация: новый индекс строится под временным именем
+        с теми же настройками и синонимами, его размер сверяется с базой,
+        после чего он одной операцией swap становится основным. Поиск по
+        основному индексу все это время работает со старыми данными.
+
+        Args:
+            workers: число процессов для сборки документов по диапазонам id
+
+        Returns:
+            int: количество проиндексированных товаров
+        """
+        lock_token = cls.acquire_reindex_lock()
+        if lock_token is None:
+            raise RuntimeError("Полная переиндексация товаров уже выполняется")
+
+        try:
+            started_at = cls.reindex_started_at()
+            tmp_index_name = cls.start_atomic_reindex()
+            try:
+                if workers > 1:
+                    indexed = cls.index_in_processes(tmp_index_name, workers, chunk_size, progress)
+                else:
+                    indexed = cls.index_in_chunks(Q(), tmp_index_name, chunk_size, progress)
+            except Exception:
+                cls.meilisearch_client().delete_index(tmp_index_name)
+                raise
+
+            cls.finish_atomic_reindex(tmp_index_name, indexed, started_at)
+            return indexed
+        finally:
+            cls.release_reindex_lock(lock_token)
+
+    @classmethod
+    def acquire_reindex_lock(cls) -> Optional[str]:
+        """
+        Берет блокировку полной переиндексации на GOODS_REINDEX_LOCK_TIMEOUT секунд:
+        вторая переиндексация удалила бы временный индекс, в который пишет первая.
+
+        Returns:
+            str: токен для release_reindex_lock или None, если переиндексация уже идет
+        """
+        return TaskLock.acquire(cls.REINDEX_LOCK, settings.GOODS_REINDEX_LOCK_TIMEOUT)
+
+    @classmethod
+    def release_reindex_lock(cls, lock_token: str) -> bool:
+        """Снимает блокировку переиндексации; False, если ее уже держит другой запуск."""
+        return TaskLock.release(cls.REINDEX_LOCK, lock_token)
+
+    @classmethod
+    def reindex_started_at(cls) -> datetime:
+        """Время начала переиндексации, с которого finish_atomic_reindex повторяет изменения."""
+        return timezone.now() - cls.REPLAY_CLOCK_MARGIN
+
+    @classmethod
+    def start_atomic_reindex(cls) -> str:
+        """
+        Готовит пустой временный индекс с настройками и синонимами основного.
+
+        Returns:
+            str: имя временного индекса
+        """
+        client = cls.meilisearch_client()
+        index_name = cls.index_name()
+        tmp_index_name = f"{index_name}_tmp"
+
+        # Остатки прерванной переиндексации удаляем, чтобы не смешать данные
+        client.wait_for_task(client.delete_index(tmp_index_name).task_uid)
+
+        # swap требует, чтобы оба индекса существовали
+        if not cls.index_exists():
+            cls._wait_for_task(client.create_index(index_name, {"primaryKey": cls.PRIMARY_KEY}).task_uid)
+
+        cls._wait_for_task(client.create_index(tmp_index_name, {"primaryKey": cls.PRIMARY_KEY}).task_uid)
+        tmp_index = client.index(tmp_index_name)
+        cls._wait_for_task(tmp_index.update_settings(cls.SETTINGS).task_uid)  # type: ignore
+        cls._wait_for_task(cls.update_synonyms(tmp_index_name).task_uid)
+        return tmp_index_name
+
+    @classmethod
+    def finish_atomic_reindex(cls, tmp_index_name: str, indexed: int, started_at: datetime) -> None:
+        """
+        Повторяет во временном индексе изменения, пришедшие после started_at,
+        проверяет его и меняет местами с основным.
+
+        Сброс очереди все это время пишет в основной индекс, поэтому без
+        повтора эти изменения пропали бы после swap. Изменения, сброшенные
+        между повтором и swap, повторяются еще раз уже в новом основном индексе.
+        """
+        client = cls.meilisearch_client()
+        index_name = cls.index_name()
+        try:
+            replayed = cls.replay_queue(tmp_index_name, started_at)
+            cls._verify_document_count(tmp_index_name, indexed, replayed)
+        except Exception:
+            client.delete_index(tmp_index_name)
+            raise
+
+        cls._wait_for_task(client.swap_indexes([{"indexes": [index_name, tmp_index_name]}]).task_uid)
+        cls.replay_queue(index_name, started_at)
+        # После swap во временном индексе лежат старые данные
+        client.delete_index(tmp_index_name)
+        logger.info(f"Индекс {index_name} заменен новым: {indexed} товаров, повторено изменений {replayed}")
+
+    @classmethod
+    def replay_queue(cls, index_name: str, since: datetime) -> int:
+        """
+        Применяет к индексу index_name изменения товаров, поставленные в
+        ProductIndexQueue начиная с since (и обработанные, и ожидающие):
+        существующие товары индексируются заново, остальные удаляются.
+        Товары брендов, подгрупп и групп из RelatedIndexQueue за то же время
+        индексируются заново целиком.
+
+        Returns:
+            int: количество повторенных товаров из ProductIndexQueue
+        """
+        cls._replay_related_queue(index_name, since)
+
+        product_ids = list(
+            ProductIndexQueue.objects.filter(queued_at__gte=since).values_list("product_id", flat=True)
+        )
+        if not product_ids:
+            return 0
+
+        live_ids = set(Product.objects.filter(id__in=product_ids).values_list("id", flat=True))
+        if live_ids:
+            cls.index_in_chunks(Q(id__in=live_ids), index_name)
+            # Синонимы нового индекса собраны в начале переиндексации
+            cls.extend_synonyms(cls.collect_tokens(Q(id__in=live_ids)), index_name)
+        removed_ids = [product_id for product_id in product_ids if product_id not in live_ids]
+        if removed_ids:
+            index = cls.meilisearch_client().index(index_name)
+            cls._wait_for_task(index.delete_documents(removed_ids).task_uid)
+
+        logger.info(f"Индекс {index_name}: повторено {len(product_ids)} изменений из очереди")
+        return len(product_ids)
+
+    @classmethod
+    def _replay_related_queue(cls, index_name: str, since: datetime) -> None:
+        """Индексирует заново товары объектов, изменения которых поставлены в RelatedIndexQueue с since."""
+        object_ids = {}
+        changes = list(RelatedIndexQueue.objects.filter(queued_at__gte=since).values_list("relation", "object_id"))
+        for relation, object_id in changes:
+            object_ids.setdefault(relation, []).append(object_id)
+
+        for relation, ids in object_ids.items():
+            cls.index_in_chunks(Q(**{f"{relation}__in": ids}), index_name)
+            logger.info(f"Индекс {index_name}: повторено {len(ids)} изменений {relation} из очереди")
+        if changes:
+            cls.extend_synonyms(cls.collect_related_tokens(changes), index_name)
+
+    @classmethod
+    def id_ranges(cls, size: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Делит товары на полуинтервалы id [start, end) для параллельной индексации."""
+        size = size or cls.RANGE_SIZE
+        bounds = Product.objects.aggregate(min_id=Min("id"), max_id=Max("id"))
+        if bounds["min_id"] is None:
+            return []
+        return [
+            (start, start + size)
+            for start in range(bounds["min_id"], bounds["max_id"] + 1, size)
+        ]
+
+    @classmethod
+    def index_id_range(cls, index_name: str, start: int, end: int, chunk_size: Optional[int] = None) -> int:
+        """Индексирует товары с id в диапазоне [start, end)."""
+        return cls.index_in_chunks(Q(id__gte=start, id__lt=end), index_name, chunk_size)
+
+    @classmethod
+    def index_in_processes(
+        cls,
+        index_name: str,
+        workers: int,
+        chunk_size: Optional[int] = None,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """
+        Собирает и отправляет документы в пуле процессов: каждый процесс
+        получает свой диапазон id, сам читает товары и сам загружает пачки.
+        """
+        # Соединения с базой нельзя делить между процессами после fork
+        connections.close_all()
+        indexed = 0
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [
+                pool.submit(_index_id_range_in_process, index_name, start, end, chunk_size)
+                for start, end in cls.id_ranges()
+            ]
+            for future in as_completed(futures):
+                indexed += future.result()
+                if progress:
+                    progress(indexed)
+        return indexed
+
+    @classmethod
+    def _verify_document_count(cls, index_name: str, indexed: int, tolerance: int) -> None:
+        """
+        Сверяет число документов в индексе с отправленным и с количеством
+        товаров в базе. Допустимое расхождение — число повторенных изменений:
+        каждое могло добавить или удалить один документ.
+        """
+        documents = cls.meilisearch_client().index(index_name).get_stats().number_of_documents
+        products = Product.objects.count()
+        if abs(documents - indexed) > tolerance or abs(products - documents) > tolerance:
+            raise RuntimeError(
+                f"Индекс {index_name} не прошел проверку: документов {documents}, "
+                f"отправлено {indexed}, товаров в базе {products}, повторено изменений {tolerance}"
+            )
+
+    @classmethod
+    def indexing_queryset(cls, query: Q):
+        """Товары для индексации со всем, что читает build_object, в одном запросе."""
+        return Product.objects.filter(query).select_related(
+            "brand",
+            "subgroup__group",
+            "effective_manager",
+        )
+
+    @classmethod
+    def index_in_chunks(
+        cls,
+        query: Q,
+        index_name: str,
+        chunk_size: Optional[int] = None,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """
+        Потоково индексирует товары: читает их курсором пачками по chunk_size,
+        отправляет каждую пачку сразу после сборки и ждет задачи MeiliSearch,
+        держа в очереди не больше MAX_PENDING_TASKS пачек. В памяти
+        одновременно находится только текущая пачка.
+
+        Returns:
+            int: количество отправленных документов
+        """
+        chunk_size = chunk_size or cls.CHUNK_SIZE
+        index = cls.meilisearch_client().index(index_name)
+        products = cls.indexing_queryset(query).iterator(chunk_size=chunk_size)
+        documents = (cls.build_object(product) for product in products)
+        return cls._send_in_chunks(index, "add_documents", documents, chunk_size, progress)
+
+    @classmethod
+    def update_related_documents(cls, query: Q, parts: List[str]) -> int:
+        """
+        Частичное обновление документов после изменения связанного объекта
+        (бренда, подгруппы, группы или их менеджера).
+
+        Значения берутся одним запросом values_list без загрузки моделей
+        и отправляются через update_documents: MeiliSearch меняет только
+        переданные атрибуты, остальное содержимое документа сохраняется.
+
+        update_documents создает отсутствующий документ, поэтому обновляются
+        только неудаленные товары, уже лежащие в индексе. Неудаленные товары
+        без документа ставятся в очередь на полную индексацию.
+
+        Args:
+            query: какие товары затронуты
+            parts: какие части документа пересобрать — ключи RELATED_PARTS
+
+        Returns:
+            int: количество обновленных документов
+        """
+        columns = [
+            (field, expression)
+            for part in parts
+            for field, expression in cls.RELATED_PARTS[part].items()
+        ]
+        rows = Product.objects.filter(query).values_list(
+            "id", *(expression for _field, expression in columns)
+        )
+
+        compact = settings.MEILISEARCH_COMPACT_TRANSLITERATION
+        transliterated = {}
+
+        def build(row) -> Dict[str, Any]:
+            document = {"id": row[0]}
+            for (field, _expression), value in zip(columns, row[1:]):
+                document[field] = value
+            for part in parts:
+                name_field = list(cls.RELATED_PARTS[part])[-1]
+                document[name_field] = document[name_field] or ""
+                if not compact:
+                    # Значение общее для всех товаров бренда или подгруппы, считаем его один раз
+                    name = document[name_field]
+                    if name not in transliterated:
+                        transliterated[name] = TransliterationUtils.create_search_text(name)
+                    document[f"transliterated_{part}"] = transliterated[name]
+            return document
+
+        index = cls.meilisearch_client().index(cls.index_name())
+        missing_ids = []
+
+        def indexed_only(chunks) -> Iterable[Dict[str, Any]]:
+            for chunk in chunks:
+                existing_ids = cls._existing_document_ids(index, [row[0] for row in chunk])
+                for row in chunk:
+                    if row[0] in existing_ids:
+                        yield build(row)
+                    else:
+                        missing_ids.append(row[0])
+
+        chunks = cls._chunks(rows.iterator(chunk_size=cls.CHUNK_SIZE), cls.CHUNK_SIZE)
+        updated = cls._send_in_chunks(index, "update_documents", indexed_only(chunks), cls.CHUNK_SIZE)
+        if missing_ids:
+            ProductIndexQueue.enqueue_ids(missing_ids)
+            logger.info(f"Товаров без документа в индексе: {len(missing_ids)}, поставлены в очередь")
+        return updated
+
+    @classmethod
+    def _existing_document_ids(cls, index: Index, product_ids: List[int]) -> set:
+        """Какие из товаров уже есть в индексе (один запрос на пачку)."""
+        page = index.get_documents({
+            "fields": ["id"],
+            "filter": f"id IN [{', '.join(str(product_id) for product_id in product_ids)}]",
+            "limit": len(product_ids),
+        })
+        return {int(dict(document)["id"]) for document in page.results}
+
+    @classmethod
+    def _send_in_chunks(
+        cls,
+        index: Index,
+        method: str,
+        documents: Iterable[Dict[str, Any]],
+        chunk_size: int,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """
+        Отправляет документы пачками сразу по мере сборки и ждет задачи
+        MeiliSearch, держа в очереди не больше MAX_PENDING_TASKS пачек.
+        """
+        send = getattr(index, method)
+        pending = deque()
+        sent = 0
+        for chunk in cls._chunks(documents, chunk_size):
+            pending.append(send(chunk).task_uid)
+            sent += len(chunk)
+            if len(pending) >= cls.MAX_PENDING_TASKS:
+                cls._wait_for_task(pending.popleft())
+
+            logger.info(f"Отправлено в индекс {index.uid}: {sent} товаров")
+            if progress:
+                progress(sent)
+
+        while pending:
+            cls._wait_for_task(pending.popleft())
+
+        logger.info(f"Индекс {index.uid}: обработано {sent} товаров")
+        return sent
+
+    @staticmethod
+    def _chunks(items: Iterable, size: int):
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    @classmethod
+    def _index_from_query(cls, query: Q, index_name: str) -> None:
+        cls.index_in_chunks(query, index_name)
+
+    @classmethod
+    def _wait_for_task(cls, task_uid: int) -> None:
+        """Дожидается задачи MeiliSearch и поднимает ошибку, если она не выполнена."""
+        task = cls.meilisearch_client().wait_for_task(task_uid, timeout_in_ms=cls.TASK_TIMEOUT_MS)
+        if task.status != "succeeded":
+            raise RuntimeError(f"Задача MeiliSearch {task_uid} завершилась со статусом {task.status}: {task.error}")
+
+
+def _index_id_range_in_process(index_name: str, start: int, end: int, chunk_size: Optional[int]) -> int:
+    """Точка входа для процесса пула: индексирует один диапазон id."""
+    try:
+        return ProductIndexer.index_id_range(index_name, start, end, chunk_size)
+    finally:
+        connections.close_all()
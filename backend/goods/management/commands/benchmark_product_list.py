@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from goods.models import Product
+from goods.serializers import (
+    ProductSerializer,
+    product_list_values,
+    serialize_product_rows,
+)
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает стоимость одной страницы списка товаров: ProductSerializer и быстрый путь через values()'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=200,
+            help='Количество товаров на странице (по умолчанию 200)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Сколько раз повторить замер (по умолчанию 5)',
+        )
+
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+        repeat = options['repeat']
+        queryset = Product.objects.select_related(
+            'subgroup__group', 'subgroup__product_manager',
+            'brand__product_manager', 'product_manager', 'effective_manager',
+        ).filter(deleted_at__isnull=True).order_by('-id')
+
+        def serializer_page():
+            return ProductSerializer(list(queryset[:page_size]), many=True).data
+
+        def fast_page():
+            return serialize_product_rows(product_list_values(queryset)[:page_size])
+
+        serializer_data = serializer_page()
+        fast_data = fast_page()
+        if list(serializer_data) != fast_data:
+            self.stdout.write(self.style.ERROR('Ответы ProductSerializer и быстрого пути различаются'))
+            return
+
+        self.stdout.write(f'Товаров на странице: {len(fast_data)}, повторов: {repeat}')
+        results = {}
+        for title, build in (('ProductSerializer', serializer_page), ('values()', fast_page)):
+            timings = []
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    build()
+                    timings.append((time.perf_counter() - started) * 1000)
+            results[title] = min(timings)
+            self.stdout.write(
+                f'{title}: лучшее {min(timings):.1f} мс, среднее {sum(timings) / len(timings):.1f} мс, '
+                f'запросов {len(queries)}'
+            )
+
+        speedup = results['ProductSerializer'] / results['values()'] if results['values()'] else 0
+        self.stdout.write(self.style.SUCCESS(f'Ускорение: x{speedup:.1f}'))
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from goods.drift import find_index_drift, repair_index_drift
+
+
+class Command(BaseCommand):
+    help = 'Сверяет товары в базе с индексом MeiliSearch и при необходимости исправляет расхождения'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Переиндексировать отсутствующие и устаревшие товары и удалить лишние документы',
+        )
+        parser.add_argument(
+            '--range-size',
+            type=int,
+            help='Ширина диапазона id для одной сверки',
+        )
+
+    def handle(self, *args, **options):
+        if settings.ENVIRONMENT == "test":
+            self.stdout.write(
+                self.style.WARNING('Проверка индекса пропущена в тестовом окружении')
+            )
+            return
+
+        self.stdout.write('Сверяем товары с индексом MeiliSearch...')
+        report = find_index_drift(options['range_size'])
+
+        self.stdout.write(f"Проверено товаров: {report['checked']}")
+        for key, title in (
+            ('missing', 'Нет в индексе'),
+            ('stale', 'Устарели'),
+            ('orphaned', 'Лишние в индексе'),
+        ):
+            ids = report[key]
+            sample = ', '.join(str(pk) for pk in ids[:20])
+            self.stdout.write(f"{title}: {len(ids)}" + (f" (например: {sample})" if ids else ''))
+
+        if not any(report[key] for key in ('missing', 'stale', 'orphaned')):
+            self.stdout.write(self.style.SUCCESS('Расхождений нет'))
+            return
+
+        if options['repair']:
+            repair_index_drift(report)
+            self.stdout.write(self.style.SUCCESS('Расхождения исправлены'))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from goods.embeddings import embed_products, get_embedder
+from goods.models import Product
+from goods.tasks import embed_all_products
+
+
+class Command(BaseCommand):
+    help = 'Строит векторы товаров для поиска похожих товаров (пропускает товары с неизменным текстом)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Количество товаров в одной пачке (по умолчанию 1000)',
+        )
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            dest='run_async',
+            help='Запустить пересчет пачками в Celery (EMBEDDING_MAX_PARALLEL пачек одновременно)',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if options['run_async']:
+            embed_all_products.delay(chunk_size)
+            self.stdout.write(self.style.SUCCESS('Векторизация товаров поставлена в очередь Celery'))
+            return
+
+        self.stdout.write(f'Эмбеддер: {get_embedder().name}')
+
+        ids = Product.objects.order_by('id').values_list('id', flat=True)
+        processed = embedded = 0
+        last_id = 0
+        while True:
+            chunk = list(ids.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            embedded += embed_products(chunk)
+            processed += len(chunk)
+            last_id = chunk[-1]
+            self.stdout.write(f'Обработано товаров: {processed}, пересчитано векторов: {embedded}')
+
+        self.stdout.write(self.style.SUCCESS(f'Готово: пересчитано {embedded} векторов из {processed} товаров'))
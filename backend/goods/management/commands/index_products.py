@@ -1,5 +1,4 @@
 from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.db.models import Q
 from goods.models import Product
 from goods.indexers import ProductIndexer
@@ -17,31 +16,19 @@ class Command(BaseCommand):
         parser.add_argument(
             '--limit',
             type=int,
-            help='Ограничить количество индексируемых товаров (для тестирования)',
+            help='Ограничить количество индексируемых товаров (для тестирования, без --atomic)',
         )
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('Начинаем индексацию товаров...'))
         
         try:
-            # Получаем товары с необходимыми связями
-            queryset = Product.objects.select_related(
-                'brand', 'subgroup__group', 'product_manager'
-            ).all()
-            
-            # Применяем лимит если указан
-            if options['limit']:
-                queryset = queryset[:options['limit']]
-            
-            products = list(queryset)
-            total_count = len(products)
-            
-            self.stdout.write(f'Найдено {total_count} товаров для индексации')
+            progress = lambda indexed: self.stdout.write(f'Отправлено {indexed} товаров')
             
             if options['atomic']:
-                # Атомарная переиндексация
+                # Атомарная переиндексация всех товаров
                 self.stdout.write('Выполняем атомарную переиндексацию...')
-                ProductIndexer.index_all_atomically(products)
+                total_count = ProductIndexer.index_all_atomically(progress=progress)
                 self.stdout.write(
                     self.style.SUCCESS(f'Атомарная переиндексация завершена! Проиндексировано {total_count} товаров')
                 )
@@ -49,11 +36,17 @@ class Command(BaseCommand):
                 # Обычная индексация
                 self.stdout.write('Выполняем обычную индексацию...')
                 
-                # Получаем ID товаров для индексации
-                product_ids = [product.id for product in products]
+                query = Q()
+                # Применяем лимит если указан
+                if options['limit']:
+                    product_ids = list(
+                        Product.objects.order_by('id').values_list('id', flat=True)[:options['limit']]
+                    )
+                    query = Q(pk__in=product_ids)
                 
-                # Используем Q-объект для фильтрации
-                ProductIndexer.index_from_query(Q(pk__in=product_ids))
+                total_count = ProductIndexer.index_in_chunks(
+                    query, ProductIndexer.index_name(), progress=progress
+                )
                 
                 self.stdout.write(
                     self.style.SUCCESS(f'Индексация завершена! Проиндексировано {total_count} товаров')
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from goods.models import Product, ProductParameter
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает типизированные параметры товаров (ProductParameter) по tech_params'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Количество товаров в одной транзакции (по умолчанию 2000)',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        ids = Product.objects.order_by('id').values_list('id', flat=True)
+        total = 0
+        last_id = 0
+        while True:
+            chunk = list(ids.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            ProductParameter.rebuild(chunk)
+            total += len(chunk)
+            last_id = chunk[-1]
+            self.stdout.write(f'Обработано товаров: {total}')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Параметры перестроены для {total} товаров, строк: {ProductParameter.objects.count()}'
+            )
+        )
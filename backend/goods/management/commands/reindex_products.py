@@ -1,6 +1,5 @@
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from goods.models import Product
 from goods.indexers import ProductIndexer
 
 
@@ -11,7 +10,24 @@ class Command(BaseCommand):
         parser.add_argument(
             '--clear',
             action='store_true',
-            help='Очистить индекс перед переиндексацией',
+            help='Устарело: основной индекс больше не очищается, он заменяется готовым новым',
+        )
+        parser.add_argument(
+            '--synonyms-only',
+            action='store_true',
+            help='Только обновить синонимы транслитерации (компактный режим)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=ProductIndexer.CHUNK_SIZE,
+            help='Размер пачки товаров для чтения из базы и отправки в MeiliSearch',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Число процессов для сборки документов (по диапазонам id), например по числу ядер',
         )
 
     def handle(self, *args, **options):
@@ -21,30 +37,29 @@ class Command(BaseCommand):
             )
             return
 
+        if options['synonyms_only']:
+            self.stdout.write('Обновляем синонимы транслитерации...')
+            ProductIndexer.update_synonyms()
+            self.stdout.write(self.style.SUCCESS('Синонимы обновлены'))
+            return
+
         try:
             self.stdout.write('Начинаем переиндексацию товаров...')
             
-            # Получаем все товары
-            products = Product.objects.select_related(
-                'brand', 'subgroup__group', 'product_manager'
-            ).all()
-            
-            total_products = products.count()
-            self.stdout.write(f'Найдено {total_products} товаров для индексации')
-            
             if options['clear']:
-                self.stdout.write('Очищаем индекс...')
-                try:
-                    ProductIndexer.clear_index()
-                    self.stdout.write(self.style.SUCCESS('Индекс очищен'))
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.WARNING(f'Ошибка при очистке индекса: {e}')
+                self.stdout.write(
+                    self.style.WARNING(
+                        '--clear больше не нужен: новый индекс строится рядом и заменяет основной'
                     )
+                )
             
             # Выполняем атомарную индексацию
             self.stdout.write('Выполняем индексацию...')
-            ProductIndexer.index_all_atomically()
+            total_products = ProductIndexer.index_all_atomically(
+                chunk_size=options['chunk_size'],
+                workers=options['workers'],
+                progress=lambda indexed: self.stdout.write(f'Отправлено {indexed} товаров'),
+            )
             
             self.stdout.write(
                 self.style.SUCCESS(
@@ -0,0 +1,69 @@
+"""
+Метрики Prometheus приложения goods.
+
+Метрики регистрируются в общем реестре prometheus_client и отдаются
+эндпоинтом /metrics из django_prometheus вместе с остальными. Метрики,
+которые увеличивают задачи Celery (INDEX_QUEUE_FLUSHED), отдает сервер
+метрик воркера на WORKER_METRICS_PORT (core.metrics).
+"""
+from prometheus_client import REGISTRY, Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+# Поиск укладывается в миллисекунды, поэтому нижние корзины мельче стандартных
+SEARCH_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+SEARCH_VARIANT_SECONDS = Histogram(
+    'goods_search_variant_request_seconds',
+    'Время HTTP-запроса одного варианта транслитерации к MeiliSearch',
+    ['stage'],
+    buckets=SEARCH_BUCKETS,
+)
+SEARCH_MEILISEARCH_PROCESSING_SECONDS = Histogram(
+    'goods_search_meilisearch_processing_seconds',
+    'Время обработки запроса внутри MeiliSearch (processingTimeMs)',
+    ['stage'],
+    buckets=SEARCH_BUCKETS,
+)
+SEARCH_MERGE_SECONDS = Histogram(
+    'goods_search_merge_seconds',
+    'Время объединения и дедупликации результатов вариантов',
+    buckets=SEARCH_BUCKETS,
+)
+SEARCH_TOTAL_SECONDS = Histogram(
+    'goods_search_total_seconds',
+    'Полное время обработки поискового запроса',
+    ['source'],
+    buckets=SEARCH_BUCKETS,
+)
+
+
+def _index_queue_depth() -> int:
+    from goods.models import ProductIndexQueue
+
+    return ProductIndexQueue.objects.filter(processed_at__isnull=True).count()
+
+
+class IndexQueueDepthCollector(Collector):
+    """
+    Глубина очереди считается запросом в момент сбора метрик, поэтому видна в любом процессе.
+    Это коллектор, а не Gauge: в режиме multiprocess воркера Gauge завел бы
+    файл с нулем на каждый процесс пула.
+    """
+    name = 'goods_index_queue_depth'
+    documentation = 'Количество товаров, ожидающих переиндексации в MeiliSearch'
+
+    def describe(self):
+        # Без describe() реестр вызвал бы collect() при регистрации, то есть запрос к базе при импорте
+        yield GaugeMetricFamily(self.name, self.documentation)
+
+    def collect(self):
+        yield GaugeMetricFamily(self.name, self.documentation, value=_index_queue_depth())
+
+
+REGISTRY.register(IndexQueueDepthCollector())
+
+INDEX_QUEUE_FLUSHED = Counter(
+    'goods_index_queue_flushed',
+    'Количество товаров, отправленных в MeiliSearch из очереди переиндексации',
+)
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:27
+
+from django.db import migrations, models
+
+from goods.utils import TransliterationUtils
+
+
+def fill_part_number_keys(apps, schema_editor):
+    Product = apps.get_model('goods', 'Product')
+    batch = []
+    for product in Product.objects.only('id', 'name', 'complex_name').iterator(chunk_size=2000):
+        product.part_number_key = TransliterationUtils.normalize_part_number(product.name or product.complex_name)
+        batch.append(product)
+        if len(batch) >= 2000:
+            Product.objects.bulk_update(batch, ['part_number_key'])
+            batch = []
+    if batch:
+        Product.objects.bulk_update(batch, ['part_number_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goods', '0004_name_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='part_number_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Part number без разделителей, в верхнем регистре, с латиницей вместо кириллических двойников', max_length=512, verbose_name='Ключ part number'),
+        ),
+        migrations.RunPython(fill_part_number_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goods', '0005_product_part_number_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductIndexQueue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_id', models.BigIntegerField(unique=True, verbose_name='ID товара')),
+                ('queued_at', models.DateTimeField(auto_now_add=True, verbose_name='Поставлен в очередь')),
+            ],
+            options={
+                'verbose_name': 'Товар в очереди индексации',
+                'verbose_name_plural': 'Очередь индексации товаров',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goods', '0006_product_index_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productindexqueue',
+            name='action',
+            field=models.CharField(choices=[('index', 'Индексировать'), ('unindex', 'Удалить из индекса')], default='index', max_length=10, verbose_name='Действие'),
+        ),
+    ]
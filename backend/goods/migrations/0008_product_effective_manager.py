@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+from django.db.models.functions import Coalesce
+
+
+def fill_effective_managers(apps, schema_editor):
+    Product = apps.get_model('goods', 'Product')
+    Brand = apps.get_model('goods', 'Brand')
+    ProductSubgroup = apps.get_model('goods', 'ProductSubgroup')
+    brand_manager = Brand.objects.filter(pk=OuterRef('brand_id')).values('product_manager_id')[:1]
+    subgroup_manager = ProductSubgroup.objects.filter(pk=OuterRef('subgroup_id')).values('product_manager_id')[:1]
+    # Мягко удаленные товары тоже заполняем: их могут восстановить
+    Product._base_manager.update(
+        effective_manager_id=Coalesce('product_manager_id', Subquery(brand_manager), Subquery(subgroup_manager))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goods', '0007_product_index_queue_action'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='effective_manager',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Менеджер товара, а если не указан — бренда или подгруппы', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='effectively_managed_products', to=settings.AUTH_USER_MODEL, verbose_name='Итоговый менеджер'),
+        ),
+        migrations.RunPython(fill_effective_managers, migrations.RunPython.noop),
+    ]
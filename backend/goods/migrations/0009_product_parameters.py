@@ -0,0 +1,48 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:47
+
+from django.conf import settings
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goods', '0008_product_effective_manager'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductParameter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=200, verbose_name='Параметр')),
+                ('value', models.CharField(max_length=255, verbose_name='Значение')),
+                ('value_number', models.FloatField(blank=True, help_text='Значение в базовых единицах СИ, если его удалось разобрать', null=True, verbose_name='Числовое значение')),
+                ('unit', models.CharField(blank=True, max_length=10, verbose_name='Единица измерения')),
+            ],
+            options={
+                'verbose_name': 'Параметр товара',
+                'verbose_name_plural': 'Параметры товаров',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('tech_params', name='jsonb_path_ops'), name='goods_product_tech_params_gin'),
+        ),
+        migrations.AddField(
+            model_name='productparameter',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parameters', to='goods.product', verbose_name='Товар'),
+        ),
+        migrations.AddIndex(
+            model_name='productparameter',
+            index=models.Index(fields=['key', 'unit', 'value_number'], name='goods_parameter_range_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='productparameter',
+            constraint=models.UniqueConstraint(fields=('product', 'key'), name='goods_product_parameter_unique_key'),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:51
+
+from django.db import migrations, models
+
+# Таблица каталога -> тип объекта в ленте изменений
+CATALOG_TABLES = {
+    'goods_productgroup': 'group',
+    'goods_productsubgroup': 'subgroup',
+    'goods_brand': 'brand',
+    'goods_product': 'product',
+}
+
+# Любая запись в таблицу каталога помечает строку как измененную (change_seq = NULL).
+# Номер назначает только goods.changes.assign_change_sequence, выставляя
+# goods.assigning_change_seq на время своей транзакции.
+FUNCTIONS_SQL = """
+CREATE SEQUENCE IF NOT EXISTS goods_change_seq;
+
+CREATE OR REPLACE FUNCTION goods_mark_changed() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('goods.assigning_change_seq', true) IS DISTINCT FROM 'on' THEN
+        NEW.change_seq := NULL;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION goods_record_tombstone() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO goods_catalogtombstone (kind, object_id, deleted_at) VALUES (TG_ARGV[0], OLD.id, NOW());
+    RETURN OLD;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+TRIGGERS_SQL = "".join(
+    f"""
+CREATE TRIGGER {table}_mark_changed BEFORE INSERT OR UPDATE ON {table}
+    FOR EACH ROW EXECUTE FUNCTION goods_mark_changed();
+CREATE TRIGGER {table}_tombstone AFTER DELETE ON {table}
+    FOR EACH ROW EXECUTE FUNCTION goods_record_tombstone('{kind}');
+"""
+    for table, kind in CATALOG_TABLES.items()
+)
+
+DROP_SQL = "".join(
+    f"DROP TRIGGER IF EXISTS {table}_mark_changed ON {table};\n"
+    f"DROP TRIGGER IF EXISTS {table}_tombstone ON {table};\n"
+    for table in CATALOG_TABLES
+) + """
+DROP FUNCTION IF EXISTS goods_mark_changed();
+DROP FUNCTION IF EXISTS goods_record_tombstone();
+DROP SEQUENCE IF EXISTS goods_change_seq;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goods', '0009_product_parameters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20, verbose_name='Тип объекта')),
+                ('object_id', models.BigIntegerField(verbose_name='ID объекта')),
+                ('change_seq', models.BigIntegerField(blank=True, db_index=True, null=True, verbose_name='Номер изменения')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата удаления')),
+            ],
+            options={
+                'verbose_name': 'Удаленный объект каталога',
+                'verbose_name_plural': 'Удаленные объекты каталога',
+            },
+        ),
+        migrations.AddField(
+            model_name='brand',
+            name='change_seq',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True, verbose_name='Номер изменения'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='change_seq',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True, verbose_name='Номер изменения'),
+        ),
+        migrations.AddField(
+            model_name='productgroup',
+            name='change_seq',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True, verbose_name='Номер изменения'),
+        ),
+        migrations.AddField(
+            model_name='productsubgroup',
+            name='change_seq',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True, verbose_name='Номер изменения'),
+        ),
+        # Существующие строки остаются с change_seq = NULL и получат номера
+        # в миграции 0015_catalog_change_feed_numbering
+        migrations.RunSQL(FUNCTIONS_SQL + TRIGGERS_SQL, DROP_SQL),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+from pgvector.django import VectorExtension
+import pgvector.django.indexes
+import pgvector.django.vector
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goods', '0010_catalog_change_feed'),
+    ]
+
+    operations = [
+        VectorExtension(),
+        migrations.CreateModel(
+            name='ProductEmbedding',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='embedding', serialize=False, to='goods.product', verbose_name='Товар')),
+                ('embedding', pgvector.django.vector.VectorField(dimensions=384, verbose_name='Вектор')),
+                ('content_hash', models.CharField(max_length=32, verbose_name='Хэш текста')),
+                ('model_name', models.CharField(max_length=200, verbose_name='Модель')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+            ],
+            options={
+                'verbose_name': 'Вектор товара',
+                'verbose_name_plural': 'Векторы товаров',
+                'indexes': [pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding'], m=16, name='goods_product_embedding_hnsw', opclasses=['vector_cosine_ops'])],
+            },
+        ),
+    ]
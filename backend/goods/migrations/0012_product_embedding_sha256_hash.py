@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goods', '0011_product_embeddings'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='productembedding',
+            name='content_hash',
+            field=models.CharField(max_length=64, verbose_name='Хэш текста'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goods', '0012_product_embedding_sha256_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productindexqueue',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Взят в обработку'),
+        ),
+    ]
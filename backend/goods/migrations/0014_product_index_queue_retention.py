@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goods', '0013_product_index_queue_claimed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productindexqueue',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Обработан'),
+        ),
+        migrations.AddIndex(
+            model_name='productindexqueue',
+            index=models.Index(fields=['queued_at'], name='goods_index_queue_queued_at'),
+        ),
+        migrations.AddIndex(
+            model_name='productindexqueue',
+            index=models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['queued_at'], name='goods_index_queue_pending'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:02
+
+from django.db import migrations
+
+CATALOG_TABLES = ['goods_productgroup', 'goods_productsubgroup', 'goods_brand', 'goods_product']
+
+# Строка теряет номер, только если изменилось что-то кроме самого номера:
+# save() без изменений (например, повторный импорт) не возвращает ее в ленту
+MARK_CHANGED_SQL = """
+CREATE OR REPLACE FUNCTION goods_mark_changed() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('goods.assigning_change_seq', true) IS DISTINCT FROM 'on' AND (
+        TG_OP = 'INSERT' OR (to_jsonb(NEW) - 'change_seq') IS DISTINCT FROM (to_jsonb(OLD) - 'change_seq')
+    ) THEN
+        NEW.change_seq := NULL;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+PREVIOUS_MARK_CHANGED_SQL = """
+CREATE OR REPLACE FUNCTION goods_mark_changed() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('goods.assigning_change_seq', true) IS DISTINCT FROM 'on' THEN
+        NEW.change_seq := NULL;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+# Первичная нумерация строк, существовавших до ленты; дальше номера
+# назначает периодическая задача goods.tasks.assign_catalog_change_sequence
+INITIAL_NUMBERING_SQL = "SELECT set_config('goods.assigning_change_seq', 'on', true);\n" + "".join(
+    f"UPDATE {table} SET change_seq = nextval('goods_change_seq') WHERE change_seq IS NULL;\n"
+    for table in CATALOG_TABLES + ['goods_catalogtombstone']
+) + "SELECT set_config('goods.assigning_change_seq', 'off', true);\n"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goods', '0014_product_index_queue_retention'),
+    ]
+
+    operations = [
+        migrations.RunSQL(MARK_CHANGED_SQL, PREVIOUS_MARK_CHANGED_SQL),
+        migrations.RunSQL(INITIAL_NUMBERING_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:47
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goods', '0015_catalog_change_feed_numbering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedIndexQueue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('relation', models.CharField(max_length=30, verbose_name='Связь с товаром')),
+                ('object_id', models.BigIntegerField(verbose_name='ID объекта')),
+                ('parts', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=20), size=None, verbose_name='Части документа')),
+                ('queued_at', models.DateTimeField(auto_now_add=True, verbose_name='Поставлен в очередь')),
+                ('claimed_at', models.DateTimeField(blank=True, null=True, verbose_name='Взят в обработку')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Обработан')),
+            ],
+            options={
+                'verbose_name': 'Изменение связанного объекта в очереди индексации',
+                'verbose_name_plural': 'Очередь индексации связанных объектов',
+                'indexes': [models.Index(fields=['queued_at'], name='goods_related_queue_queued_at'), models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['queued_at'], name='goods_related_queue_pending')],
+                'constraints': [models.UniqueConstraint(fields=('relation', 'object_id'), name='goods_related_index_queue_object_uniq')],
+            },
+        ),
+    ]
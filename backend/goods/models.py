@@ -1,10 +1,25 @@
-from django.db import models
+import uuid
+from datetime import timedelta
+
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import connection, models, transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce, Upper
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from user.models import User
 from core.mixins import ExtIdMixin
+from core.models import ResourceVersion
+from goods.utils import TransliterationUtils
 from django_softdelete.models import SoftDeleteModel
+from pgvector.django import HnswIndex, VectorField
+from embedding_service import EMBEDDING_DIMENSIONS
+
+# Версия дерева каталога (goods.catalog) в core.ResourceVersion
+CATALOG_TREE_RESOURCE = 'goods.catalog_tree'
 
 
 class ProductGroup(ExtIdMixin, models.Model):
@@ -12,6 +27,16 @@ class ProductGroup(ExtIdMixin, models.Model):
         max_length=200, 
         verbose_name=_('Название группы')
     )
+    # Номер последнего изменения в ленте изменений каталога (goods.changes).
+    # Заполняется только базой: триггер сбрасывает его при любой записи,
+    # номер назначается при чтении ленты
+    change_seq = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name=_('Номер изменения')
+    )
 
     class Meta:
         verbose_name = _('Группа товаров')
@@ -43,10 +68,24 @@ class ProductSubgroup(ExtIdMixin, models.Model):
         verbose_name=_('Ответственный менеджер'),
         help_text=_('Менеджер, отвечающий за данную подгруппу')
     )
+    # Номер последнего изменения в ленте изменений каталога (goods.changes).
+    # Заполняется только базой: триггер сбрасывает его при любой записи,
+    # номер назначается при чтении ленты
+    change_seq = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name=_('Номер изменения')
+    )
 
     class Meta:
         verbose_name = _('Подгруппа товаров')
         verbose_name_plural = _('Подгруппы товаров')
+        indexes = [
+            # Триграммный индекс под icontains (UPPER(name) LIKE UPPER('%...%'))
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='goods_subgroup_name_trgm'),
+        ]
 
     def __str__(self):
         return f"{self.group.name} - {self.name}"
@@ -68,10 +107,23 @@ class Brand(ExtIdMixin, models.Model):
         verbose_name=_('Ответственный менеджер за бренд'),
         help_text=_('Менеджер, отвечающий за данный бренд')
     )
+    # Номер последнего изменения в ленте изменений каталога (goods.changes).
+    # Заполняется только базой: триггер сбрасывает его при любой записи,
+    # номер назначается при чтении ленты
+    change_seq = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name=_('Номер изменения')
+    )
 
     class Meta:
         verbose_name = _('Бренд')
         verbose_name_plural = _('Бренды')
+        indexes = [
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='goods_brand_name_trgm'),
+        ]
 
     def __str__(self):
         return self.name
@@ -125,20 +177,166 @@ class Product(SoftDeleteModel, ExtIdMixin):
         verbose_name=_('Описание'),
         help_text=_('Описание товара')
     )
+    # Итоговый менеджер товара (см. get_manager), хранится для фильтрации и выдачи без JOIN
+    effective_manager = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='effectively_managed_products',
+        verbose_name=_('Итоговый менеджер'),
+        help_text=_('Менеджер товара, а если не указан — бренда или подгруппы')
+    )
+    # Нормализованный part number для точного поиска (BOM, списки позиций)
+    part_number_key = models.CharField(
+        max_length=512,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name=_('Ключ part number'),
+        help_text=_('Part number без разделителей, в верхнем регистре, с латиницей вместо кириллических двойников')
+    )
+    # Номер последнего изменения в ленте изменений каталога (goods.changes).
+    # Заполняется только базой: триггер сбрасывает его при любой записи,
+    # номер назначается при чтении ленты
+    change_seq = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name=_('Номер изменения')
+    )
 
     class Meta:
         verbose_name = _('Товар')
         verbose_name_plural = _('Товары')
+        indexes = [
+            # Триграммный индекс под icontains (UPPER(name) LIKE UPPER('%...%'))
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='goods_product_name_trgm'),
+            # Точное совпадение параметров: tech_params @> '{"Корпус": "TO-247"}'
+            GinIndex(OpClass('tech_params', name='jsonb_path_ops'), name='goods_product_tech_params_gin'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.part_number_key = TransliterationUtils.normalize_part_number(self.name or self.complex_name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.effective_manager_id = self.resolve_effective_manager_id()
+        else:
+            update_fields = set(update_fields)
+            if {'name', 'complex_name'} & update_fields:
+                update_fields.add('part_number_key')
+            if {'product_manager', 'brand', 'subgroup'} & update_fields:
+                self.effective_manager_id = self.resolve_effective_manager_id()
+                update_fields.add('effective_manager')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+    def resolve_effective_manager_id(self):
+        """Вычисляет id итогового менеджера по тем же правилам, что get_manager."""
+        if self.product_manager_id:
+            return self.product_manager_id
+        if self.brand_id:
+            brand_manager_id = Brand.objects.filter(pk=self.brand_id).values_list('product_manager_id', flat=True).first()
+            if brand_manager_id:
+                return brand_manager_id
+        return ProductSubgroup.objects.filter(pk=self.subgroup_id).values_list('product_manager_id', flat=True).first()
+
+    @classmethod
+    def refresh_effective_managers(cls, queryset):
+        """
+        Пересчитывает effective_manager одним UPDATE для всех товаров queryset
+        (после смены менеджера бренда или подгруппы).
+        """
+        brand_manager = Brand.objects.filter(pk=OuterRef('brand_id')).values('product_manager_id')[:1]
+        subgroup_manager = ProductSubgroup.objects.filter(pk=OuterRef('subgroup_id')).values('product_manager_id')[:1]
+        return queryset.update(
+            effective_manager_id=Coalesce(
+                'product_manager_id', Subquery(brand_manager), Subquery(subgroup_manager)
+            )
+        )
+
+    @classmethod
+    def bulk_soft_delete(cls, ids):
+        """
+        Мягко удаляет товары по списку id одним UPDATE вместо delete() на каждый товар.
+
+        Связи обрабатываются так же, как в SoftDeleteModel.delete(): товары,
+        на которые ссылаются строки с PROTECT/RESTRICT (например, строки счетов),
+        пропускаются, SET_NULL-связи обнуляются одним UPDATE на связь.
+        Удаленные товары ставятся в очередь на удаление из индекса одной вставкой.
+
+        Returns:
+            dict: {'deleted': [id, ...], 'protected': [id, ...]}
+        """
+        relations = [
+            relation for relation in cls._meta.related_objects
+            if relation.one_to_many or relation.one_to_one
+        ]
+        with transaction.atomic():
+            target_ids = set(
+                cls.objects.select_for_update().filter(id__in=ids).values_list('id', flat=True)
+            )
+            protected_ids = set()
+            for relation in relations:
+                if relation.on_delete in (models.PROTECT, models.RESTRICT):
+                    protected_ids.update(
+                        relation.related_model._base_manager
+                        .filter(**{f'{relation.field.name}__in': target_ids})
+                        .values_list(relation.field.attname, flat=True)
+                    )
+            deleted_ids = sorted(target_ids - protected_ids)
+            if deleted_ids:
+                for relation in relations:
+                    related = relation.related_model._default_manager.filter(
+                        **{f'{relation.field.name}__in': deleted_ids}
+                    )
+                    if relation.on_delete == models.SET_NULL:
+                        related.update(**{relation.field.name: None})
+                    elif relation.on_delete == models.CASCADE:
+                        related.delete()
+                cls.objects.filter(id__in=deleted_ids).update(
+                    deleted_at=timezone.now(), restored_at=None, transaction_id=uuid.uuid4()
+                )
+                ProductIndexQueue.enqueue_ids(deleted_ids, ProductIndexQueue.Action.UNINDEX)
+                ResourceVersion.bump(CATALOG_TREE_RESOURCE)
+        return {'deleted': deleted_ids, 'protected': sorted(protected_ids)}
+
+    @classmethod
+    def bulk_restore(cls, ids):
+        """
+        Восстанавливает мягко удаленные товары по списку id одним UPDATE
+        и ставит их в очередь на индексацию.
+
+        Returns:
+            list: id восстановленных товаров
+        """
+        with transaction.atomic():
+            restored_ids = sorted(
+                cls.deleted_objects.select_for_update().filter(id__in=ids).values_list('id', flat=True)
+            )
+            if restored_ids:
+                cls.deleted_objects.filter(id__in=restored_ids).update(
+                    deleted_at=None, restored_at=timezone.now(), transaction_id=None
+                )
+                ProductIndexQueue.enqueue_ids(restored_ids, ProductIndexQueue.Action.INDEX)
+                ProductParameter.rebuild(restored_ids)
+                ResourceVersion.bump(CATALOG_TREE_RESOURCE)
+        return restored_ids
+
     def get_manager(self):
         """
         Определяет менеджера товара по следующему порядку приоритета:
         1. Если для товара явно указан менеджер, возвращает его.
         2. Если у товара есть бренд и для бренда назначен менеджер, возвращает его.
         3. Иначе возвращает менеджера подгруппы.
+
+        Результат хранится в effective_manager; для выдачи и фильтров
+        используйте его, чтобы не обходить связи на каждый товар.
         """
         if self.product_manager:
             return self.product_manager
@@ -147,86 +345,581 @@ class Product(SoftDeleteModel, ExtIdMixin):
         return self.subgroup.product_manager
 
 
-# Сигналы для автоматической индексации товаров в MeiliSearch
-#@receiver(post_save, sender=Product)
-#def index_product_on_save(sender, instance, created, **kwargs):
-#    """Индексируем товар при создании или обновлении."""
-#    from django.conf import settings
-#    
-#    if settings.ENVIRONMENT == "test":
-#        return
-#    
-#    try:
-#        from goods.tasks import index_products
-#        index_products.delay([instance.id])
-#    except Exception as e:
-#        print(f"Ошибка при индексации товара {instance.id}: {e}")
+class ProductIndexQueue(models.Model):
+    """
+    Очередь изменений товаров для MeiliSearch (transactional outbox).
+
+    Сигналы пишут сюда id товаров в той же транзакции, что и изменение,
+    поэтому откат изменения откатывает и постановку в очередь, а
+    закоммиченное изменение не теряется. На каждый товар хранится не больше
+    одной строки с последним действием: повторные изменения до ближайшего
+    сброса схлопываются. Очередь разбирает периодическая задача
+    flush_product_index_queue пакетной индексацией и удалением.
+
+    Сброс помечает строки claimed_at и после успешной индексации ставит
+    processed_at. Если воркер упал посреди пачки, ее строки через
+    GOODS_INDEX_QUEUE_CLAIM_TIMEOUT секунд заберет следующий сброс.
+    Обработанные строки хранятся GOODS_INDEX_QUEUE_RETENTION секунд:
+    по ним полная переиндексация повторяет изменения, пришедшие во время
+    сборки нового индекса (ProductIndexer.replay_queue).
+    """
+    class Action(models.TextChoices):
+        INDEX = 'index', _('Индексировать')
+        UNINDEX = 'unindex', _('Удалить из индекса')
+
+    product_id = models.BigIntegerField(
+        unique=True,
+        verbose_name=_('ID товара')
+    )
+    action = models.CharField(
+        max_length=10,
+        choices=Action.choices,
+        default=Action.INDEX,
+        verbose_name=_('Действие')
+    )
+    queued_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_('Поставлен в очередь')
+    )
+    claimed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_('Взят в обработку')
+    )
+    processed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_('Обработан')
+    )
+
+    class Meta:
+        verbose_name = _('Товар в очереди индексации')
+        verbose_name_plural = _('Очередь индексации товаров')
+        indexes = [
+            # Повтор изменений после начала переиндексации
+            models.Index(fields=['queued_at'], name='goods_index_queue_queued_at'),
+            # Выборка необработанных записей сбросом
+            models.Index(
+                fields=['queued_at'],
+                condition=models.Q(processed_at__isnull=True),
+                name='goods_index_queue_pending',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} ({self.action})"
+
+    @classmethod
+    def enqueue_ids(cls, product_ids, action=Action.INDEX):
+        """
+        Ставит товары в очередь по списку id; последнее действие заменяет предыдущее.
+        Строка, которую сейчас обрабатывает сброс или которая уже обработана,
+        снова становится ожидающей с новым временем постановки.
+        """
+        cls.objects.bulk_create(
+            [cls(product_id=product_id, action=action) for product_id in product_ids],
+            update_conflicts=True,
+            unique_fields=['product_id'],
+            update_fields=['action', 'queued_at', 'claimed_at', 'processed_at'],
+        )
+
+    @classmethod
+    def enqueue_queryset(cls, queryset):
+        """
+        Ставит на индексацию товары из queryset одним INSERT ... SELECT,
+        не вычитывая id в Python.
+        """
+        sql, params = queryset.values('id').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {cls._meta.db_table} (product_id, action, queued_at) '
+                f'SELECT product.id, %s, NOW() FROM ({sql}) AS product '
+                f'ON CONFLICT (product_id) DO UPDATE SET action = EXCLUDED.action, '
+                f'queued_at = EXCLUDED.queued_at, claimed_at = NULL, processed_at = NULL',
+                [cls.Action.INDEX, *params],
+            )
+
+    @classmethod
+    def claim(cls, limit, timeout):
+        """
+        Берет в обработку до limit самых старых необработанных записей: не
+        взятых никем или взятых больше timeout секунд назад.
+
+        Строки только помечаются claimed_at и отмечаются complete() после
+        индексации, поэтому падение воркера не теряет изменения.
+        Параллельные сбросы не мешают друг другу благодаря SKIP LOCKED.
+
+        Returns:
+            list: тройки (product_id, action, claimed_at)
+        """
+        table = cls._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET claimed_at = NOW() WHERE id IN ('
+                f'SELECT id FROM {table} WHERE processed_at IS NULL '
+                f"AND (claimed_at IS NULL OR claimed_at < NOW() - %s * INTERVAL '1 second') "
+                f'ORDER BY queued_at, id LIMIT %s FOR UPDATE SKIP LOCKED'
+                f') RETURNING product_id, action, claimed_at',
+                [timeout, limit],
+            )
+            return cursor.fetchall()
+
+    @classmethod
+    def complete(cls, entries):
+        """
+        Отмечает обработанными записи из claim(). Запись, которую за это время
+        поставили в очередь заново или забрал другой сброс, остается ожидающей.
+        """
+        now = timezone.now()
+        for claimed_at, product_ids in cls._group_by_claim(entries).items():
+            cls.objects.filter(product_id__in=product_ids, claimed_at=claimed_at).update(processed_at=now)
+
+    @classmethod
+    def release(cls, entries):
+        """Освобождает записи из claim() после ошибки, чтобы следующий сброс повторил их сразу."""
+        for claimed_at, product_ids in cls._group_by_claim(entries).items():
+            cls.objects.filter(product_id__in=product_ids, claimed_at=claimed_at).update(claimed_at=None)
+
+    @classmethod
+    def prune(cls, retention):
+        """Удаляет записи, обработанные больше retention секунд назад."""
+        cutoff = timezone.now() - timedelta(seconds=retention)
+        return cls.objects.filter(processed_at__lt=cutoff).delete()[0]
+
+    @staticmethod
+    def _group_by_claim(entries):
+        groups = {}
+        for product_id, _action, claimed_at in entries:
+            groups.setdefault(claimed_at, []).append(product_id)
+        return groups
+
+
+class RelatedIndexQueue(models.Model):
+    """
+    Очередь изменений брендов, подгрупп и групп для MeiliSearch (transactional outbox).
+
+    Сигналы пишут сюда связь, id объекта и части документов товаров
+    (ProductIndexer.RELATED_PARTS), которые нужно пересобрать, в той же
+    транзакции, что и изменение. Сброс flush_product_index_queue превращает
+    запись в частичное обновление документов товаров. На объект хранится
+    одна строка: части повторных изменений до сброса объединяются.
+
+    Обработка, повтор после падения воркера и хранение обработанных строк
+    устроены так же, как в ProductIndexQueue: по ним полная переиндексация
+    повторяет изменения, пришедшие во время сборки нового индекса.
+    """
+    relation = models.CharField(
+        max_length=30,
+        verbose_name=_('Связь с товаром')
+    )
+    object_id = models.BigIntegerField(
+        verbose_name=_('ID объекта')
+    )
+    parts = ArrayField(
+        models.CharField(max_length=20),
+        verbose_name=_('Части документа')
+    )
+    queued_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_('Поставлен в очередь')
+    )
+    claimed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_('Взят в обработку')
+    )
+    processed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_('Обработан')
+    )
+
+    class Meta:
+        verbose_name = _('Изменение связанного объекта в очереди индексации')
+        verbose_name_plural = _('Очередь индексации связанных объектов')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['relation', 'object_id'],
+                name='goods_related_index_queue_object_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['queued_at'], name='goods_related_queue_queued_at'),
+            models.Index(
+                fields=['queued_at'],
+                condition=models.Q(processed_at__isnull=True),
+                name='goods_related_queue_pending',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.relation}={self.object_id} ({', '.join(self.parts)})"
+
+    @classmethod
+    def enqueue(cls, relation, object_id, parts):
+        """
+        Ставит изменение объекта в очередь. Части ожидающей строки объединяются
+        с новыми; строка, которую сейчас обрабатывает сброс или которая уже
+        обработана, снова становится ожидающей с новым временем постановки.
+        """
+        table = cls._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (relation, object_id, parts, queued_at) VALUES (%s, %s, %s, %s) '
+                f'ON CONFLICT (relation, object_id) DO UPDATE SET '
+                f'parts = CASE WHEN {table}.processed_at IS NULL '
+                f'THEN ARRAY(SELECT DISTINCT unnest({table}.parts || EXCLUDED.parts)) '
+                f'ELSE EXCLUDED.parts END, '
+                f'queued_at = EXCLUDED.queued_at, claimed_at = NULL, processed_at = NULL',
+                [relation, object_id, list(parts), timezone.now()],
+            )
+
+    @classmethod
+    def claim(cls, limit, timeout):
+        """
+        Берет в обработку до limit самых старых необработанных записей,
+        как ProductIndexQueue.claim.
+
+        Returns:
+            list: кортежи (id, relation, object_id, parts, claimed_at)
+        """
+        table = cls._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET claimed_at = NOW() WHERE id IN ('
+                f'SELECT id FROM {table} WHERE processed_at IS NULL '
+                f"AND (claimed_at IS NULL OR claimed_at < NOW() - %s * INTERVAL '1 second') "
+                f'ORDER BY queued_at, id LIMIT %s FOR UPDATE SKIP LOCKED'
+                f') RETURNING id, relation, object_id, parts, claimed_at',
+                [timeout, limit],
+            )
+            return cursor.fetchall()
+
+    @classmethod
+    def complete(cls, entries):
+        """Отмечает обработанными записи из claim(), которые за это время не поставили заново."""
+        now = timezone.now()
+        for claimed_at, ids in cls._group_by_claim(entries).items():
+            cls.objects.filter(id__in=ids, claimed_at=claimed_at).update(processed_at=now)
+
+    @classmethod
+    def release(cls, entries):
+        """Освобождает записи из claim() после ошибки, чтобы следующий сброс повторил их сразу."""
+        for claimed_at, ids in cls._group_by_claim(entries).items():
+            cls.objects.filter(id__in=ids, claimed_at=claimed_at).update(claimed_at=None)
+
+    @classmethod
+    def prune(cls, retention):
+        """Удаляет записи, обработанные больше retention секунд назад."""
+        cutoff = timezone.now() - timedelta(seconds=retention)
+        return cls.objects.filter(processed_at__lt=cutoff).delete()[0]
+
+    @staticmethod
+    def _group_by_claim(entries):
+        groups = {}
+        for entry_id, _relation, _object_id, _parts, claimed_at in entries:
+            groups.setdefault(claimed_at, []).append(entry_id)
+        return groups
+
+
+class CatalogTombstone(models.Model):
+    """
+    Запись об окончательном удалении объекта каталога для ленты изменений.
+
+    Строки пишет триггер AFTER DELETE на таблицах каталога (миграция
+    0010_catalog_change_feed); мягкое удаление товара — это изменение,
+    а не удаление, и приходит в ленту как обычная строка товара.
+    """
+    kind = models.CharField(
+        max_length=20,
+        verbose_name=_('Тип объекта')
+    )
+    object_id = models.BigIntegerField(
+        verbose_name=_('ID объекта')
+    )
+    change_seq = models.BigIntegerField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name=_('Номер изменения')
+    )
+    deleted_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_('Дата удаления')
+    )
+
+    class Meta:
+        verbose_name = _('Удаленный объект каталога')
+        verbose_name_plural = _('Удаленные объекты каталога')
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
+
+
+class ProductParameter(models.Model):
+    """
+    Технический параметр товара в типизированном виде (см. goods.parameters).
+
+    Строки строятся из Product.tech_params и нужны только для фильтров по
+    диапазонам: число хранится в базовых единицах СИ. У удаленных товаров
+    строк нет; при восстановлении они строятся заново.
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='parameters',
+        verbose_name=_('Товар')
+    )
+    key = models.CharField(
+        max_length=200,
+        verbose_name=_('Параметр')
+    )
+    value = models.CharField(
+        max_length=255,
+        verbose_name=_('Значение')
+    )
+    value_number = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name=_('Числовое значение'),
+        help_text=_('Значение в базовых единицах СИ, если его удалось разобрать')
+    )
+    unit = models.CharField(
+        max_length=10,
+        blank=True,
+        verbose_name=_('Единица измерения')
+    )
+
+    class Meta:
+        verbose_name = _('Параметр товара')
+        verbose_name_plural = _('Параметры товаров')
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'key'], name='goods_product_parameter_unique_key'),
+        ]
+        indexes = [
+            models.Index(fields=['key', 'unit', 'value_number'], name='goods_parameter_range_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.key}: {self.value}"
+
+    @classmethod
+    def rebuild(cls, product_ids):
+        """Перестраивает параметры товаров по их tech_params (удаленные товары остаются без параметров)."""
+        from goods.parameters import build_parameter_rows
+
+        with transaction.atomic():
+            cls.objects.filter(product_id__in=product_ids).delete()
+            products = Product.objects.filter(id__in=product_ids).values_list('id', 'tech_params')
+            cls.objects.bulk_create(
+                [
+                    cls(product_id=product_id, key=key, value=value, value_number=number, unit=unit)
+                    for product_id, tech_params in products.iterator(chunk_size=1000)
+                    for key, value, number, unit in build_parameter_rows(tech_params)
+                ],
+                batch_size=1000,
+            )
+
+
+class ProductEmbedding(models.Model):
+    """
+    Вектор товара для поиска похожих товаров (см. goods.embeddings).
+
+    content_hash — хэш текста, из которого построен вектор: товары с
+    неизменным текстом не векторизуются повторно. У удаленных товаров
+    векторов нет, поэтому поиск соседей не фильтрует товары.
+    """
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='embedding',
+        verbose_name=_('Товар')
+    )
+    embedding = VectorField(
+        dimensions=EMBEDDING_DIMENSIONS,
+        verbose_name=_('Вектор')
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        verbose_name=_('Хэш текста')
+    )
+    model_name = models.CharField(
+        max_length=200,
+        verbose_name=_('Модель')
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_('Дата обновления')
+    )
+
+    class Meta:
+        verbose_name = _('Вектор товара')
+        verbose_name_plural = _('Векторы товаров')
+        indexes = [
+            HnswIndex(
+                name='goods_product_embedding_hnsw',
+                fields=['embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops'],
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} ({self.model_name})"
+
+
+@receiver(post_save, sender=Product)
+def rebuild_product_parameters(sender, instance, created, **kwargs):
+    """Перестраиваем параметры при изменении tech_params, удалении и восстановлении товара."""
+    update_fields = kwargs.get('update_fields')
+    if update_fields is None or {'tech_params', 'deleted_at'} & set(update_fields):
+        ProductParameter.rebuild([instance.id])
+
+
+# Версии справочников (core.ResourceVersion) для условного GET
+BRANDS_RESOURCE = 'goods.brands'
+GROUPS_RESOURCE = 'goods.groups'
+SUBGROUPS_RESOURCE = 'goods.subgroups'
+
+# Модель -> ресурсы, представление которых зависит от ее строк
+# (подгруппы выдаются с названием группы, бренды и подгруппы — с менеджером)
+CATALOG_RESOURCES = {
+    ProductGroup: [GROUPS_RESOURCE, SUBGROUPS_RESOURCE, CATALOG_TREE_RESOURCE],
+    ProductSubgroup: [SUBGROUPS_RESOURCE, CATALOG_TREE_RESOURCE],
+    Brand: [BRANDS_RESOURCE, CATALOG_TREE_RESOURCE],
+}
+MANAGER_FIELDS = {'first_name', 'last_name', 'email', 'role'}
+
+
+# Сигналы для версий справочников и дерева каталога
+@receiver(post_save, sender=ProductGroup)
+@receiver(post_save, sender=ProductSubgroup)
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=ProductGroup)
+@receiver(post_delete, sender=ProductSubgroup)
+@receiver(post_delete, sender=Brand)
+def bump_catalog_versions(sender, instance, **kwargs):
+    """Увеличиваем версии справочников при изменении групп, подгрупп и брендов."""
+    ResourceVersion.bump(*CATALOG_RESOURCES[sender])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_catalog_versions_on_manager_change(sender, instance, **kwargs):
+    """Бренды и подгруппы выдаются с данными менеджера: их версии меняются вместе с ним."""
+    update_fields = kwargs.get('update_fields')
+    # Вход пользователя сохраняет только last_login — на справочники это не влияет
+    if kwargs.get('created') or (update_fields is not None and not MANAGER_FIELDS & set(update_fields)):
+        return
+    ResourceVersion.bump(BRANDS_RESOURCE, SUBGROUPS_RESOURCE)
 
 
 @receiver(post_delete, sender=Product)
-def unindex_product_on_delete(sender, instance, **kwargs):
-    """Удаляем товар из индекса при удалении."""
+def bump_catalog_tree_version(sender, instance, **kwargs):
+    """Увеличиваем версию дерева каталога при удалении товара."""
+    ResourceVersion.bump(CATALOG_TREE_RESOURCE)
+
+
+@receiver(post_save, sender=Product)
+def bump_catalog_tree_version_on_product_save(sender, instance, created, **kwargs):
+    """Увеличиваем версию дерева каталога, если товар мог сменить подгруппу, бренд или статус удаления."""
+    update_fields = kwargs.get('update_fields')
+    if created or update_fields is None or {'subgroup', 'brand', 'deleted_at'} & set(update_fields):
+        ResourceVersion.bump(CATALOG_TREE_RESOURCE)
+
+
+# Сигналы для автоматической индексации товаров в MeiliSearch.
+# Изменения пишутся в ProductIndexQueue в той же транзакции; ошибки
+# не подавляются, чтобы изменение товара не прошло без записи в очередь
+@receiver(post_save, sender=Product)
+def index_product_on_save(sender, instance, created, **kwargs):
+    """Ставим товар в очередь при создании, обновлении, мягком удалении и восстановлении."""
     from django.conf import settings
     
     if settings.ENVIRONMENT == "test":
         return
     
-    try:
-        from goods.tasks import unindex_products
-        unindex_products.delay([instance.id])
-    except Exception as e:
-        print(f"Ошибка при удалении товара {instance.id} из индекса: {e}")
+    # Мягкое удаление — это save() с заполненным deleted_at
+    action = ProductIndexQueue.Action.UNINDEX if instance.deleted_at else ProductIndexQueue.Action.INDEX
+    ProductIndexQueue.enqueue_ids([instance.id], action)
 
 
-# Сигналы для переиндексации товаров при изменении связанных объектов
-@receiver(post_save, sender=Brand)
-def reindex_products_on_brand_change(sender, instance, **kwargs):
-    """Переиндексируем товары при изменении бренда."""
+@receiver(post_delete, sender=Product)
+def unindex_product_on_delete(sender, instance, **kwargs):
+    """Ставим товар в очередь на удаление из индекса при удалении."""
     from django.conf import settings
     
     if settings.ENVIRONMENT == "test":
         return
     
-    try:
-        from goods.tasks import index_products
-        product_ids = list(instance.products.values_list('id', flat=True))
-        if product_ids:
-            index_products.delay(product_ids)
-    except Exception as e:
-        print(f"Ошибка при переиндексации товаров бренда {instance.id}: {e}")
+    ProductIndexQueue.enqueue_ids([instance.id], ProductIndexQueue.Action.UNINDEX)
 
 
-@receiver(post_save, sender=ProductSubgroup)
-def reindex_products_on_subgroup_change(sender, instance, **kwargs):
-    """Переиндексируем товары при изменении подгруппы."""
-    from django.conf import settings
+# Сигналы для обновления товаров в индексе при изменении связанных объектов.
+# Поля связанной модели -> части документа товара (ProductIndexer.RELATED_PARTS)
+# и связь, по которой выбираются затронутые товары
+RELATED_INDEX_FIELDS = {
+    Brand: ('brand', {'name': ['brand'], 'product_manager_id': ['manager']}),
+    ProductSubgroup: ('subgroup', {
+        'name': ['subgroup'],
+        'group_id': ['group'],
+        'product_manager_id': ['manager'],
+    }),
+    ProductGroup: ('subgroup__group', {'name': ['group']}),
+}
+
+
+@receiver(pre_save, sender=Brand)
+@receiver(pre_save, sender=ProductSubgroup)
+@receiver(pre_save, sender=ProductGroup)
+def remember_indexed_fields(sender, instance, **kwargs):
+    """Запоминаем значения полей, попадающих в документы товаров, до сохранения."""
+    if instance.pk is None:
+        return
     
-    if settings.ENVIRONMENT == "test":
+    _relation, fields = RELATED_INDEX_FIELDS[sender]
+    instance._indexed_fields_before = sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=ProductSubgroup)
+def refresh_effective_managers_on_related_change(sender, instance, created, **kwargs):
+    """Пересчитываем effective_manager товаров без своего менеджера при смене менеджера бренда или подгруппы."""
+    before = getattr(instance, '_indexed_fields_before', None)
+    if created or before is None or before['product_manager_id'] == instance.product_manager_id:
         return
     
-    try:
-        from goods.tasks import index_products
-        product_ids = list(instance.products.values_list('id', flat=True))
-        if product_ids:
-            index_products.delay(product_ids)
-    except Exception as e:
-        print(f"Ошибка при переиндексации товаров подгруппы {instance.id}: {e}")
+    relation, _fields = RELATED_INDEX_FIELDS[sender]
+    Product.refresh_effective_managers(
+        Product.global_objects.filter(**{relation: instance, 'product_manager__isnull': True})
+    )
 
 
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=ProductSubgroup)
 @receiver(post_save, sender=ProductGroup)
-def reindex_products_on_group_change(sender, instance, **kwargs):
-    """Переиндексируем товары при изменении группы."""
+def update_products_on_related_change(sender, instance, created, **kwargs):
+    """
+    Ставим в RelatedIndexQueue изменившиеся части документов товаров в той же
+    транзакции: частичное обновление индекса делает сброс очереди.
+    """
     from django.conf import settings
     
     if settings.ENVIRONMENT == "test":
         return
     
-    try:
-        from goods.tasks import index_products
-        product_ids = []
-        for subgroup in instance.subgroups.all():
-            product_ids.extend(subgroup.products.values_list('id', flat=True))
-        if product_ids:
-            index_products.delay(product_ids)
-    except Exception as e:
-        print(f"Ошибка при переиндексации товаров группы {instance.id}: {e}")
\ No newline at end of file
+    before = getattr(instance, '_indexed_fields_before', None)
+    if created or before is None:
+        return
+    
+    relation, fields = RELATED_INDEX_FIELDS[sender]
+    parts = []
+    for field, field_parts in fields.items():
+        if before[field] != getattr(instance, field):
+            parts.extend(part for part in field_parts if part not in parts)
+    if not parts:
+        return
+    
+    RelatedIndexQueue.enqueue(relation, instance.pk, parts)
@@ -0,0 +1,123 @@
+"""
+Параметрический поиск по техническим параметрам товаров.
+
+Значения tech_params хранятся строками ("600V", "4.7 кОм", "10мА").
+Для фильтрации по диапазонам они раскладываются в ProductParameter:
+число в базовых единицах СИ и нормализованная единица измерения.
+
+Фильтр задается выражениями вида "Vds>=600V", "Корпус=TO-247":
+- "=" — точное совпадение текста, ищется по GIN-индексу tech_params;
+- ">=", "<=", ">", "<" — сравнение чисел по ProductParameter.
+"""
+import re
+from typing import Iterable, List, Optional, Tuple
+
+from django.db.models import Exists, OuterRef, Q
+
+# Единицы измерения (латиница и кириллица) -> нормализованная единица
+UNITS = {
+    'V': 'V', 'В': 'V',
+    'A': 'A', 'А': 'A',
+    'Ω': 'Ohm', 'Ohm': 'Ohm', 'ohm': 'Ohm', 'Ом': 'Ohm',
+    'F': 'F', 'Ф': 'F',
+    'W': 'W', 'Вт': 'W',
+    'Hz': 'Hz', 'Гц': 'Hz',
+    'H': 'H', 'Гн': 'H',
+    's': 's', 'с': 's',
+    '°C': 'C', '°С': 'C',
+    '%': '%',
+}
+
+# Десятичные приставки; двухбуквенные проверяются раньше однобуквенных
+PREFIXES = {
+    'мк': 1e-6,
+    'p': 1e-12, 'п': 1e-12,
+    'n': 1e-9, 'н': 1e-9,
+    'u': 1e-6, 'µ': 1e-6, 'μ': 1e-6,
+    'm': 1e-3, 'м': 1e-3,
+    'k': 1e3, 'K': 1e3, 'к': 1e3,
+    'M': 1e6, 'М': 1e6,
+    'G': 1e9, 'Г': 1e9,
+}
+
+NUMBER_RE = re.compile(r'^\s*([+-]?\d+(?:[.,]\d+)?)\s*([^\d\s]*)\s*$')
+FILTER_RE = re.compile(r'^(.+?)\s*(>=|<=|=|>|<)\s*(.+)$')
+RANGE_OPERATORS = {'>=': 'gte', '<=': 'lte', '>': 'gt', '<': 'lt'}
+
+
+def parse_quantity(value) -> Optional[Tuple[float, str]]:
+    """
+    Разбирает значение параметра в (число в базовых единицах, единица).
+    Число без единицы возвращается с пустой единицей; нечисловые значения
+    и неизвестные единицы дают None.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value), ''
+
+    match = NUMBER_RE.match(str(value))
+    if not match:
+        return None
+    number = float(match.group(1).replace(',', '.'))
+    suffix = match.group(2)
+    if not suffix:
+        return number, ''
+    if suffix in UNITS:
+        return number, UNITS[suffix]
+    for prefix, factor in PREFIXES.items():
+        if suffix.startswith(prefix) and suffix[len(prefix):] in UNITS:
+            return number * factor, UNITS[suffix[len(prefix):]]
+    return None
+
+
+def parse_parameter_filter(expression: str) -> Tuple[str, str, str]:
+    """
+    Разбирает выражение фильтра в (ключ, оператор, значение).
+
+    Raises:
+        ValueError: выражение не распознано или значение диапазона не числовое
+    """
+    match = FILTER_RE.match(expression.strip())
+    if not match:
+        raise ValueError(f'Не удалось разобрать фильтр параметра: {expression}')
+    key, operator, value = match.group(1).strip(), match.group(2), match.group(3).strip()
+    if operator in RANGE_OPERATORS and parse_quantity(value) is None:
+        raise ValueError(f'Для сравнения "{operator}" нужно числовое значение: {expression}')
+    return key, operator, value
+
+
+def filter_products_by_parameters(queryset, expressions: Iterable[str]):
+    """
+    Фильтрует товары по выражениям параметров (все условия через AND).
+
+    Raises:
+        ValueError: одно из выражений не распознано
+    """
+    from goods.models import ProductParameter
+
+    for expression in expressions:
+        key, operator, value = parse_parameter_filter(expression)
+        if operator == '=':
+            queryset = queryset.filter(tech_params__contains={key: value})
+            continue
+
+        number, unit = parse_quantity(value)
+        condition = Q(product_id=OuterRef('pk'), key=key, value_number__isnull=False)
+        condition &= Q(**{f'value_number__{RANGE_OPERATORS[operator]}': number})
+        if unit:
+            condition &= Q(unit=unit)
+        queryset = queryset.filter(Exists(ProductParameter.objects.filter(condition)))
+    return queryset
+
+
+def build_parameter_rows(tech_params) -> List[Tuple[str, str, Optional[float], str]]:
+    """Строки ProductParameter для словаря tech_params: (ключ, текст, число, единица)."""
+    rows = []
+    for key, value in (tech_params or {}).items():
+        if value is None or isinstance(value, (dict, list)):
+            continue
+        quantity = parse_quantity(value)
+        number, unit = quantity if quantity else (None, '')
+        rows.append((str(key)[:200], str(value)[:255], number, unit))
+    return rows
@@ -2,6 +2,18 @@ from rest_framework import permissions
 from user.models import User
 
 
+def manages_product(user, product):
+    """
+    Отвечает ли пользователь за товар: как менеджер самого товара,
+    его бренда или подгруппы (не только как итоговый менеджер).
+    """
+    return user.id in (
+        product.product_manager_id,
+        product.subgroup.product_manager_id,
+        product.brand.product_manager_id if product.brand_id else None,
+    )
+
+
 class ProductPermission(permissions.BasePermission):
     """
     Кастомные разрешения для работы с товарами на основе ролей:
@@ -11,6 +23,9 @@ class ProductPermission(permissions.BasePermission):
     - USER: только чтение (просмотр товаров)
     """
     
+    # POST-действия, которые только читают данные (пакетный поиск по part number)
+    READ_ONLY_ACTIONS = ['lookup']
+    
     def has_permission(self, request, view):
         # Базовая проверка аутентификации
         if not request.user or not request.user.is_authenticated:
@@ -24,8 +39,11 @@ class ProductPermission(permissions.BasePermission):
         
         # Sales менеджеры и обычные пользователи только просмотр
         if user_role in [User.RoleChoices.SALES_MANAGER, User.RoleChoices.USER]:
-            # Разрешены только GET запросы (список и детали)
-            return request.method in permissions.SAFE_METHODS
+            # Разрешены только GET запросы (список и детали) и POST-действия, которые ничего не меняют
+            return (
+                request.method in permissions.SAFE_METHODS or
+                getattr(view, 'action', None) in self.READ_ONLY_ACTIONS
+            )
         
         return False
     
@@ -43,9 +61,7 @@ class ProductPermission(permissions.BasePermission):
         # Продукт-менеджеры могут редактировать только свои товары
         if user_role == User.RoleChoices.PRODUCT_MANAGER:
             # Проверяем, является ли пользователь ответственным за этот товар
-            if (obj.product_manager == request.user or 
-                obj.subgroup.product_manager == request.user or
-                obj.brand.product_manager == request.user):
+            if manages_product(request.user, obj):
                 return True
             # Если не ответственный, то только чтение
             return request.method in permissions.SAFE_METHODS
@@ -0,0 +1,224 @@
+"""
+Поиск товаров: запросы к MeiliSearch с замером времени и поиск в PostgreSQL,
+который используется в списке товаров (?search=) и как запасной путь,
+когда MeiliSearch недоступен
+"""
+import base64
+from contextlib import contextmanager
+import json
+import time
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import Q
+
+from .metrics import (
+    SEARCH_MEILISEARCH_PROCESSING_SECONDS,
+    SEARCH_MERGE_SECONDS,
+    SEARCH_TOTAL_SECONDS,
+    SEARCH_VARIANT_SECONDS,
+)
+from .models import Brand, ProductSubgroup
+
+
+class SearchTimings:
+    """
+    Тайминги одного поискового запроса: время каждого варианта (по часам
+    клиента и по processingTimeMs MeiliSearch), время объединения и общее время.
+    Значения сразу уходят в гистограммы Prometheus.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.variants = []
+        self.merge_seconds = 0.0
+
+    def search(self, index, variant: str, params: dict, stage: str) -> dict:
+        """Выполняет запрос варианта к индексу и записывает его время."""
+        started_at = time.perf_counter()
+        try:
+            response = index.search(variant, params)
+        except Exception as e:
+            self.variants.append({
+                'variant': variant,
+                'stage': stage,
+                'wall_ms': self._ms(time.perf_counter() - started_at),
+                'error': str(e),
+            })
+            raise
+
+        wall_seconds = time.perf_counter() - started_at
+        processing_ms = response.get('processingTimeMs', 0)
+        SEARCH_VARIANT_SECONDS.labels(stage=stage).observe(wall_seconds)
+        SEARCH_MEILISEARCH_PROCESSING_SECONDS.labels(stage=stage).observe(processing_ms / 1000)
+
+        self.variants.append({
+            'variant': variant,
+            'stage': stage,
+            'wall_ms': self._ms(wall_seconds),
+            'meilisearch_ms': processing_ms,
+            'hits': len(response['hits']),
+        })
+        return response
+
+    @contextmanager
+    def merging(self):
+        """Накапливает время, потраченное на объединение результатов."""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.merge_seconds += time.perf_counter() - started_at
+
+    def finish(self, source: str) -> dict:
+        """Фиксирует общее время запроса и возвращает блок для отладки."""
+        total_seconds = time.perf_counter() - self.started_at
+        SEARCH_TOTAL_SECONDS.labels(source=source).observe(total_seconds)
+        if self.variants:
+            SEARCH_MERGE_SECONDS.observe(self.merge_seconds)
+
+        return {
+            'source': source,
+            'total_ms': self._ms(total_seconds),
+            'merge_ms': self._ms(self.merge_seconds),
+            'variants': self.variants,
+        }
+
+    @staticmethod
+    def _ms(seconds: float) -> float:
+        return round(seconds * 1000, 2)
+
+
+def encode_search_cursor(state: dict) -> str:
+    """Упаковывает позицию выдачи в непрозрачную строку для клиента."""
+    raw = json.dumps(state, ensure_ascii=False, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_search_cursor(cursor: str) -> dict:
+    """Распаковывает курсор; при повреждении выбрасывает ValueError."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        state = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Некорректный курсор') from e
+
+    if not isinstance(state, dict) or not {'q', 'v', 'i', 'o'} <= state.keys():
+        raise ValueError('Некорректный курсор')
+    return state
+
+
+class MergedSearchPager:
+    """
+    Постраничная выдача объединенного результата нескольких вариантов запроса.
+
+    Варианты склеиваются по порядку: сначала все попадания первого варианта,
+    затем попадания второго, которых нет у первого, и так далее. Позиция
+    выдачи — номер текущего варианта и offset внутри него, поэтому страница
+    в глубине выдачи стоит столько же, сколько первая: запрашивается ровно
+    недостающее число документов, а дубликаты отсекаются запросом
+    к предыдущим вариантам с фильтром id IN [...] по идентификаторам страницы.
+    """
+
+    def __init__(self, index, params: dict, timings: SearchTimings, max_total_hits: int):
+        self.index = index
+        self.params = params
+        self.timings = timings
+        self.max_total_hits = max_total_hits
+        self.estimated_total = 0
+
+    def fetch(self, variants: list, position: int, offset: int, limit: int):
+        """
+        Набирает до limit новых документов начиная с позиции (position, offset).
+
+        Returns:
+            tuple: (документы, позиция, offset) — позиция равна len(variants),
+            когда все варианты исчерпаны
+        """
+        hits = []
+        while position < len(variants) and len(hits) < limit:
+            variant, stage = variants[position]
+            need = limit - len(hits)
+            response = self.timings.search(
+                self.index, variant, {**self.params, 'offset': offset, 'limit': need}, stage
+            )
+            batch = response['hits']
+            estimated = response.get('estimatedTotalHits', offset + len(batch))
+            self.estimated_total = max(self.estimated_total, estimated)
+
+            with self.timings.merging():
+                duplicates = self._found_by_earlier(variants[:position], [hit['id'] for hit in batch])
+                for hit in batch:
+                    if hit['id'] in duplicates:
+                        continue
+                    hit['_search_priority'] = 'high' if stage == 'priority' else 'low'
+                    hit['_search_variant'] = variant
+                    hits.append(hit)
+
+            offset += len(batch)
+            if len(batch) < need or offset >= min(estimated, self.max_total_hits):
+                position += 1
+                offset = 0
+
+        return hits, position, offset
+
+    def _found_by_earlier(self, earlier_variants: list, ids: list) -> set:
+        """Возвращает id из ids, которые уже попали в выдачу предыдущих вариантов."""
+        found = set()
+        if not ids:
+            return found
+
+        id_filter = f"id IN [{', '.join(str(pk) for pk in ids)}]"
+        base_filter = self.params.get('filter')
+        params = {
+            'filter': f'({base_filter}) AND {id_filter}' if base_filter else id_filter,
+            'limit': len(ids),
+            'attributesToRetrieve': ['id'],
+        }
+        for variant, _stage in earlier_variants:
+            response = self.timings.search(self.index, variant, params, 'dedupe')
+            found.update(hit['id'] for hit in response['hits'])
+        return found
+
+
+def filter_products_by_search(queryset, search: str):
+    """
+    Фильтрует товары по названию, бренду и подгруппе.
+
+    Бренды и подгруппы — небольшие таблицы, поэтому их id выбираются
+    отдельными запросами по триграммным индексам. Итоговое условие по товарам
+    раскладывается в BitmapOr по индексам name (pg_trgm), brand_id и subgroup_id
+    без JOIN и distinct().
+    """
+    brand_ids = list(Brand.objects.filter(name__icontains=search).values_list('id', flat=True))
+    subgroup_ids = list(ProductSubgroup.objects.filter(name__icontains=search).values_list('id', flat=True))
+
+    condition = Q(name__icontains=search)
+    if brand_ids:
+        condition |= Q(brand_id__in=brand_ids)
+    if subgroup_ids:
+        condition |= Q(subgroup_id__in=subgroup_ids)
+
+    return queryset.filter(condition)
+
+
+def rank_products_by_similarity(queryset, search: str):
+    """Сортирует найденные товары по триграммному сходству названия с запросом."""
+    return queryset.annotate(
+        similarity=TrigramSimilarity('name', search)
+    ).order_by('-similarity', '-id')
+
+
+def build_search_hit(product) -> dict:
+    """Документ в формате выдачи MeiliSearch (displayedAttributes ProductIndexer)."""
+    manager = product.effective_manager
+    return {
+        'id': product.id,
+        'name': product.name,
+        'brand_name': product.brand.name if product.brand else '',
+        'subgroup_name': product.subgroup.name,
+        'group_name': product.subgroup.group.name,
+        'product_manager_name': manager.username if manager else '',
+        'tech_params': product.tech_params,
+        'complex_name': product.complex_name,
+        'description': product.description,
+    }
@@ -49,7 +49,7 @@ class ProductSerializer(serializers.ModelSerializer):
         ]
     
     def get_responsible_manager(self, obj):
-        manager = obj.get_manager()
+        manager = obj.effective_manager
         if manager:
             return UserSimpleSerializer(manager).data
         return None
@@ -123,4 +123,69 @@ class ProductUpdateSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
         
         instance.save()
-        return instance 
\ No newline at end of file
+        return instance 
+
+# Быстрый путь для списка товаров: те же данные, что у ProductSerializer,
+# но одной выборкой values() без создания моделей и вложенных сериализаторов.
+# Вложенный объект описывается парой (путь к связи, поля), лист — путем к колонке.
+def _user_shape(path):
+    return (path, {field: f'{path}__{field}' for field in ('id', 'email', 'first_name', 'last_name', 'role')})
+
+
+PRODUCT_LIST_SHAPE = {
+    'id': 'id',
+    'name': 'name',
+    'ext_id': 'ext_id',
+    'subgroup': ('subgroup', {
+        'id': 'subgroup__id',
+        'name': 'subgroup__name',
+        'ext_id': 'subgroup__ext_id',
+        'group': ('subgroup__group', {
+            'id': 'subgroup__group__id',
+            'name': 'subgroup__group__name',
+            'ext_id': 'subgroup__group__ext_id',
+        }),
+        'product_manager': _user_shape('subgroup__product_manager'),
+    }),
+    'brand': ('brand', {
+        'id': 'brand__id',
+        'name': 'brand__name',
+        'ext_id': 'brand__ext_id',
+        'product_manager': _user_shape('brand__product_manager'),
+    }),
+    'product_manager': _user_shape('product_manager'),
+    'responsible_manager': _user_shape('effective_manager'),
+}
+
+
+def _shape_columns(shape):
+    for value in shape.values():
+        if isinstance(value, tuple):
+            yield from _shape_columns(value[1])
+        else:
+            yield value
+
+
+def _build_from_shape(shape, row):
+    data = {}
+    for key, value in shape.items():
+        if isinstance(value, tuple):
+            path, nested = value
+            # Пустая связь сериализуется как null, как у ProductSerializer
+            data[key] = None if row[f'{path}__id'] is None else _build_from_shape(nested, row)
+        else:
+            data[key] = row[value]
+    return data
+
+
+PRODUCT_LIST_COLUMNS = list(dict.fromkeys(_shape_columns(PRODUCT_LIST_SHAPE)))
+
+
+def product_list_values(queryset):
+    """QuerySet строк values() со всеми колонками, нужными для списка товаров."""
+    return queryset.values(*PRODUCT_LIST_COLUMNS)
+
+
+def serialize_product_rows(rows):
+    """Строит ответ списка товаров из строк product_list_values() в формате ProductSerializer."""
+    return [_build_from_shape(PRODUCT_LIST_SHAPE, row) for row in rows]
@@ -1,15 +1,28 @@
 import os
 import json
 import logging
+from datetime import datetime
 import mysql.connector
-from celery import shared_task
+from celery import chord, shared_task
+from celery.schedules import crontab
 from django.db import transaction
 from django.db.models import Q
 from mysql.connector import Error
 from django.conf import settings
 from user.models import User
-from goods.models import Brand, Product, ProductGroup, ProductSubgroup
+from goods.models import (
+    Brand,
+    Product,
+    ProductEmbedding,
+    ProductGroup,
+    ProductIndexQueue,
+    ProductSubgroup,
+    RelatedIndexQueue,
+)
+from goods import embeddings
+from embedding_service import chunked_workflow, prune_cache
 from goods.indexers import ProductIndexer
+from goods.metrics import INDEX_QUEUE_FLUSHED
 
 logger = logging.getLogger(__name__)
 
@@ -337,25 +350,88 @@ def export_parts_to_csv():
 def index_products_atomically():
     """
     Задача для атомарной индексации всех товаров в MeiliSearch.
-    Очищает индекс и создает его заново.
+    Готовит временный индекс и раздает диапазоны id задачам index_product_range,
+    которые выполняются параллельно на воркерах; после всех частей
+    finish_products_reindex меняет временный индекс местами с основным.
+    Если упала хотя бы одна часть, abort_products_reindex удаляет временный индекс.
+    Запуски не пересекаются: блокировка держится до конца переиндексации.
     """
+    lock_token = ProductIndexer.acquire_reindex_lock()
+    if lock_token is None:
+        logger.warning("Полная переиндексация товаров уже выполняется, запуск пропущен")
+        return "Переиндексация уже выполняется"
+
     try:
         logger.info("Начинаем полную переиндексацию товаров в MeiliSearch")
         
-        # Получаем все товары
-        products = Product.objects.select_related('brand', 'subgroup__group', 'product_manager').all()
+        started_at = ProductIndexer.reindex_started_at()
+        tmp_index_name = ProductIndexer.start_atomic_reindex()
+        ranges = ProductIndexer.id_ranges()
+        if not ranges:
+            ProductIndexer.finish_atomic_reindex(tmp_index_name, 0, started_at)
+            ProductIndexer.release_reindex_lock(lock_token)
+            return "Нет товаров для индексации"
         
-        # Очищаем индекс и создаем заново
-        ProductIndexer.index_all_atomically(products)
+        callback = finish_products_reindex.s(tmp_index_name, started_at.isoformat(), lock_token).on_error(
+            abort_products_reindex.si(tmp_index_name, lock_token)
+        )
+        chord(index_product_range.s(tmp_index_name, start, end) for start, end in ranges)(callback)
         
-        logger.info(f"Успешно проиндексировано {products.count()} товаров в MeiliSearch")
-        return f"Проиндексировано {products.count()} товаров"
+        logger.info(f"Переиндексация разбита на {len(ranges)} частей")
+        return f"Запущена переиндексация: {len(ranges)} частей"
         
     except Exception as e:
+        ProductIndexer.release_reindex_lock(lock_token)
         logger.error(f"Ошибка при полной индексации товаров: {e}")
         raise
 
 
+@shared_task(queue=settings.RABBITMQ_GOODS_QUEUE)
+def index_product_range(index_name, start, end):
+    """
+    Задача для индексации товаров с id в диапазоне [start, end) во временный индекс.
+    """
+    indexed = ProductIndexer.index_id_range(index_name, start, end)
+    logger.info(f"Диапазон id [{start}, {end}): проиндексировано {indexed} товаров")
+    return indexed
+
+
+@shared_task(queue=settings.RABBITMQ_GOODS_QUEUE)
+def finish_products_reindex(results, tmp_index_name, started_at, lock_token=None):
+    """
+    Задача, завершающая полную переиндексацию после всех диапазонов.
+    """
+    try:
+        indexed = sum(results)
+        ProductIndexer.finish_atomic_reindex(tmp_index_name, indexed, datetime.fromisoformat(started_at))
+        
+        logger.info(f"Успешно проиндексировано {indexed} товаров в MeiliSearch")
+        return f"Проиндексировано {indexed} товаров"
+        
+    except Exception as e:
+        logger.error(f"Ошибка при завершении полной индексации товаров: {e}")
+        raise
+
+    finally:
+        ProductIndexer.release_reindex_lock(lock_token)
+
+
+@shared_task(queue=settings.RABBITMQ_GOODS_QUEUE)
+def abort_products_reindex(tmp_index_name, lock_token):
+    """
+    Обработчик ошибки переиндексации: удаляет недостроенный временный индекс
+    и снимает блокировку. Если блокировку уже снял finish_products_reindex
+    или перехватил новый запуск, временный индекс не трогается.
+    """
+    if not ProductIndexer.release_reindex_lock(lock_token):
+        logger.warning(f"Переиндексация в {tmp_index_name} уже завершена или заменена новой")
+        return "Блокировка уже снята"
+
+    ProductIndexer.meilisearch_client().delete_index(tmp_index_name)
+    logger.error(f"Переиндексация прервана ошибкой, временный индекс {tmp_index_name} удален")
+    return "Переиндексация прервана"
+
+
 @shared_task(queue=settings.RABBITMQ_GOODS_QUEUE)
 def index_products(product_ids):
     """
@@ -391,4 +467,230 @@ def unindex_products(product_ids):
         
     except Exception as e:
         logger.error(f"Ошибка при удалении товаров из индекса {product_ids}: {e}")
-        raise 
\ No newline at end of file
+        raise
+
+
+@shared_task(queue=settings.RABBITMQ_GOODS_QUEUE)
+def update_related_product_documents(relation, pk, parts):
+    """
+    Задача для частичного обновления документов товаров после изменения
+    бренда, подгруппы или группы (записи RelatedIndexQueue разбирает
+    flush_product_index_queue). Если обновить не удалось, товары
+    уходят в очередь на полную переиндексацию.
+    """
+    query = Q(**{relation: pk})
+    try:
+        updated = ProductIndexer.update_related_documents(query, parts)
+        logger.info(f"Обновлено {updated} товаров ({relation}={pk}): {', '.join(parts)}")
+
+    except Exception as e:
+        # Сброс очереди пересчитает и векторы товаров с измененным текстом
+        logger.error(f"Ошибка частичного обновления товаров ({relation}={pk}), ставим в очередь: {e}")
+        ProductIndexQueue.enqueue_queryset(Product.objects.filter(query))
+        return "Товары поставлены в очередь на переиндексацию"
+
+    if embeddings.EMBEDDING_RELATED_PARTS & set(parts):
+        # Товары с неизменным текстом embed_products пропустит сам
+        embeddings.schedule_product_embedding(list(Product.objects.filter(query).values_list('id', flat=True)))
+    return f"Обновлено {updated} товаров"
+
+
+@shared_task(queue=settings.RABBITMQ_GOODS_QUEUE)
+def update_product_synonyms():
+    """
+    Задача для обновления синонимов транслитерации в индексе MeiliSearch.
+    """
+    try:
+        ProductIndexer.update_synonyms()
+        logger.info("Синонимы транслитерации товаров обновлены")
+        return "Синонимы обновлены"
+
+    except Exception as e:
+        logger.error(f"Ошибка при обновлении синонимов товаров: {e}")
+        raise
+
+
+@shared_task(queue=settings.RABBITMQ_GOODS_QUEUE)
+def embed_products(product_ids):
+    """
+    Задача для пересчета векторов товаров (поиск похожих товаров).
+    """
+    try:
+        embedded = embeddings.embed_products(product_ids)
+        logger.info(f"Пересчитано {embedded} векторов из {len(product_ids)} товаров")
+        return f"Пересчитано {embedded} векторов"
+
+    except Exception as e:
+        logger.error(f"Ошибка при векторизации товаров {product_ids}: {e}")
+        raise
+
+
+@shared_task(queue=settings.RABBITMQ_GOODS_QUEUE)
+def embed_all_products(chunk_size=None):
+    """
+    Задача для пересчета векторов всех товаров пачками embed_products.
+    Одновременно выполняется не больше EMBEDDING_MAX_PARALLEL пачек;
+    векторы неизменных текстов берутся из кэша сервиса векторизации.
+    """
+    try:
+        product_ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+        if not product_ids:
+            return "Нет товаров для векторизации"
+
+        chunked_workflow(embed_products, product_ids, chunk_size).apply_async()
+        logger.info(f"Запущена векторизация {len(product_ids)} товаров")
+        return f"Запущена векторизация {len(product_ids)} товаров"
+
+    except Exception as e:
+        logger.error(f"Ошибка при запуске векторизации товаров: {e}")
+        raise
+
+
+@shared_task(queue=settings.RABBITMQ_GOODS_QUEUE)
+def prune_embedding_cache():
+    """
+    Задача для очистки кэша векторов от текстов, которых уже нет в ProductEmbedding.
+    """
+    try:
+        deleted = prune_cache(settings.EMBEDDING_CACHE_RETENTION, keep=[ProductEmbedding.objects.all()])
+        return f"Удалено {deleted} векторов из кэша"
+
+    except Exception as e:
+        logger.error(f"Ошибка при очистке кэша векторов: {e}")
+        raise
+
+
+@shared_task(queue=settings.RABBITMQ_GOODS_QUEUE)
+def flush_product_index_queue():
+    """
+    Задача для разбора очереди изменений товаров.
+    Накопленные id схлопываются в пакетную индексацию и пакетное удаление,
+    для товаров с измененным текстом ставится пересчет векторов. Изменения
+    брендов, подгрупп и групп из RelatedIndexQueue становятся частичными
+    обновлениями документов их товаров. В компактном режиме транслитерации
+    каждая пачка дополняет синонимы индекса своими новыми токенами.
+    """
+    total = 0
+    while True:
+        entries = ProductIndexQueue.claim(
+            settings.GOODS_INDEX_QUEUE_BATCH_SIZE, settings.GOODS_INDEX_QUEUE_CLAIM_TIMEOUT
+        )
+        if not entries:
+            break
+
+        unindex_ids = [pk for pk, action, _claimed_at in entries if action == ProductIndexQueue.Action.UNINDEX]
+        index_ids = [pk for pk, action, _claimed_at in entries if action != ProductIndexQueue.Action.UNINDEX]
+        try:
+            if unindex_ids:
+                ProductIndexer.unindex_multiple(unindex_ids)
+            if index_ids:
+                # Удаленные к этому моменту товары в выборку не попадут
+                ProductIndexer.index_from_query(Q(pk__in=index_ids))
+                # В компактном режиме новые кириллические токены пачки дополняют синонимы
+                ProductIndexer.extend_synonyms(ProductIndexer.collect_tokens(Q(pk__in=index_ids)))
+        except Exception as e:
+            # Освобождаем записи, следующий сброс повторит попытку
+            ProductIndexQueue.release(entries)
+            logger.error(f"Ошибка при обработке {len(entries)} товаров из очереди: {e}")
+            raise
+
+        ProductIndexQueue.complete(entries)
+        INDEX_QUEUE_FLUSHED.inc(len(entries))
+        total += len(entries)
+
+        if index_ids:
+            # Одна векторизация на пачку очереди и только для товаров с измененным текстом
+            try:
+                embeddings.schedule_product_embedding(embeddings.changed_product_ids(index_ids))
+            except Exception as e:
+                logger.warning(f"Не удалось поставить векторизацию товаров из очереди: {e}")
+
+    total += _flush_related_index_queue()
+
+    # Обработанные записи нужны переиндексации только на время ее работы
+    ProductIndexQueue.prune(settings.GOODS_INDEX_QUEUE_RETENTION)
+    RelatedIndexQueue.prune(settings.GOODS_INDEX_QUEUE_RETENTION)
+
+    if total:
+        logger.info(f"Из очереди обработано {total} товаров")
+    return f"Обработано {total} товаров"
+
+
+def _flush_related_index_queue():
+    """Разбирает RelatedIndexQueue; возвращает число обработанных изменений."""
+    total = 0
+    while True:
+        entries = RelatedIndexQueue.claim(
+            settings.GOODS_INDEX_QUEUE_BATCH_SIZE, settings.GOODS_INDEX_QUEUE_CLAIM_TIMEOUT
+        )
+        if not entries:
+            break
+
+        try:
+            for _entry_id, relation, object_id, parts, _claimed_at in entries:
+                # Ошибку MeiliSearch задача обрабатывает сама, ставя товары в ProductIndexQueue
+                update_related_product_documents(relation, object_id, parts)
+            ProductIndexer.extend_synonyms(ProductIndexer.collect_related_tokens(
+                (relation, object_id) for _entry_id, relation, object_id, _parts, _claimed_at in entries
+            ))
+        except Exception as e:
+            RelatedIndexQueue.release(entries)
+            logger.error(f"Ошибка при обработке {len(entries)} изменений связанных объектов из очереди: {e}")
+            raise
+
+        RelatedIndexQueue.complete(entries)
+        total += len(entries)
+    return total
+
+
+@shared_task(queue=settings.RABBITMQ_GOODS_QUEUE)
+def repair_products_index_drift():
+    """
+    Задача для сверки товаров базы с индексом MeiliSearch и исправления расхождений.
+    """
+    from goods.drift import find_index_drift, repair_index_drift
+
+    try:
+        report = find_index_drift()
+        repair_index_drift(report)
+        return (
+            f"Проверено {report['checked']} товаров: переиндексировано "
+            f"{len(report['missing']) + len(report['stale'])}, удалено {len(report['orphaned'])}"
+        )
+
+    except Exception as e:
+        logger.error(f"Ошибка при сверке индекса товаров: {e}")
+        raise
+
+
+@shared_task(queue=settings.RABBITMQ_GOODS_QUEUE)
+def assign_catalog_change_sequence():
+    """
+    Задача для нумерации изменений каталога в ленте /changes/.
+    Если номера уже назначает другой процесс, запуск пропускается.
+    """
+    from goods.changes import assign_change_sequence
+
+    if not assign_change_sequence():
+        return "Номера уже назначает другой процесс"
+    return "Номера изменений назначены"
+
+
+scheduled_cron_tasks = {
+    "flush_product_index_queue": {
+        "task": "goods.tasks.flush_product_index_queue",
+        "schedule": settings.GOODS_INDEX_QUEUE_FLUSH_INTERVAL,
+    },
+    "assign_catalog_change_sequence": {
+        "task": "goods.tasks.assign_catalog_change_sequence",
+        "schedule": settings.GOODS_CHANGE_FEED_INTERVAL,
+    },
+    "repair_products_index_drift": {
+        "task": "goods.tasks.repair_products_index_drift",
+        "schedule": crontab(hour="2", minute="30"),
+    },
+    "prune_embedding_cache": {
+        "task": "goods.tasks.prune_embedding_cache",
+        "schedule": crontab(hour="3", minute="30"),
+    },
+}
@@ -0,0 +1,34 @@
+from factory import Sequence, SubFactory
+from factory.django import DjangoModelFactory
+
+from goods.models import Brand, Product, ProductGroup, ProductSubgroup
+
+
+class ProductGroupFactory(DjangoModelFactory):
+    class Meta:
+        model = ProductGroup
+
+    name = Sequence(lambda x: f"Группа {x}")
+
+
+class ProductSubgroupFactory(DjangoModelFactory):
+    class Meta:
+        model = ProductSubgroup
+
+    group = SubFactory(ProductGroupFactory)
+    name = Sequence(lambda x: f"Подгруппа {x}")
+
+
+class BrandFactory(DjangoModelFactory):
+    class Meta:
+        model = Brand
+
+    name = Sequence(lambda x: f"Brand{x}")
+
+
+class ProductFactory(DjangoModelFactory):
+    class Meta:
+        model = Product
+
+    subgroup = SubFactory(ProductSubgroupFactory)
+    name = Sequence(lambda x: f"PART{x:05d}")
@@ -0,0 +1,126 @@
+from django.test import SimpleTestCase
+from rest_framework.reverse import reverse
+
+from core.tests import BaseActionTestCase, BaseTestCase
+from goods.changes import assign_change_sequence, merge_changes
+from goods.models import Brand, CatalogTombstone, Product
+from goods.tests.factories import BrandFactory, ProductFactory
+
+CHANGES_URL = reverse("catalog-changes-list")
+
+
+class MergeChangesTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self.products = [
+            {"seq": 3, "type": "product", "id": 10, "deleted": False, "data": {"id": 10}},
+            {"seq": 7, "type": "product", "id": 11, "deleted": False, "data": {"id": 11}},
+        ]
+        self.tombstones = [{"seq": 5, "type": "brand", "id": 2, "deleted": True}]
+
+    def test_merges_in_seq_order(self) -> None:
+        page = merge_changes([self.products, self.tombstones], since=0, limit=10)
+        self.assertEqual([change["seq"] for change in page["changes"]], [3, 5, 7])
+        self.assertEqual(page["next_since"], 7)
+        self.assertFalse(page["has_more"])
+
+    def test_limit_sets_has_more(self) -> None:
+        page = merge_changes([self.products, self.tombstones], since=0, limit=2)
+        self.assertEqual([change["seq"] for change in page["changes"]], [3, 5])
+        self.assertEqual(page["next_since"], 5)
+        self.assertTrue(page["has_more"])
+
+    def test_empty_page_keeps_since(self) -> None:
+        page = merge_changes([[], []], since=42, limit=10)
+        self.assertEqual(page, {"changes": [], "next_since": 42, "has_more": False})
+
+
+class ChangeSequenceTestCase(BaseTestCase):
+    def test_new_rows_are_numbered_by_assignment(self) -> None:
+        product = ProductFactory()
+        product.refresh_from_db()
+        self.assertIsNone(product.change_seq)
+        self.assertTrue(assign_change_sequence())
+        product.refresh_from_db()
+        self.assertIsNotNone(product.change_seq)
+
+    def test_unchanged_save_keeps_number(self) -> None:
+        product = ProductFactory()
+        assign_change_sequence()
+        product.refresh_from_db()
+        seq = product.change_seq
+
+        product.save()
+        Product.objects.filter(pk=product.pk).update(name=product.name)
+        product.refresh_from_db()
+        self.assertEqual(product.change_seq, seq)
+
+        product.name = "RENAMED"
+        product.save()
+        product.refresh_from_db()
+        self.assertIsNone(product.change_seq)
+        assign_change_sequence()
+        product.refresh_from_db()
+        self.assertGreater(product.change_seq, seq)
+
+    def test_delete_writes_tombstone(self) -> None:
+        brand = BrandFactory()
+        brand_id = brand.id
+        Brand.objects.filter(pk=brand_id).delete()
+        tombstone = CatalogTombstone.objects.get(kind="brand", object_id=brand_id)
+        self.assertIsNone(tombstone.change_seq)
+        assign_change_sequence()
+        tombstone.refresh_from_db()
+        self.assertIsNotNone(tombstone.change_seq)
+
+
+class CatalogChangesViewTestCase(BaseActionTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.api_client.force_authenticate(self.user)
+
+    def test_reads_numbered_changes_only(self) -> None:
+        product = ProductFactory()
+        response = self.api_client.get(CHANGES_URL)
+        self.assertEqual(response.status_code, 200)
+        # Чтение ленты не назначает номера
+        self.assertEqual(response.data["changes"], [])
+
+        assign_change_sequence()
+        changes = self.api_client.get(CHANGES_URL).data["changes"]
+        product_change = next(change for change in changes if change["type"] == "product")
+        self.assertEqual(product_change["id"], product.id)
+        self.assertEqual(product_change["data"]["subgroup_id"], product.subgroup_id)
+        self.assertFalse(product_change["deleted"])
+
+    def test_pages_with_since(self) -> None:
+        ProductFactory.create_batch(3)
+        assign_change_sequence()
+        first = self.api_client.get(CHANGES_URL, {"limit": 2}).data
+        self.assertTrue(first["has_more"])
+        rest = self.api_client.get(CHANGES_URL, {"since": first["next_since"], "limit": 100}).data
+        self.assertFalse(rest["has_more"])
+        seqs = [change["seq"] for change in first["changes"] + rest["changes"]]
+        self.assertEqual(seqs, sorted(set(seqs)))
+
+    def test_soft_deleted_product_and_tombstone(self) -> None:
+        product = ProductFactory()
+        brand = BrandFactory()
+        assign_change_sequence()
+        since = self.api_client.get(CHANGES_URL).data["next_since"]
+
+        product.delete()
+        brand_id = brand.id
+        brand.delete()
+        assign_change_sequence()
+        changes = self.api_client.get(CHANGES_URL, {"since": since}).data["changes"]
+        deleted = {(change["type"], change["id"]) for change in changes if change["deleted"]}
+        self.assertEqual(deleted, {("product", product.id), ("brand", brand_id)})
+
+    def test_invalid_params(self) -> None:
+        for params in ({"since": "abc"}, {"limit": "x"}, {"since": -1}, {"limit": 0}):
+            with self.subTest(params=params):
+                self.assertEqual(self.api_client.get(CHANGES_URL, params).status_code, 400)
+
+    def test_requires_authentication(self) -> None:
+        self.api_client.logout()
+        self.assertIn(self.api_client.get(CHANGES_URL).status_code, (401, 403))
@@ -0,0 +1,92 @@
+import re
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core.tests import BaseTestCase
+from goods.drift import find_index_drift, fingerprint, repair_index_drift
+from goods.indexers import ProductIndexer
+from goods.tests.factories import ProductFactory
+
+
+class FakeIndex:
+    """Индекс MeiliSearch в памяти: get_documents с фильтром по диапазону id и постраничной выдачей."""
+
+    def __init__(self, documents) -> None:
+        self.documents = {document["id"]: document for document in documents}
+
+    def get_documents(self, params):
+        bounds = dict(re.findall(r"id ([<>]=?) (\d+)", params["filter"] or ""))
+        documents = [
+            document for product_id, document in sorted(self.documents.items())
+            if product_id >= int(bounds.get(">=", product_id)) and product_id < int(bounds.get("<", product_id + 1))
+        ]
+        page = documents[params["offset"]:params["offset"] + params["limit"]]
+        return SimpleNamespace(results=page, total=len(documents))
+
+
+class FingerprintTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self.document = {
+            "name": "STM32F103",
+            "brand_id": 1,
+            "brand_name": "ST",
+            "subgroup_id": 2,
+            "subgroup_name": "Микроконтроллеры",
+            "group_id": 3,
+            "group_name": "Полупроводники",
+            "product_manager_id": None,
+            "product_manager_name": "",
+            "tech_params": {"corpus": "LQFP48", "flash": "64K"},
+        }
+
+    def test_ignores_extra_fields_and_empty_values(self) -> None:
+        document = {**self.document, "product_manager_name": None, "transliterated_search": "..."}
+        self.assertEqual(fingerprint(document), fingerprint(self.document))
+
+    def test_ignores_tech_params_key_order(self) -> None:
+        document = {**self.document, "tech_params": {"flash": "64K", "corpus": "LQFP48"}}
+        self.assertEqual(fingerprint(document), fingerprint(self.document))
+
+    def test_detects_changed_field(self) -> None:
+        document = {**self.document, "brand_name": "STMicroelectronics"}
+        self.assertNotEqual(fingerprint(document), fingerprint(self.document))
+
+
+@patch("goods.drift.DOCUMENTS_PAGE_SIZE", 2)
+@patch.object(ProductIndexer, "meilisearch_client")
+class IndexDriftTestCase(BaseTestCase):
+    def test_finds_missing_stale_and_orphaned(self, client) -> None:
+        synced, stale, missing = ProductFactory.create_batch(3)
+        deleted = ProductFactory()
+        documents = [ProductIndexer.build_object(product) for product in (synced, stale, deleted)]
+        documents[1]["name"] = "OUTDATED"
+        documents.append({"id": missing.id + 1000, "name": "GONE"})
+        deleted.delete()
+        client.return_value.index.return_value = FakeIndex(documents)
+
+        report = find_index_drift(range_size=2)
+        self.assertEqual(report["checked"], 3)
+        self.assertEqual(report["missing"], [missing.id])
+        self.assertEqual(report["stale"], [stale.id])
+        self.assertEqual(sorted(report["orphaned"]), [deleted.id, missing.id + 1000])
+
+    def test_empty_catalog_and_index(self, client) -> None:
+        client.return_value.index.return_value = FakeIndex([])
+        self.assertEqual(find_index_drift(), {"missing": [], "stale": [], "orphaned": [], "checked": 0})
+
+    @patch.object(ProductIndexer, "unindex_multiple")
+    @patch.object(ProductIndexer, "index_in_chunks")
+    def test_repair(self, index_in_chunks, unindex_multiple, _client) -> None:
+        repair_index_drift({"missing": [1], "stale": [2], "orphaned": [3]})
+        query, index_name = index_in_chunks.call_args.args
+        self.assertEqual(query.children, [("pk__in", [1, 2])])
+        self.assertEqual(index_name, ProductIndexer.index_name())
+        unindex_multiple.assert_called_once_with([3])
+
+        index_in_chunks.reset_mock()
+        unindex_multiple.reset_mock()
+        repair_index_drift({"missing": [], "stale": [], "orphaned": []})
+        index_in_chunks.assert_not_called()
+        unindex_multiple.assert_not_called()
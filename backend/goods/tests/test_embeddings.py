@@ -0,0 +1,189 @@
+from datetime import timedelta
+import math
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from core.models import EmbeddingCache
+from core.tests import BaseTestCase
+from embedding_service import (
+    HashingEmbedder,
+    chunked_workflow,
+    content_hash,
+    log_workflow_error,
+    prune_cache,
+    split_chunks,
+)
+from goods import embeddings
+from goods.embeddings import changed_product_ids, product_embedding_text
+from goods.indexers import ProductIndexer
+from goods.models import ProductEmbedding, ProductIndexQueue
+from goods.tasks import (
+    embed_products,
+    flush_product_index_queue,
+    prune_embedding_cache,
+    update_related_product_documents,
+)
+from goods.tests.factories import BrandFactory, ProductFactory
+
+
+def cosine(a, b) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+class HashingEmbedderTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self.embedder = HashingEmbedder()
+
+    def test_vectors_are_normalized_and_stable(self) -> None:
+        first, second = self.embedder.embed(["IRFP460 Infineon MOSFET", "IRFP460 Infineon MOSFET"])
+        self.assertEqual(len(first), self.embedder.dimensions)
+        self.assertAlmostEqual(math.sqrt(cosine(first, first)), 1.0)
+        self.assertEqual(first, second)
+
+    def test_related_parts_are_closer(self) -> None:
+        base, related, unrelated = self.embedder.embed([
+            "IRFP460 Infineon MOSFET Vds 500V TO-247",
+            "IRFP450 Infineon MOSFET Vds 500V TO-247",
+            "STM32F103 ST Микроконтроллеры LQFP48",
+        ])
+        self.assertGreater(cosine(base, related), cosine(base, unrelated))
+
+    def test_empty_text(self) -> None:
+        self.assertEqual(self.embedder.embed([""]), [[0.0] * self.embedder.dimensions])
+
+
+class ProductEmbeddingTextTestCase(SimpleTestCase):
+    def test_joins_present_fields(self) -> None:
+        row = {
+            "name": "IRFP460",
+            "brand__name": None,
+            "subgroup__group__name": "Полупроводники",
+            "subgroup__name": "MOSFET",
+            "tech_params": {"Vds": "500V"},
+        }
+        self.assertEqual(product_embedding_text(row), "IRFP460 Полупроводники MOSFET Vds 500V")
+
+
+class EmbeddingServiceTestCase(SimpleTestCase):
+    def test_content_hash_is_stable_per_text(self) -> None:
+        self.assertEqual(content_hash("IRFP460"), content_hash("IRFP460"))
+        self.assertNotEqual(content_hash("IRFP460"), content_hash("IRFP450"))
+        self.assertEqual(len(content_hash("")), 64)
+
+    def test_split_chunks(self) -> None:
+        self.assertEqual(split_chunks(range(5), 2), [[0, 1], [2, 3], [4]])
+        self.assertEqual(split_chunks([], 2), [])
+
+    def test_chunked_workflow_limits_parallel_chunks(self) -> None:
+        workflow = chunked_workflow(embed_products, list(range(7)), chunk_size=2, max_parallel=3)
+        # Следующая волна — тело chord: стартует после завершения всех задач предыдущей
+        self.assertEqual([task.args for task in workflow.tasks], [([0, 1],), ([2, 3],), ([4, 5],)])
+        self.assertEqual([task.args for task in workflow.body.tasks], [([6],)])
+        self.assertTrue(all(task.immutable for task in workflow.tasks))
+
+    def test_every_chunk_logs_its_failure(self) -> None:
+        workflow = chunked_workflow(embed_products, list(range(5)), chunk_size=2, max_parallel=2)
+        errbacks = [task.options["link_error"] for task in [*workflow.tasks, *workflow.body.tasks]]
+        self.assertEqual(
+            [(errback["task"], errback["args"]) for (errback,) in errbacks],
+            [
+                ("embedding_service.log_workflow_error", ("goods.tasks.embed_products", number, 3, size))
+                for number, size in [(1, 2), (2, 2), (3, 1)]
+            ],
+        )
+
+        with self.assertLogs("embedding_service", "ERROR") as logs:
+            log_workflow_error("goods.tasks.embed_products", 2, 3, 2)
+        self.assertIn("Пачка 2 из 3", logs.output[0])
+
+
+class ChangedProductIdsTestCase(BaseTestCase):
+    def test_only_products_with_new_text(self) -> None:
+        product = ProductFactory(tech_params={"Vds": "500V"})
+        self.assertEqual(changed_product_ids([product.id]), [product.id])
+
+        embeddings.embed_products([product.id])
+        self.assertEqual(changed_product_ids([product.id]), [])
+        # Сохранение без изменения текста не требует нового вектора
+        product.ext_id = "EXT-1"
+        product.save()
+        self.assertEqual(changed_product_ids([product.id]), [])
+
+        product.tech_params = {"Vds": "600V"}
+        product.save()
+        self.assertEqual(changed_product_ids([product.id]), [product.id])
+
+    def test_deleted_products_are_skipped(self) -> None:
+        product = ProductFactory()
+        product.delete()
+        self.assertEqual(changed_product_ids([product.id]), [])
+
+
+@patch.object(ProductIndexer, "index_from_query")
+@patch("goods.embeddings.schedule_product_embedding")
+class FlushQueueEmbeddingTestCase(BaseTestCase):
+    def test_one_schedule_per_batch_for_changed_texts(self, schedule, _index) -> None:
+        unchanged, renamed, new = ProductFactory.create_batch(3)
+        embeddings.embed_products([unchanged.id, renamed.id])
+        renamed.name = "RENAMED"
+        renamed.save()
+        ProductIndexQueue.enqueue_ids([unchanged.id, renamed.id, new.id])
+
+        flush_product_index_queue()
+        schedule.assert_called_once()
+        self.assertEqual(sorted(schedule.call_args.args[0]), sorted([renamed.id, new.id]))
+
+
+@patch.object(ProductIndexer, "update_related_documents", return_value=2)
+@patch("goods.embeddings.schedule_product_embedding")
+class RelatedChangeEmbeddingTestCase(BaseTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.brand = BrandFactory()
+        self.products = ProductFactory.create_batch(2, brand=self.brand)
+        ProductFactory()
+
+    def test_rename_schedules_products_of_the_object(self, schedule, _update) -> None:
+        update_related_product_documents("brand", self.brand.id, ["brand"])
+        self.assertEqual(sorted(schedule.call_args.args[0]), sorted(product.id for product in self.products))
+
+    def test_manager_change_does_not_touch_vectors(self, schedule, _update) -> None:
+        update_related_product_documents("brand", self.brand.id, ["manager"])
+        schedule.assert_not_called()
+
+
+@patch("goods.embeddings.schedule_product_embedding")
+@patch("goods.embeddings.get_embedder")
+class FindSimilarProductsTestCase(BaseTestCase):
+    def test_missing_vector_is_queued_without_the_model(self, get_embedder, schedule) -> None:
+        product = ProductFactory()
+
+        self.assertEqual(embeddings.find_similar_products(product.id, 5), [])
+        schedule.assert_called_once_with([product.id])
+        get_embedder.assert_not_called()
+
+
+class PruneEmbeddingCacheTestCase(BaseTestCase):
+    def test_removes_old_vectors_of_texts_no_longer_used(self) -> None:
+        product = ProductFactory()
+        embeddings.embed_products([product.id])
+        current_hash = ProductEmbedding.objects.get().content_hash
+        model_name = ProductEmbedding.objects.get().model_name
+        EmbeddingCache.objects.bulk_create([
+            EmbeddingCache(content_hash="old", model_name=model_name, embedding=[1.0, 0.0]),
+            EmbeddingCache(content_hash="recent", model_name=model_name, embedding=[0.0, 1.0]),
+        ])
+        EmbeddingCache.objects.exclude(content_hash="recent").update(created_at=timezone.now() - timedelta(days=60))
+
+        self.assertEqual(prune_embedding_cache(), "Удалено 1 векторов из кэша")
+        self.assertEqual(
+            set(EmbeddingCache.objects.values_list("content_hash", flat=True)), {current_hash, "recent"}
+        )
+
+    def test_without_tables_every_old_vector_goes(self) -> None:
+        EmbeddingCache.objects.create(content_hash="old", model_name="hashing-v1", embedding=[1.0])
+        EmbeddingCache.objects.update(created_at=timezone.now() - timedelta(seconds=120))
+
+        self.assertEqual(prune_cache(60), 1)
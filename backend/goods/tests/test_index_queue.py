@@ -0,0 +1,183 @@
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+from prometheus_client import REGISTRY
+
+from core.tests import BaseTestCase
+from goods.indexers import ProductIndexer
+from goods.models import ProductIndexQueue, RelatedIndexQueue
+from goods.tasks import flush_product_index_queue
+from goods.tests.factories import (
+    BrandFactory,
+    ProductFactory,
+    ProductGroupFactory,
+    ProductSubgroupFactory,
+)
+
+CLAIM_TIMEOUT = 300
+
+
+class ProductIndexQueueTestCase(BaseTestCase):
+    def queued_ids(self) -> set:
+        pending = ProductIndexQueue.objects.filter(processed_at__isnull=True)
+        return set(pending.values_list("product_id", flat=True))
+
+    def test_claimed_entries_stay_pending_until_completed(self) -> None:
+        ProductIndexQueue.enqueue_ids([1, 2])
+        entries = ProductIndexQueue.claim(10, CLAIM_TIMEOUT)
+        self.assertEqual({entry[0] for entry in entries}, {1, 2})
+        # Взятые записи не отдаются повторно, но остаются в таблице
+        self.assertEqual(ProductIndexQueue.claim(10, CLAIM_TIMEOUT), [])
+        self.assertEqual(self.queued_ids(), {1, 2})
+
+        ProductIndexQueue.complete(entries)
+        self.assertEqual(self.queued_ids(), set())
+        # Обработанные записи хранятся для повтора при переиндексации
+        self.assertEqual(ProductIndexQueue.objects.count(), 2)
+
+    def test_stale_claim_is_taken_again(self) -> None:
+        ProductIndexQueue.enqueue_ids([1])
+        ProductIndexQueue.claim(10, CLAIM_TIMEOUT)
+        ProductIndexQueue.objects.update(claimed_at=timezone.now() - timedelta(seconds=CLAIM_TIMEOUT + 1))
+
+        entries = ProductIndexQueue.claim(10, CLAIM_TIMEOUT)
+        self.assertEqual([entry[0] for entry in entries], [1])
+
+    def test_enqueue_during_processing_keeps_entry(self) -> None:
+        ProductIndexQueue.enqueue_ids([1, 2])
+        entries = ProductIndexQueue.claim(10, CLAIM_TIMEOUT)
+        ProductIndexQueue.enqueue_ids([2], ProductIndexQueue.Action.UNINDEX)
+
+        ProductIndexQueue.complete(entries)
+        self.assertEqual(self.queued_ids(), {2})
+        entries = ProductIndexQueue.claim(10, CLAIM_TIMEOUT)
+        self.assertEqual([entry[:2] for entry in entries], [(2, ProductIndexQueue.Action.UNINDEX)])
+
+    def test_release_makes_entries_available(self) -> None:
+        ProductIndexQueue.enqueue_ids([1])
+        entries = ProductIndexQueue.claim(10, CLAIM_TIMEOUT)
+        ProductIndexQueue.release(entries)
+        self.assertEqual([entry[0] for entry in ProductIndexQueue.claim(10, CLAIM_TIMEOUT)], [1])
+
+    def test_enqueue_after_processing_makes_entry_pending(self) -> None:
+        ProductIndexQueue.enqueue_ids([1])
+        ProductIndexQueue.complete(ProductIndexQueue.claim(10, CLAIM_TIMEOUT))
+        first_queued_at = ProductIndexQueue.objects.get().queued_at
+
+        ProductIndexQueue.enqueue_ids([1])
+        entry = ProductIndexQueue.objects.get()
+        self.assertIsNone(entry.processed_at)
+        self.assertGreater(entry.queued_at, first_queued_at)
+
+    def test_prune_removes_old_processed_entries(self) -> None:
+        ProductIndexQueue.enqueue_ids([1, 2, 3])
+        ProductIndexQueue.complete(ProductIndexQueue.claim(2, CLAIM_TIMEOUT))
+        ProductIndexQueue.objects.filter(processed_at__isnull=False).update(
+            processed_at=timezone.now() - timedelta(seconds=100)
+        )
+
+        self.assertEqual(ProductIndexQueue.prune(60), 2)
+        self.assertEqual(self.queued_ids(), {3})
+
+    def test_depth_metric_counts_pending_entries(self) -> None:
+        ProductIndexQueue.enqueue_ids([1, 2, 3])
+        ProductIndexQueue.complete(ProductIndexQueue.claim(1, CLAIM_TIMEOUT))
+        self.assertEqual(REGISTRY.get_sample_value("goods_index_queue_depth"), 2)
+
+
+class RelatedIndexQueueTestCase(BaseTestCase):
+    def test_parts_of_pending_changes_are_merged(self) -> None:
+        RelatedIndexQueue.enqueue("brand", 1, ["brand"])
+        RelatedIndexQueue.enqueue("brand", 1, ["manager", "brand"])
+        RelatedIndexQueue.enqueue("subgroup", 1, ["subgroup"])
+
+        entry = RelatedIndexQueue.objects.get(relation="brand")
+        self.assertEqual(sorted(entry.parts), ["brand", "manager"])
+        self.assertEqual(RelatedIndexQueue.objects.count(), 2)
+
+    def test_change_after_processing_replaces_parts(self) -> None:
+        RelatedIndexQueue.enqueue("brand", 1, ["brand", "manager"])
+        RelatedIndexQueue.complete(RelatedIndexQueue.claim(10, CLAIM_TIMEOUT))
+
+        RelatedIndexQueue.enqueue("brand", 1, ["manager"])
+        entry = RelatedIndexQueue.objects.get()
+        self.assertIsNone(entry.processed_at)
+        self.assertEqual(entry.parts, ["manager"])
+
+    def test_change_during_processing_keeps_entry(self) -> None:
+        RelatedIndexQueue.enqueue("brand", 1, ["brand"])
+        entries = RelatedIndexQueue.claim(10, CLAIM_TIMEOUT)
+        self.assertEqual([entry[1:4] for entry in entries], [("brand", 1, ["brand"])])
+        RelatedIndexQueue.enqueue("brand", 1, ["manager"])
+
+        RelatedIndexQueue.complete(entries)
+        entries = RelatedIndexQueue.claim(10, CLAIM_TIMEOUT)
+        self.assertEqual(sorted(entries[0][3]), ["brand", "manager"])
+
+    def test_release_and_prune(self) -> None:
+        RelatedIndexQueue.enqueue("brand", 1, ["brand"])
+        entries = RelatedIndexQueue.claim(10, CLAIM_TIMEOUT)
+        RelatedIndexQueue.release(entries)
+        entries = RelatedIndexQueue.claim(10, CLAIM_TIMEOUT)
+        self.assertEqual(len(entries), 1)
+
+        RelatedIndexQueue.complete(entries)
+        RelatedIndexQueue.objects.update(processed_at=timezone.now() - timedelta(seconds=100))
+        self.assertEqual(RelatedIndexQueue.prune(60), 1)
+
+
+@override_settings(ENVIRONMENT="dev")
+class RelatedChangeOutboxTestCase(BaseTestCase):
+    def test_rename_is_queued_in_the_same_transaction(self) -> None:
+        brand = BrandFactory(name="Infineon")
+        ProductFactory(brand=brand)
+
+        with transaction.atomic():
+            brand.name = "Infineon Technologies"
+            brand.save()
+            self.assertEqual(
+                list(RelatedIndexQueue.objects.values_list("relation", "object_id", "parts")),
+                [("brand", brand.id, ["brand"])],
+            )
+
+    def test_rolled_back_change_is_not_queued(self) -> None:
+        group = ProductGroupFactory()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            group.name = "Новая группа"
+            group.save()
+            raise RuntimeError
+
+        self.assertFalse(RelatedIndexQueue.objects.exists())
+
+    def test_unchanged_indexed_fields_are_not_queued(self) -> None:
+        brand = BrandFactory()
+        brand.ext_id = "new-ext-id"
+        brand.save()
+
+        self.assertFalse(RelatedIndexQueue.objects.exists())
+
+    @patch("goods.tasks.update_related_product_documents")
+    @patch.object(ProductIndexer, "index_from_query")
+    def test_flush_turns_changes_into_partial_updates(self, _index: MagicMock, update: MagicMock) -> None:
+        subgroup = ProductSubgroupFactory()
+        subgroup.name = "Транзисторы"
+        subgroup.save()
+
+        flush_product_index_queue()
+
+        update.assert_called_once_with("subgroup", subgroup.id, ["subgroup"])
+        self.assertFalse(RelatedIndexQueue.objects.filter(processed_at__isnull=True).exists())
+
+    @patch("goods.tasks.update_related_product_documents", side_effect=RuntimeError("db"))
+    def test_failed_flush_keeps_changes_pending(self, _update: MagicMock) -> None:
+        RelatedIndexQueue.enqueue("brand", 1, ["brand"])
+
+        with self.assertRaises(RuntimeError):
+            flush_product_index_queue()
+
+        entry = RelatedIndexQueue.objects.get()
+        self.assertIsNone(entry.claimed_at)
+        self.assertIsNone(entry.processed_at)
@@ -0,0 +1,239 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.db.models import Q
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from core.tests import BaseTestCase
+from goods.indexers import ProductIndexer
+from goods.models import ProductIndexQueue, RelatedIndexQueue
+from goods.tasks import (
+    abort_products_reindex,
+    finish_products_reindex,
+    flush_product_index_queue,
+    index_products_atomically,
+)
+from goods.tests.factories import (
+    BrandFactory,
+    ProductFactory,
+    ProductGroupFactory,
+    ProductSubgroupFactory,
+)
+from goods.utils import TransliterationUtils
+
+
+class FakeIndex:
+    uid = "products"
+
+    def __init__(self) -> None:
+        self.pending = set()
+        self.max_pending = 0
+        self.next_uid = 0
+
+    def add_documents(self, chunk):
+        self.next_uid += 1
+        self.pending.add(self.next_uid)
+        self.max_pending = max(self.max_pending, len(self.pending))
+        return SimpleNamespace(task_uid=self.next_uid)
+
+
+class SendInChunksTestCase(SimpleTestCase):
+    def test_pending_tasks_never_exceed_limit(self) -> None:
+        index = FakeIndex()
+        documents = ({"id": number} for number in range(25))
+        with patch.object(ProductIndexer, "_wait_for_task", side_effect=index.pending.discard):
+            sent = ProductIndexer._send_in_chunks(index, "add_documents", documents, chunk_size=2)
+
+        self.assertEqual(sent, 25)
+        self.assertEqual(index.max_pending, ProductIndexer.MAX_PENDING_TASKS)
+        self.assertEqual(index.pending, set())
+
+
+@patch.object(ProductIndexer, "_wait_for_task")
+@patch.object(ProductIndexer, "index_in_chunks")
+@patch.object(ProductIndexer, "meilisearch_client")
+class AtomicReindexReplayTestCase(BaseTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.started_at = timezone.now()
+        self.live, self.deleted = ProductFactory.create_batch(2)
+        self.deleted.delete()
+        # Изменение до начала переиндексации уже попало в новый индекс
+        ProductIndexQueue.enqueue_ids([ProductFactory().id])
+        ProductIndexQueue.objects.update(queued_at=self.started_at - timedelta(minutes=5))
+        ProductIndexQueue.enqueue_ids([self.live.id])
+        ProductIndexQueue.enqueue_ids([self.deleted.id], ProductIndexQueue.Action.UNINDEX)
+
+    def set_document_count(self, client: MagicMock, count: int) -> None:
+        client.return_value.index.return_value.get_stats.return_value.number_of_documents = count
+
+    def test_replay_queue(self, client: MagicMock, index_in_chunks: MagicMock, _wait: MagicMock) -> None:
+        replayed = ProductIndexer.replay_queue("products_tmp", self.started_at)
+
+        self.assertEqual(replayed, 2)
+        query, index_name = index_in_chunks.call_args.args
+        self.assertEqual(index_name, "products_tmp")
+        self.assertEqual(query.children, [("id__in", {self.live.id})])
+        client.return_value.index.return_value.delete_documents.assert_called_once_with([self.deleted.id])
+
+    def test_replay_reindexes_products_of_changed_related_objects(
+        self, client: MagicMock, index_in_chunks: MagicMock, _wait: MagicMock
+    ) -> None:
+        RelatedIndexQueue.enqueue("subgroup", self.live.subgroup_id, ["subgroup"])
+
+        ProductIndexer.replay_queue("products_tmp", self.started_at)
+
+        query, index_name = index_in_chunks.call_args_list[0].args
+        self.assertEqual(index_name, "products_tmp")
+        self.assertEqual(query.children, [("subgroup__in", [self.live.subgroup_id])])
+
+    def test_swap_within_replay_tolerance(self, client: MagicMock, index_in_chunks: MagicMock, _wait: MagicMock) -> None:
+        # Переиндексация успела отправить удаленный позже товар
+        self.set_document_count(client, 3)
+        ProductIndexer.finish_atomic_reindex("products_tmp", 3, self.started_at)
+
+        client.return_value.swap_indexes.assert_called_once()
+        # Повтор во временном индексе и еще раз в основном после swap
+        self.assertEqual([call.args[1] for call in index_in_chunks.call_args_list], ["products_tmp", "products"])
+
+    def test_swap_aborted_beyond_tolerance(self, client: MagicMock, index_in_chunks: MagicMock, _wait: MagicMock) -> None:
+        self.set_document_count(client, 10)
+        with self.assertRaises(RuntimeError):
+            ProductIndexer.finish_atomic_reindex("products_tmp", 10, self.started_at)
+
+        client.return_value.swap_indexes.assert_not_called()
+        client.return_value.delete_index.assert_called_once_with("products_tmp")
+
+
+@patch.object(ProductIndexer, "_wait_for_task")
+@patch.object(ProductIndexer, "meilisearch_client")
+class UpdateRelatedDocumentsTestCase(BaseTestCase):
+    def test_updates_only_indexed_live_products(self, client: MagicMock, _wait: MagicMock) -> None:
+        brand = BrandFactory(name="Infineon")
+        indexed, not_indexed, deleted = ProductFactory.create_batch(3, brand=brand)
+        deleted.delete()
+        index = client.return_value.index.return_value
+        index.get_documents.return_value = SimpleNamespace(results=[{"id": indexed.id}])
+
+        updated = ProductIndexer.update_related_documents(Q(brand_id=brand.id), ["brand"])
+
+        self.assertEqual(updated, 1)
+        (documents,), _kwargs = index.update_documents.call_args
+        self.assertEqual([document["id"] for document in documents], [indexed.id])
+        self.assertEqual(documents[0]["brand_name"], "Infineon")
+        self.assertEqual(
+            list(ProductIndexQueue.objects.values_list("product_id", flat=True)), [not_indexed.id]
+        )
+
+
+@override_settings(MEILISEARCH_COMPACT_TRANSLITERATION=True)
+@patch.object(ProductIndexer, "_wait_for_task")
+@patch.object(ProductIndexer, "meilisearch_client")
+class ExtendSynonymsTestCase(BaseTestCase):
+    def test_adds_only_missing_variants(self, client: MagicMock, _wait: MagicMock) -> None:
+        index = client.return_value.index.return_value
+        expected = TransliterationUtils.build_synonyms(["резистор"])
+        index.get_synonyms.return_value = {}
+
+        self.assertEqual(ProductIndexer.extend_synonyms({"резистор", "bc547"}), len(expected))
+        (synonyms,), _kwargs = index.update_synonyms.call_args
+        self.assertEqual(synonyms, expected)
+
+        index.reset_mock()
+        index.get_synonyms.return_value = expected
+        self.assertEqual(ProductIndexer.extend_synonyms({"резистор"}), 0)
+        index.update_synonyms.assert_not_called()
+
+    @override_settings(MEILISEARCH_COMPACT_TRANSLITERATION=False)
+    def test_disabled_outside_compact_mode(self, client: MagicMock, _wait: MagicMock) -> None:
+        self.assertEqual(ProductIndexer.extend_synonyms({"резистор"}), 0)
+        client.assert_not_called()
+
+    def test_tokens_of_products_include_related_names(self, _client: MagicMock, _wait: MagicMock) -> None:
+        product = ProductFactory(
+            name="КТ315",
+            brand=BrandFactory(name="Интеграл"),
+            subgroup=ProductSubgroupFactory(name="Транзисторы"),
+            tech_params={"Корпус": "ТО-92"},
+        )
+        ProductFactory(name="Другой")
+
+        tokens = ProductIndexer.collect_tokens(Q(id=product.id))
+
+        self.assertTrue({"кт315", "интеграл", "транзисторы", "то", "92"} <= tokens)
+        self.assertNotIn("другой", tokens)
+
+    def test_tokens_of_related_objects(self, _client: MagicMock, _wait: MagicMock) -> None:
+        brand = BrandFactory(name="Ангстрем")
+        group = ProductGroupFactory(name="Микросхемы")
+
+        tokens = ProductIndexer.collect_related_tokens([("brand", brand.id), ("subgroup__group", group.id)])
+
+        self.assertEqual(tokens, {"ангстрем", "микросхемы"})
+
+    @patch.object(ProductIndexer, "index_from_query")
+    def test_flush_extends_synonyms_with_new_product_tokens(
+        self, _index: MagicMock, client: MagicMock, _wait: MagicMock
+    ) -> None:
+        index = client.return_value.index.return_value
+        index.get_synonyms.return_value = {}
+        product = ProductFactory(name="Резистор")
+        ProductIndexQueue.enqueue_ids([product.id])
+
+        flush_product_index_queue()
+
+        (synonyms,), _kwargs = index.update_synonyms.call_args
+        self.assertTrue(set(TransliterationUtils.build_synonyms(["резистор"])) <= set(synonyms))
+
+
+@patch.object(ProductIndexer, "meilisearch_client")
+class ReindexLockTestCase(BaseTestCase):
+    @patch("goods.tasks.chord")
+    @patch.object(ProductIndexer, "id_ranges", return_value=[(1, 100), (100, 200)])
+    @patch.object(ProductIndexer, "start_atomic_reindex", return_value="products_tmp")
+    def test_second_reindex_is_skipped_while_first_runs(
+        self, start: MagicMock, _ranges: MagicMock, chord: MagicMock, _client: MagicMock
+    ) -> None:
+        index_products_atomically()
+        (callback,), _kwargs = chord.return_value.call_args
+        (errback,) = callback.options["link_error"]
+        self.assertEqual(errback["task"], "goods.tasks.abort_products_reindex")
+        self.assertEqual(errback["args"][0], "products_tmp")
+
+        self.assertEqual(index_products_atomically(), "Переиндексация уже выполняется")
+        start.assert_called_once()
+
+    def test_failed_part_removes_tmp_index_and_releases_lock(self, client: MagicMock) -> None:
+        lock_token = ProductIndexer.acquire_reindex_lock()
+
+        abort_products_reindex("products_tmp", lock_token)
+
+        client.return_value.delete_index.assert_called_once_with("products_tmp")
+        self.assertIsNotNone(ProductIndexer.acquire_reindex_lock())
+
+    def test_stale_error_callback_keeps_new_tmp_index(self, client: MagicMock) -> None:
+        stale_token = ProductIndexer.acquire_reindex_lock()
+        ProductIndexer.release_reindex_lock(stale_token)
+        ProductIndexer.acquire_reindex_lock()
+
+        abort_products_reindex("products_tmp", stale_token)
+
+        client.return_value.delete_index.assert_not_called()
+
+    @patch.object(ProductIndexer, "finish_atomic_reindex", side_effect=RuntimeError("count"))
+    def test_failed_finish_releases_lock(self, _finish: MagicMock, _client: MagicMock) -> None:
+        lock_token = ProductIndexer.acquire_reindex_lock()
+
+        with self.assertRaises(RuntimeError):
+            finish_products_reindex([1, 2], "products_tmp", timezone.now().isoformat(), lock_token)
+
+        self.assertIsNotNone(ProductIndexer.acquire_reindex_lock())
+
+    def test_synchronous_reindex_refuses_to_run_concurrently(self, client: MagicMock) -> None:
+        ProductIndexer.acquire_reindex_lock()
+
+        with self.assertRaises(RuntimeError):
+            ProductIndexer.index_all_atomically()
+        client.assert_not_called()
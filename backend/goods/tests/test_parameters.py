@@ -0,0 +1,43 @@
+from django.test import SimpleTestCase
+
+from goods.parameters import (
+    build_parameter_rows,
+    parse_parameter_filter,
+    parse_quantity,
+)
+
+
+class ParseQuantityTestCase(SimpleTestCase):
+    def test_plain_units(self) -> None:
+        self.assertEqual(parse_quantity("600V"), (600.0, "V"))
+        self.assertEqual(parse_quantity("600 В"), (600.0, "V"))
+        self.assertEqual(parse_quantity(12), (12.0, ""))
+
+    def test_prefixes(self) -> None:
+        self.assertAlmostEqual(parse_quantity("10мА")[0], 0.01)
+        self.assertEqual(parse_quantity("10мА")[1], "A")
+        self.assertEqual(parse_quantity("4,7 кОм"), (4700.0, "Ohm"))
+        self.assertAlmostEqual(parse_quantity("100nF")[0], 1e-7)
+        self.assertAlmostEqual(parse_quantity("2,2мкФ")[0], 2.2e-6)
+
+    def test_not_numeric(self) -> None:
+        self.assertIsNone(parse_quantity("TO-247"))
+        self.assertIsNone(parse_quantity("-40...+85"))
+        self.assertIsNone(parse_quantity("64K"))
+        self.assertIsNone(parse_quantity(True))
+
+
+class ParameterFilterTestCase(SimpleTestCase):
+    def test_parses_operators(self) -> None:
+        self.assertEqual(parse_parameter_filter("Vds >= 600V"), ("Vds", ">=", "600V"))
+        self.assertEqual(parse_parameter_filter("Корпус=TO-247"), ("Корпус", "=", "TO-247"))
+
+    def test_range_requires_number(self) -> None:
+        with self.assertRaises(ValueError):
+            parse_parameter_filter("Корпус>TO-247")
+        with self.assertRaises(ValueError):
+            parse_parameter_filter("Vds")
+
+    def test_builds_rows(self) -> None:
+        rows = build_parameter_rows({"Vds": "600V", "Корпус": "TO-247", "extra": {"a": 1}})
+        self.assertEqual(rows, [("Vds", "600V", 600.0, "V"), ("Корпус", "TO-247", None, "")])
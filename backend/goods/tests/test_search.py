@@ -0,0 +1,98 @@
+import re
+
+from django.test import SimpleTestCase
+
+from goods.search import (
+    MergedSearchPager,
+    SearchTimings,
+    decode_search_cursor,
+    encode_search_cursor,
+)
+
+
+class FakeIndex:
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+
+    def search(self, query, params):
+        if self.error:
+            raise self.error
+        return self.response
+
+
+class SearchTimingsTestCase(SimpleTestCase):
+    def test_records_variant_timings(self) -> None:
+        timings = SearchTimings()
+        index = FakeIndex({"hits": [{"id": 1}, {"id": 2}], "processingTimeMs": 3})
+
+        timings.search(index, "stm32", {}, "priority")
+        with timings.merging():
+            pass
+        result = timings.finish("meilisearch")
+
+        self.assertEqual(result["source"], "meilisearch")
+        self.assertEqual(len(result["variants"]), 1)
+        variant = result["variants"][0]
+        self.assertEqual(variant["stage"], "priority")
+        self.assertEqual(variant["meilisearch_ms"], 3)
+        self.assertEqual(variant["hits"], 2)
+        self.assertGreaterEqual(result["total_ms"], result["merge_ms"])
+
+    def test_failed_variant_is_recorded_and_reraised(self) -> None:
+        timings = SearchTimings()
+        index = FakeIndex(error=ValueError("boom"))
+
+        with self.assertRaises(ValueError):
+            timings.search(index, "stm32", {}, "fallback")
+
+        self.assertEqual(timings.variants[0]["error"], "boom")
+
+
+class VariantsIndex:
+    """Индекс, где каждому варианту запроса соответствует список id."""
+
+    def __init__(self, results):
+        self.results = results
+
+    def search(self, query, params):
+        ids = self.results.get(query, [])
+        match = re.search(r"id IN \[([\d, ]*)\]", params.get("filter") or "")
+        if match:
+            wanted = {int(pk) for pk in match.group(1).split(",") if pk.strip()}
+            ids = [pk for pk in ids if pk in wanted]
+        offset = params.get("offset", 0)
+        page = ids[offset:offset + params["limit"]]
+        return {"hits": [{"id": pk} for pk in page], "estimatedTotalHits": len(ids), "processingTimeMs": 0}
+
+
+class MergedSearchPagerTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        index = VariantsIndex({"a": [1, 2, 3, 4], "b": [3, 5, 1, 6]})
+        self.pager = MergedSearchPager(index, {}, SearchTimings(), max_total_hits=1000)
+        self.variants = [["a", "priority"], ["b", "fallback"]]
+
+    def test_pages_cover_merged_results_without_duplicates(self) -> None:
+        collected = []
+        position, offset = 0, 0
+        while position < len(self.variants):
+            hits, position, offset = self.pager.fetch(self.variants, position, offset, 2)
+            collected.extend(hit["id"] for hit in hits)
+
+        self.assertEqual(collected, [1, 2, 3, 4, 5, 6])
+
+    def test_position_points_inside_second_variant(self) -> None:
+        hits, position, offset = self.pager.fetch(self.variants, 0, 0, 5)
+
+        self.assertEqual([hit["id"] for hit in hits], [1, 2, 3, 4, 5])
+        self.assertEqual((position, offset), (1, 2))
+
+
+class SearchCursorTestCase(SimpleTestCase):
+    def test_round_trip(self) -> None:
+        state = {"q": "дмс", "v": [["дмс", "priority"]], "i": 0, "o": 50, "t": 120}
+        self.assertEqual(decode_search_cursor(encode_search_cursor(state)), state)
+
+    def test_garbage_is_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            decode_search_cursor("not-a-cursor")
@@ -0,0 +1,45 @@
+from django.test import SimpleTestCase
+
+from goods.models import Brand, Product, ProductGroup, ProductSubgroup
+from goods.serializers import (
+    PRODUCT_LIST_COLUMNS,
+    ProductSerializer,
+    serialize_product_rows,
+)
+from user.models import User
+
+
+class ProductListFastPathTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self.manager = User(id=7, email="pm@example.com", first_name="Иван", last_name="Петров", role="product")
+        self.group = ProductGroup(id=3, name="Полупроводники", ext_id="G3")
+        self.subgroup = ProductSubgroup(
+            id=2, name="Микроконтроллеры", ext_id="S2", group=self.group, product_manager=self.manager
+        )
+
+    def _row(self, product: Product) -> dict:
+        # Строка values(), какой ее вернула бы база для этого товара
+        row = {}
+        for column in PRODUCT_LIST_COLUMNS:
+            value = product
+            for part in column.split("__"):
+                value = getattr(value, part, None) if value is not None else None
+            row[column] = value
+        return row
+
+    def assert_same_as_serializer(self, product: Product) -> None:
+        expected = ProductSerializer(product).data
+        self.assertEqual(serialize_product_rows([self._row(product)]), [expected])
+
+    def test_product_with_all_relations(self) -> None:
+        brand = Brand(id=5, name="ST", ext_id="B5", product_manager=self.manager)
+        product = Product(
+            id=1, name="STM32F103", ext_id="P1", subgroup=self.subgroup, brand=brand,
+            product_manager=self.manager, effective_manager=self.manager,
+        )
+        self.assert_same_as_serializer(product)
+
+    def test_empty_relations_are_null(self) -> None:
+        self.subgroup.product_manager = None
+        product = Product(id=1, name="STM32F103", ext_id=None, subgroup=self.subgroup)
+        self.assert_same_as_serializer(product)
@@ -0,0 +1,33 @@
+from django.test import SimpleTestCase
+
+from goods.utils import TransliterationUtils
+
+
+class BuildSynonymsTestCase(SimpleTestCase):
+    def test_cyrillic_token_variants_point_to_token(self) -> None:
+        synonyms = TransliterationUtils.build_synonyms(["дмс"])
+        self.assertEqual(synonyms["dms"], ["дмс"])
+        self.assertEqual(synonyms["lvc"], ["дмс"])
+
+    def test_latin_tokens_are_skipped(self) -> None:
+        self.assertEqual(TransliterationUtils.build_synonyms(["stm32", "dms"]), {})
+
+    def test_keys_are_tokenized_like_meilisearch(self) -> None:
+        # "б" на латинской раскладке дает запятую, которую MeiliSearch отбросит
+        synonyms = TransliterationUtils.build_synonyms(["блок"])
+        self.assertIn("kjr", synonyms)
+        self.assertNotIn(",kjr", synonyms)
+
+
+class NormalizePartNumberTestCase(SimpleTestCase):
+    def test_separators_and_case_are_ignored(self) -> None:
+        self.assertEqual(TransliterationUtils.normalize_part_number("stm32-f103 c8t6"), "STM32F103C8T6")
+        self.assertEqual(TransliterationUtils.normalize_part_number("LM_317.T"), "LM317T")
+
+    def test_cyrillic_lookalikes_are_folded(self) -> None:
+        # "К" и "С" — кириллические
+        self.assertEqual(TransliterationUtils.normalize_part_number("К73-17 С"), "K7317C")
+
+    def test_empty(self) -> None:
+        self.assertEqual(TransliterationUtils.normalize_part_number(""), "")
+        self.assertEqual(TransliterationUtils.normalize_part_number(None), "")
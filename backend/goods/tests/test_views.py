@@ -0,0 +1,636 @@
+from datetime import date
+from decimal import Decimal
+import re
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from meilisearch.errors import MeilisearchCommunicationError
+from rest_framework.reverse import reverse
+
+from core.tests import BaseActionTestCase
+from customer.models import Company
+from goods import embeddings
+from goods.indexers import ProductIndexer
+from goods.models import Product, ProductIndexQueue
+from goods.tests.factories import (
+    BrandFactory,
+    ProductFactory,
+    ProductGroupFactory,
+    ProductSubgroupFactory,
+)
+from goods.views import ProductViewSet
+from sales.models import Invoice, InvoiceLine
+from user.models import User
+from user.tests.factories import UserFactory
+
+PRODUCTS_URL = reverse("product-list")
+
+
+def product_url(product_id: int) -> str:
+    return reverse("product-detail", args=[product_id])
+
+
+class ProductListPaginationTestCase(BaseActionTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.api_client.force_authenticate(self.user)
+
+    def test_page_number_mode(self) -> None:
+        ProductFactory.create_batch(3)
+        response = self.api_client.get(PRODUCTS_URL, {"page_size": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(response.data["total_pages"], 2)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_cursor_mode(self) -> None:
+        products = ProductFactory.create_batch(3)
+        expected_ids = sorted((product.id for product in products), reverse=True)
+
+        response = self.api_client.get(PRODUCTS_URL, {"pagination": "cursor", "page_size": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("count", response.data)
+        self.assertIsNone(response.data["previous"])
+        self.assertEqual([item["id"] for item in response.data["results"]], expected_ids[:2])
+
+        response = self.api_client.get(response.data["next"])
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data["next"])
+        self.assertEqual([item["id"] for item in response.data["results"]], expected_ids[2:])
+
+    def test_cursor_mode_with_count(self) -> None:
+        ProductFactory.create_batch(2)
+        response = self.api_client.get(PRODUCTS_URL, {"pagination": "cursor", "with_count": "true"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+
+
+class ProductObjectPermissionTestCase(BaseActionTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.product_manager = UserFactory(role=User.RoleChoices.PRODUCT_MANAGER)
+        self.brand_manager = UserFactory(role=User.RoleChoices.PRODUCT_MANAGER)
+        self.subgroup_manager = UserFactory(role=User.RoleChoices.PRODUCT_MANAGER)
+        self.product = ProductFactory(
+            product_manager=self.product_manager,
+            brand=BrandFactory(product_manager=self.brand_manager),
+            subgroup=ProductSubgroupFactory(product_manager=self.subgroup_manager),
+        )
+
+    def rename_as(self, user: User) -> int:
+        self.api_client.force_authenticate(user)
+        return self.api_client.patch(product_url(self.product.id), {"name": "NEW-NAME"}).status_code
+
+    def test_admin_can_edit_any_product(self) -> None:
+        self.assertEqual(self.rename_as(UserFactory(role=User.RoleChoices.ADMIN)), 200)
+
+    def test_product_manager_of_product_can_edit(self) -> None:
+        self.assertEqual(self.rename_as(self.product_manager), 200)
+
+    def test_brand_manager_can_edit_product_with_own_manager(self) -> None:
+        self.assertEqual(self.rename_as(self.brand_manager), 200)
+
+    def test_subgroup_manager_can_edit_product_with_own_manager(self) -> None:
+        self.assertEqual(self.rename_as(self.subgroup_manager), 200)
+
+    def test_other_product_manager_can_only_read(self) -> None:
+        other_manager = UserFactory(role=User.RoleChoices.PRODUCT_MANAGER)
+        self.assertEqual(self.rename_as(other_manager), 403)
+        self.assertEqual(self.api_client.get(product_url(self.product.id)).status_code, 200)
+
+    def test_sales_manager_and_user_can_only_read(self) -> None:
+        for role in (User.RoleChoices.SALES_MANAGER, User.RoleChoices.USER):
+            with self.subTest(role=role):
+                user = UserFactory(role=role)
+                self.assertEqual(self.rename_as(user), 403)
+                self.assertEqual(self.api_client.get(product_url(self.product.id)).status_code, 200)
+
+    def test_product_without_brand(self) -> None:
+        self.product.brand = None
+        self.product.save()
+        self.assertEqual(self.rename_as(self.subgroup_manager), 200)
+        self.assertEqual(self.rename_as(self.brand_manager), 403)
+
+
+class ProductBatchTestCase(BaseActionTestCase):
+    url = reverse("product-batch")
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.manager = UserFactory(role=User.RoleChoices.PRODUCT_MANAGER)
+        self.subgroup = ProductSubgroupFactory(product_manager=self.manager)
+        self.api_client.force_authenticate(self.manager)
+
+    def test_creates_and_updates(self) -> None:
+        product = ProductFactory(subgroup=self.subgroup, ext_id="EXT-1")
+        response = self.api_client.post(
+            self.url,
+            {"rows": [
+                {"name": "NEW-PART", "subgroup_id": self.subgroup.id},
+                {"ext_id": "EXT-1", "name": "RENAMED"},
+            ]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created_count"], 1)
+        self.assertEqual(response.data["updated_ids"], [product.id])
+        self.assertEqual(response.data["errors"], [])
+        product.refresh_from_db()
+        self.assertEqual(product.name, "RENAMED")
+        created = Product.objects.get(id=response.data["created_ids"][0])
+        self.assertEqual(created.effective_manager_id, self.manager.id)
+
+    def test_invalid_rows_are_reported(self) -> None:
+        response = self.api_client.post(
+            self.url,
+            {"rows": [
+                {"name": "NO-SUBGROUP"},
+                {"name": "BAD-SUBGROUP", "subgroup_id": 0},
+                {"id": 0, "name": "MISSING"},
+            ]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created_count"], 0)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [0, 1, 2])
+        self.assertIn("subgroup_id", response.data["errors"][0]["errors"])
+        self.assertIn("subgroup_id", response.data["errors"][1]["errors"])
+        self.assertIn("id", response.data["errors"][2]["errors"])
+
+    def test_empty_or_oversized_payload(self) -> None:
+        self.assertEqual(self.api_client.post(self.url, {"rows": []}, format="json").status_code, 400)
+        rows = [{"name": "X"}] * (ProductViewSet.BATCH_MAX_ROWS + 1)
+        self.assertEqual(self.api_client.post(self.url, {"rows": rows}, format="json").status_code, 400)
+
+    def test_other_managers_product_is_rejected(self) -> None:
+        other_product = ProductFactory(product_manager=UserFactory(role=User.RoleChoices.PRODUCT_MANAGER))
+        own_product = ProductFactory(subgroup=self.subgroup)
+        response = self.api_client.post(
+            self.url,
+            {"rows": [
+                {"id": other_product.id, "name": "HIJACKED"},
+                {"id": own_product.id, "name": "RENAMED"},
+            ]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated_ids"], [own_product.id])
+        self.assertEqual(response.data["errors"], [{"row": 0, "errors": {"id": ["Нет прав на изменение товара"]}}])
+        other_product.refresh_from_db()
+        self.assertNotEqual(other_product.name, "HIJACKED")
+
+    def test_admin_can_update_any_product(self) -> None:
+        product = ProductFactory(product_manager=UserFactory(role=User.RoleChoices.PRODUCT_MANAGER))
+        self.api_client.force_authenticate(UserFactory(role=User.RoleChoices.ADMIN))
+        response = self.api_client.post(self.url, {"rows": [{"id": product.id, "name": "RENAMED"}]}, format="json")
+        self.assertEqual(response.data["updated_ids"], [product.id])
+
+    def test_sales_manager_is_forbidden(self) -> None:
+        self.api_client.force_authenticate(UserFactory(role=User.RoleChoices.SALES_MANAGER))
+        response = self.api_client.post(
+            self.url, {"rows": [{"name": "X", "subgroup_id": self.subgroup.id}]}, format="json"
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class ProductBulkDeleteRestoreTestCase(BaseActionTestCase):
+    delete_url = reverse("product-bulk-delete")
+    restore_url = reverse("product-bulk-restore")
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.api_client.force_authenticate(UserFactory(role=User.RoleChoices.PRODUCT_MANAGER))
+        self.products = ProductFactory.create_batch(3)
+
+    def test_deletes_and_restores(self) -> None:
+        ids = [product.id for product in self.products[:2]]
+        response = self.api_client.delete(self.delete_url, {"ids": ids + [0]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["deleted_count"], 2)
+        self.assertEqual(response.data["skipped_count"], 1)
+        self.assertEqual(Product.objects.count(), 1)
+        unindexed = ProductIndexQueue.objects.filter(action=ProductIndexQueue.Action.UNINDEX)
+        self.assertEqual(set(unindexed.values_list("product_id", flat=True)), set(ids))
+
+        response = self.api_client.post(self.restore_url, {"ids": ids}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["restored_count"], 2)
+        self.assertEqual(Product.objects.count(), 3)
+
+    def test_product_in_invoice_is_protected(self) -> None:
+        protected, free = self.products[:2]
+        invoice = Invoice.objects.create(
+            invoice_number="INV-1",
+            invoice_date=date(2024, 1, 1),
+            company=Company.objects.create(name="ООО Тест"),
+        )
+        InvoiceLine.objects.create(invoice=invoice, product=protected, quantity=1, price=Decimal("1.00"))
+
+        response = self.api_client.delete(self.delete_url, {"ids": [protected.id, free.id]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["deleted_count"], 1)
+        self.assertEqual(response.data["protected_ids"], [protected.id])
+
+        response = self.api_client.delete(self.delete_url, {"ids": [protected.id]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["protected_ids"], [protected.id])
+
+    def test_nothing_to_do(self) -> None:
+        self.assertEqual(self.api_client.delete(self.delete_url, {"ids": []}, format="json").status_code, 400)
+        self.assertEqual(self.api_client.post(self.restore_url, {"ids": []}, format="json").status_code, 400)
+        # Не удаленный товар восстановить нельзя
+        response = self.api_client.post(self.restore_url, {"ids": [self.products[0].id]}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_sales_manager_is_forbidden(self) -> None:
+        self.api_client.force_authenticate(UserFactory(role=User.RoleChoices.SALES_MANAGER))
+        ids = [self.products[0].id]
+        self.assertEqual(self.api_client.delete(self.delete_url, {"ids": ids}, format="json").status_code, 403)
+        self.assertEqual(self.api_client.post(self.restore_url, {"ids": ids}, format="json").status_code, 403)
+
+
+class ProductLookupTestCase(BaseActionTestCase):
+    url = reverse("product-lookup")
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.api_client.force_authenticate(UserFactory(role=User.RoleChoices.SALES_MANAGER))
+
+    def test_matches_normalized_part_numbers(self) -> None:
+        brand = BrandFactory()
+        product = ProductFactory(name="KT-315A", brand=brand)
+        # Кириллические двойники, регистр и разделители не мешают совпадению
+        response = self.api_client.post(
+            self.url, {"part_numbers": ["kt 315a", "КТ315А", "UNKNOWN-1"]}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["found_count"], 2)
+        self.assertEqual(response.data["not_found"], ["UNKNOWN-1"])
+        first = response.data["results"][0]
+        self.assertEqual(first["key"], "KT315A")
+        self.assertEqual(
+            first["matches"],
+            [{"id": product.id, "name": "KT-315A", "brand_id": brand.id, "brand_name": brand.name}],
+        )
+
+    def test_soft_deleted_products_are_not_matched(self) -> None:
+        ProductFactory(name="BC547").delete()
+        response = self.api_client.post(self.url, {"part_numbers": ["BC547"]}, format="json")
+        self.assertEqual(response.data["not_found"], ["BC547"])
+
+    def test_invalid_payload(self) -> None:
+        self.assertEqual(self.api_client.post(self.url, {"part_numbers": []}, format="json").status_code, 400)
+        self.assertEqual(self.api_client.post(self.url, {"part_numbers": "BC547"}, format="json").status_code, 400)
+        too_many = ["X"] * (ProductViewSet.LOOKUP_MAX_ITEMS + 1)
+        self.assertEqual(self.api_client.post(self.url, {"part_numbers": too_many}, format="json").status_code, 400)
+
+    def test_requires_authentication(self) -> None:
+        self.api_client.logout()
+        response = self.api_client.post(self.url, {"part_numbers": ["BC547"]}, format="json")
+        self.assertIn(response.status_code, (401, 403))
+
+
+@patch.object(ProductIndexer, "meilisearch_client")
+class ProductSuggestTestCase(BaseActionTestCase):
+    url = reverse("product-suggest")
+
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.api_client.force_authenticate(self.user)
+
+    def test_returns_hits_and_brands(self, client: MagicMock) -> None:
+        brand = BrandFactory(name="Infineon")
+        BrandFactory(name="Texas Instruments")
+        hits = [{"id": 1, "name": "INF1", "brand_name": "Infineon"}]
+        client.return_value.index.return_value.search.return_value = {"hits": hits}
+
+        response = self.api_client.get(self.url, {"q": "inf"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"], hits)
+        self.assertEqual(response.data["brands"], [{"id": brand.id, "name": "Infineon"}])
+        search_params = client.return_value.index.return_value.search.call_args.args[1]
+        self.assertEqual(search_params["attributesToRetrieve"], ["id", "name", "brand_name"])
+
+    def test_repeated_query_is_cached(self, client: MagicMock) -> None:
+        client.return_value.index.return_value.search.return_value = {"hits": []}
+        self.api_client.get(self.url, {"q": "bc547"})
+        response = self.api_client.get(self.url, {"q": "BC547"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.return_value.index.return_value.search.call_count, 1)
+
+    def test_empty_query(self, client: MagicMock) -> None:
+        response = self.api_client.get(self.url, {"q": "  "})
+        self.assertEqual(response.data, {"results": [], "brands": [], "query": ""})
+        client.assert_not_called()
+
+    def test_search_error_returns_empty_result(self, client: MagicMock) -> None:
+        client.return_value.index.return_value.search.side_effect = Exception("unavailable")
+        response = self.api_client.get(self.url, {"q": "bc547"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"], [])
+        # Ошибка не кэшируется
+        client.return_value.index.return_value.search.side_effect = None
+        client.return_value.index.return_value.search.return_value = {"hits": [{"id": 1}]}
+        self.assertEqual(self.api_client.get(self.url, {"q": "bc547"}).data["results"], [{"id": 1}])
+
+
+class ProductParameterFilterTestCase(BaseActionTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.api_client.force_authenticate(self.user)
+        self.low_voltage = ProductFactory(tech_params={"Vds": "100V", "Корпус": "TO-220"})
+        self.high_voltage = ProductFactory(tech_params={"Vds": "0.65kV", "Корпус": "TO-247"})
+        self.resistor = ProductFactory(tech_params={"R": "4.7 кОм"})
+
+    def filtered_ids(self, *expressions: str) -> set:
+        response = self.api_client.get(PRODUCTS_URL, {"param": list(expressions)})
+        self.assertEqual(response.status_code, 200)
+        return {row["id"] for row in response.data["results"]}
+
+    def test_range_filter_in_base_units(self) -> None:
+        self.assertEqual(self.filtered_ids("Vds>=600V"), {self.high_voltage.id})
+        self.assertEqual(self.filtered_ids("Vds<1кВ"), {self.low_voltage.id, self.high_voltage.id})
+        self.assertEqual(self.filtered_ids("R>4kOhm"), {self.resistor.id})
+
+    def test_exact_and_combined_filters(self) -> None:
+        self.assertEqual(self.filtered_ids("Корпус=TO-220"), {self.low_voltage.id})
+        self.assertEqual(self.filtered_ids("Корпус=TO-247", "Vds<=100V"), set())
+
+    def test_updated_tech_params_are_reindexed(self) -> None:
+        self.low_voltage.tech_params = {"Vds": "800V"}
+        self.low_voltage.save()
+        self.assertEqual(self.filtered_ids("Vds>=600V"), {self.low_voltage.id, self.high_voltage.id})
+
+    def test_invalid_expression(self) -> None:
+        for expression in ("Vds", "Vds>=много"):
+            with self.subTest(expression=expression):
+                response = self.api_client.get(PRODUCTS_URL, {"param": expression})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("param", response.data)
+
+
+class CatalogTreeTestCase(BaseActionTestCase):
+    url = reverse("productgroup-tree")
+
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.api_client.force_authenticate(self.user)
+
+    def test_counts_products_by_group_subgroup_and_brand(self) -> None:
+        subgroup = ProductSubgroupFactory()
+        empty_subgroup = ProductSubgroupFactory(group=subgroup.group)
+        brand = BrandFactory()
+        ProductFactory.create_batch(2, subgroup=subgroup, brand=brand)
+        ProductFactory(subgroup=subgroup)
+        ProductFactory(subgroup=subgroup, brand=brand).delete()
+
+        response = self.api_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["product_count"], 3)
+        self.assertEqual(response.data["brands"], [{"id": brand.id, "name": brand.name, "product_count": 2}])
+        [group] = response.data["groups"]
+        self.assertEqual(group["product_count"], 3)
+        subgroups = {item["id"]: item for item in group["subgroups"]}
+        self.assertEqual(subgroups[subgroup.id]["product_count"], 3)
+        self.assertEqual(subgroups[subgroup.id]["brands"], [{"id": brand.id, "name": brand.name, "product_count": 2}])
+        self.assertEqual(subgroups[empty_subgroup.id]["product_count"], 0)
+
+    def test_groups_without_subgroups_are_listed(self) -> None:
+        subgroup = ProductSubgroupFactory(group__name="Активные компоненты")
+        ProductFactory(subgroup=subgroup)
+        empty_group = ProductGroupFactory(name="Пассивные компоненты")
+
+        groups = self.api_client.get(self.url).data["groups"]
+        self.assertEqual([group["id"] for group in groups], [subgroup.group_id, empty_group.id])
+        self.assertEqual(
+            groups[1], {"id": empty_group.id, "name": empty_group.name, "product_count": 0, "subgroups": []}
+        )
+        self.assertEqual(groups[0]["product_count"], 1)
+
+    def test_not_modified_until_catalog_changes(self) -> None:
+        subgroup = ProductSubgroupFactory()
+        response = self.api_client.get(self.url)
+        etag = response["ETag"]
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+
+        response = self.api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductFactory(subgroup=subgroup)
+        response = self.api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["product_count"], 1)
+
+    def test_requires_authentication(self) -> None:
+        self.api_client.logout()
+        self.assertIn(self.api_client.get(self.url).status_code, (401, 403))
+
+
+class ReferenceDataConditionalGetTestCase(BaseActionTestCase):
+    brands_url = reverse("brand-list")
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.api_client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.brand = BrandFactory()
+            ProductSubgroupFactory()
+
+    def test_validators_and_not_modified(self) -> None:
+        for name in ("brand-list", "productgroup-list", "productsubgroup-list"):
+            with self.subTest(name=name):
+                response = self.api_client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Cache-Control"], "private, no-cache")
+                self.assertIn("Last-Modified", response)
+
+                response = self.api_client.get(reverse(name), HTTP_IF_NONE_MATCH=response["ETag"])
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b"")
+
+    def test_if_modified_since(self) -> None:
+        last_modified = self.api_client.get(self.brands_url)["Last-Modified"]
+        response = self.api_client.get(self.brands_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_change_invalidates_etag(self) -> None:
+        etag = self.api_client.get(self.brands_url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.brand.name = "Renamed"
+            self.brand.save()
+        response = self.api_client.get(self.brands_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["name"], "Renamed")
+
+    def test_manager_change_invalidates_brands(self) -> None:
+        etag = self.api_client.get(self.brands_url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            # Вход пользователя меняет только last_login
+            self.user.save(update_fields=["last_login"])
+        self.assertEqual(self.api_client.get(self.brands_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = "Renamed"
+            self.user.save()
+        self.assertEqual(self.api_client.get(self.brands_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_query_params_are_separate_representations(self) -> None:
+        etag = self.api_client.get(self.brands_url)["ETag"]
+        response = self.api_client.get(self.brands_url, {"search": "zzz"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [])
+
+    def test_missing_object_is_not_cached(self) -> None:
+        response = self.api_client.get(reverse("brand-detail", args=[0]))
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn("ETag", response)
+
+
+class ProductSimilarTestCase(BaseActionTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.api_client.force_authenticate(self.user)
+        self.product = ProductFactory(name="IRFP460", tech_params={"Vds": "500V", "Id": "20A"})
+        self.analog = ProductFactory(name="IRFP460A", subgroup=self.product.subgroup, tech_params={"Vds": "500V"})
+        self.unrelated = ProductFactory(name="LM317", tech_params={"Vout": "1.25V"})
+
+    def similar_url(self, product_id: int) -> str:
+        return reverse("product-similar", args=[product_id])
+
+    def test_returns_ranked_neighbours(self) -> None:
+        embeddings.embed_products([self.product.id, self.analog.id, self.unrelated.id])
+        response = self.api_client.get(self.similar_url(self.product.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["product_id"], self.product.id)
+        results = response.data["results"]
+        self.assertEqual([row["id"] for row in results], [self.analog.id, self.unrelated.id])
+        self.assertEqual(results[0]["name"], "IRFP460A")
+        self.assertGreater(results[0]["similarity"], results[1]["similarity"])
+
+    @patch("goods.embeddings.schedule_product_embedding")
+    def test_product_without_vector_is_queued(self, schedule: MagicMock) -> None:
+        embeddings.embed_products([self.analog.id, self.unrelated.id])
+        response = self.api_client.get(self.similar_url(self.product.id))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"], [])
+        schedule.assert_called_once_with([self.product.id])
+
+    def test_limit_and_deleted_products(self) -> None:
+        embeddings.embed_products([self.product.id, self.analog.id, self.unrelated.id])
+        response = self.api_client.get(self.similar_url(self.product.id), {"limit": 1})
+        self.assertEqual([row["id"] for row in response.data["results"]], [self.analog.id])
+        # Некорректный limit заменяется значением по умолчанию
+        self.assertEqual(self.api_client.get(self.similar_url(self.product.id), {"limit": "x"}).status_code, 200)
+
+        Product.bulk_soft_delete([self.analog.id])
+        results = self.api_client.get(self.similar_url(self.product.id)).data["results"]
+        self.assertEqual([row["id"] for row in results], [self.unrelated.id])
+
+    def test_missing_product(self) -> None:
+        self.assertEqual(self.api_client.get(self.similar_url(0)).status_code, 404)
+
+
+class FakeSearchIndex:
+    """Индекс MeiliSearch в памяти: каждый вариант запроса находит одни и те же документы."""
+
+    def __init__(self, ids) -> None:
+        self.ids = ids
+
+    def search(self, variant, params):
+        id_filter = re.search(r"id IN \[([\d, ]*)\]", params.get("filter") or "")
+        if id_filter:
+            wanted = {int(pk) for pk in id_filter.group(1).split(",") if pk.strip()}
+            return {"hits": [{"id": pk} for pk in self.ids if pk in wanted], "processingTimeMs": 1}
+        page = self.ids[params["offset"]:params["offset"] + params["limit"]]
+        return {
+            "hits": [{"id": pk, "name": f"PART{pk}"} for pk in page],
+            "estimatedTotalHits": len(self.ids),
+            "processingTimeMs": 1,
+        }
+
+
+@patch("goods.views.Client")
+class ProductSearchTestCase(BaseActionTestCase):
+    url = reverse("product-search")
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.api_client.force_authenticate(self.user)
+
+    def test_cursor_pages_cover_results_without_duplicates(self, client: MagicMock) -> None:
+        client.return_value.index.return_value = FakeSearchIndex(list(range(1, 6)))
+        # Кириллический запрос дает несколько вариантов транслитерации с теми же документами
+        params = {"q": "стм", "limit": 2}
+        ids = []
+        response = self.api_client.get(self.url, params)
+        self.assertEqual(response.data["source"], "meilisearch")
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids += [hit["id"] for hit in response.data["results"]]
+            if not response.data["has_more"]:
+                break
+            response = self.api_client.get(self.url, {**params, "cursor": response.data["next_cursor"]})
+        self.assertEqual(ids, [1, 2, 3, 4, 5])
+
+    def test_invalid_cursor(self, client: MagicMock) -> None:
+        client.return_value.index.return_value = FakeSearchIndex(list(range(1, 6)))
+        response = self.api_client.get(self.url, {"q": "stm", "limit": 2})
+        cursor = response.data["next_cursor"]
+        self.assertEqual(self.api_client.get(self.url, {"q": "other", "cursor": cursor}).status_code, 400)
+        self.assertEqual(self.api_client.get(self.url, {"q": "stm", "cursor": "garbage"}).status_code, 400)
+
+    def test_cursor_is_bound_to_filters(self, client: MagicMock) -> None:
+        client.return_value.index.return_value = FakeSearchIndex(list(range(1, 6)))
+        params = {"q": "stm", "limit": 2, "brand_id": 7}
+        cursor = self.api_client.get(self.url, params).data["next_cursor"]
+
+        self.assertEqual(self.api_client.get(self.url, {**params, "cursor": cursor}).status_code, 200)
+        for changed in ({"brand_id": 8}, {"group_id": 1}, {"brand_id": ""}):
+            response = self.api_client.get(self.url, {**params, **changed, "cursor": cursor})
+            self.assertEqual(response.status_code, 400, changed)
+
+    def test_invalid_paging_parameters(self, client: MagicMock) -> None:
+        client.return_value.index.return_value = FakeSearchIndex(list(range(1, 300)))
+        for params in ({"limit": "abc"}, {"offset": "x"}, {"offset": -1}, {"brand_id": "1 OR id > 0"}):
+            response = self.api_client.get(self.url, {"q": "stm", **params})
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn("error", response.data)
+
+        # limit приводится к диапазону 1..SEARCH_MAX_LIMIT
+        response = self.api_client.get(self.url, {"q": "stm", "limit": 0})
+        self.assertEqual([hit["id"] for hit in response.data["results"]], [1])
+        next_page = self.api_client.get(self.url, {"q": "stm", "limit": 0, "cursor": response.data["next_cursor"]})
+        self.assertEqual([hit["id"] for hit in next_page.data["results"]], [2])
+        response = self.api_client.get(self.url, {"q": "stm", "limit": 1000})
+        self.assertEqual(len(response.data["results"]), ProductViewSet.SEARCH_MAX_LIMIT)
+
+    def test_debug_timings(self, client: MagicMock) -> None:
+        client.return_value.index.return_value = FakeSearchIndex([1])
+        response = self.api_client.get(self.url, {"q": "stm", "debug": "1"})
+        self.assertEqual(response.data["debug"]["source"], "meilisearch")
+        self.assertTrue(all("wall_ms" in variant for variant in response.data["debug"]["variants"]))
+        self.assertNotIn("debug", self.api_client.get(self.url, {"q": "stm"}).data)
+
+    def test_database_fallback(self, client: MagicMock) -> None:
+        client.return_value.index.return_value.search.side_effect = MeilisearchCommunicationError("down")
+        product = ProductFactory(name="STM32F103")
+        ProductFactory(name="LM317")
+        response = self.api_client.get(self.url, {"q": "stm32", "debug": "1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["source"], "database")
+        self.assertEqual([hit["id"] for hit in response.data["results"]], [product.id])
+        self.assertEqual(response.data["total"], 1)
+        self.assertIsNone(response.data["next_cursor"])
+        self.assertEqual(response.data["debug"]["source"], "database")
+
+    def test_unexpected_error(self, client: MagicMock) -> None:
+        client.return_value.index.return_value.search.side_effect = RuntimeError("boom")
+        self.assertEqual(self.api_client.get(self.url, {"q": "stm"}).status_code, 500)
+
+    def test_empty_query(self, client: MagicMock) -> None:
+        self.assertEqual(self.api_client.get(self.url).data, {"results": [], "total": 0, "query": ""})
+        client.assert_not_called()
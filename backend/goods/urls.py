@@ -1,12 +1,19 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet, BrandViewSet, ProductSubgroupViewSet, ProductGroupViewSet
+from .views import (
+    BrandViewSet,
+    CatalogChangesViewSet,
+    ProductGroupViewSet,
+    ProductSubgroupViewSet,
+    ProductViewSet,
+)
 
 router = DefaultRouter()
 router.register(r'products', ProductViewSet)
 router.register(r'brands', BrandViewSet)
 router.register(r'subgroups', ProductSubgroupViewSet)
 router.register(r'groups', ProductGroupViewSet)
+router.register(r'changes', CatalogChangesViewSet, basename='catalog-changes')
 
 urlpatterns = [
     path('', include(router.urls)),
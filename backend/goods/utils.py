@@ -41,6 +41,12 @@ class TransliterationUtils:
     # Обратная семантическая карта
     EN_TO_RU_SEMANTIC = {v: k for k, v in RU_TO_EN_SEMANTIC.items() if v}
     
+    # Кириллические буквы, визуально совпадающие с латинскими (для part number)
+    CYRILLIC_LOOKALIKES = {
+        'А': 'A', 'В': 'B', 'Е': 'E', 'Ё': 'E', 'К': 'K', 'М': 'M', 'Н': 'H',
+        'О': 'O', 'Р': 'P', 'С': 'C', 'Т': 'T', 'У': 'Y', 'Х': 'X',
+    }
+    
     @classmethod
     def is_cyrillic(cls, text: str) -> bool:
         """Проверяет, содержит ли текст кириллические символы"""
@@ -150,6 +156,55 @@ class TransliterationUtils:
                 all_variants.extend(cls.get_transliterated_variants(str(text), smart_filter=False))
         
         return ' '.join(all_variants)
+    
+    @classmethod
+    def normalize_part_number(cls, text: str) -> str:
+        """
+        Приводит part number к ключу для точного поиска:
+        верхний регистр, кириллические двойники -> латиница,
+        без пробелов, дефисов и прочих разделителей
+        """
+        if not text:
+            return ''
+        folded = ''.join(cls.CYRILLIC_LOOKALIKES.get(char, char) for char in str(text).upper())
+        return re.sub(r'[\W_]+', '', folded)
+    
+    @classmethod
+    def tokenize(cls, text: str) -> list:
+        """Разбивает текст на слова так же, как это делает токенизатор MeiliSearch"""
+        if not text:
+            return []
+        return re.findall(r'\w+', str(text).lower())
+    
+    @classmethod
+    def build_synonyms(cls, tokens) -> dict:
+        """
+        Строит словарь синонимов MeiliSearch для компактного режима индексации
+        
+        Варианты строятся один раз на каждый уникальный токен. Нужны только
+        токены с кириллицей: кириллические варианты латинских слов покрываются
+        на стороне запроса в prepare_search_query.
+        
+        Returns:
+            dict: {вариант написания: [канонический токен, ...]}
+        """
+        synonyms = {}
+        
+        for token in tokens:
+            if not token or not cls.is_cyrillic(token):
+                continue
+            
+            for variant in cls.get_transliterated_variants(token, smart_filter=False):
+                # Ключ синонима должен совпадать с тем, как MeiliSearch разобьет запрос
+                key = ' '.join(cls.tokenize(variant))
+                if not key or key == token:
+                    continue
+                
+                canonical = synonyms.setdefault(key, [])
+                if token not in canonical:
+                    canonical.append(token)
+        
+        return synonyms
 
 
 def prepare_search_query(query: str) -> dict:
@@ -1,13 +1,49 @@
+import hashlib
+import logging
+
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
-from django.db.models import Q
+from django.db.models import F, Q
 from django.shortcuts import get_object_or_404
 from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
 from meilisearch import Client
-from .utils import prepare_search_query
-from .models import Product, Brand, ProductSubgroup, ProductGroup
+from meilisearch.errors import (
+    MeilisearchApiError,
+    MeilisearchCommunicationError,
+    MeilisearchTimeoutError,
+)
+from core.mixins import ConditionalGetMixin
+from core.pagination import CursorModePaginationMixin, EstimatedCountPaginator
+from .batch import upsert_products
+from .catalog import get_catalog_tree
+from .changes import fetch_changes
+from .embeddings import find_similar_products
+from .indexers import ProductIndexer
+from .parameters import filter_products_by_parameters
+from .search import (
+    MergedSearchPager,
+    SearchTimings,
+    build_search_hit,
+    decode_search_cursor,
+    encode_search_cursor,
+    filter_products_by_search,
+    rank_products_by_similarity,
+)
+from .utils import TransliterationUtils, prepare_search_query
+from .models import (
+    BRANDS_RESOURCE,
+    GROUPS_RESOURCE,
+    SUBGROUPS_RESOURCE,
+    Brand,
+    Product,
+    ProductGroup,
+    ProductSubgroup,
+)
 from .permissions import ProductPermission, BrandPermission, ProductGroupPermission
 from .serializers import (
     ProductSerializer, 
@@ -15,18 +51,26 @@ from .serializers import (
     ProductUpdateSerializer,
     BrandSerializer,
     ProductSubgroupSerializer,
-    ProductGroupSerializer
+    ProductGroupSerializer,
+    product_list_values,
+    serialize_product_rows,
 )
 
+logger = logging.getLogger(__name__)
 
-class ProductPageNumberPagination(PageNumberPagination):
+
+class ProductPageNumberPagination(CursorModePaginationMixin, PageNumberPagination):
     page_size = 50  # 50 товаров на страницу для оптимальной производительности
     page_size_query_param = 'page_size'
     max_page_size = 200  # Максимум 200 товаров на страницу
+    django_paginator_class = EstimatedCountPaginator  # Без COUNT(*) на больших выборках
     
     def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
         return Response({
             'count': self.page.paginator.count,
+            'count_is_estimated': self.page.paginator.count_is_estimated,
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
             'page': self.page.number,
@@ -37,10 +81,27 @@ class ProductPageNumberPagination(PageNumberPagination):
 
 
 class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.select_related('subgroup', 'brand', 'product_manager').filter(deleted_at__isnull=True)
+    queryset = Product.objects.select_related(
+        'subgroup', 'brand', 'product_manager', 'effective_manager'
+    ).filter(deleted_at__isnull=True)
     permission_classes = [ProductPermission]
     pagination_class = ProductPageNumberPagination
     ordering = ['-id']  # Стабильная сортировка (сначала новые товары по ID)
+    SUGGEST_LIMIT = 10
+    SUGGEST_BRANDS_LIMIT = 5
+    LOOKUP_MAX_ITEMS = 5000
+    BATCH_MAX_ROWS = 5000
+    SIMILAR_LIMIT = 10
+    SIMILAR_MAX_LIMIT = 50
+    SEARCH_LIMIT = 50
+    SEARCH_MAX_LIMIT = 200
+    # Параметр запроса -> атрибут фильтра в индексе MeiliSearch
+    SEARCH_FILTERS = {
+        'brand_id': 'brand_id',
+        'subgroup_id': 'subgroup_id',
+        'manager_id': 'product_manager_id',
+        'group_id': 'group_id',
+    }
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -52,14 +113,10 @@ class ProductViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = super().get_queryset()
         
-        # Поиск по названию
+        # Поиск по названию, бренду и подгруппе (триграммные индексы)
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(brand__name__icontains=search) |
-                Q(subgroup__name__icontains=search)
-            )
+            queryset = filter_products_by_search(queryset, search)
         
         # Фильтрация по бренду
         brand_id = self.request.query_params.get('brand_id', None)
@@ -71,16 +128,32 @@ class ProductViewSet(viewsets.ModelViewSet):
         if subgroup_id:
             queryset = queryset.filter(subgroup_id=subgroup_id)
         
-        # Фильтрация по менеджеру
+        # Фильтрация по итоговому менеджеру товара (индекс по effective_manager)
         manager_id = self.request.query_params.get('manager_id', None)
         if manager_id:
-            queryset = queryset.filter(
-                Q(product_manager_id=manager_id) |
-                Q(brand__product_manager_id=manager_id) |
-                Q(subgroup__product_manager_id=manager_id)
-            )
+            queryset = queryset.filter(effective_manager_id=manager_id)
+        
+        # Параметрический фильтр: ?param=Vds>=600V&param=Корпус=TO-247
+        parameter_filters = self.request.query_params.getlist('param')
+        if parameter_filters:
+            try:
+                queryset = filter_products_by_parameters(queryset, parameter_filters)
+            except ValueError as e:
+                raise ValidationError({'param': [str(e)]})
         
-        return queryset.distinct().order_by(*self.ordering)
+        return queryset.order_by(*self.ordering)
+    
+    def list(self, request, *args, **kwargs):
+        """
+        Список товаров без ModelSerializer: страница выбирается через values()
+        и собирается в тот же JSON, что отдает ProductSerializer
+        """
+        queryset = product_list_values(self.filter_queryset(self.get_queryset()))
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize_product_rows(page))
+        return Response(serialize_product_rows(queryset))
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -123,7 +196,7 @@ class ProductViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['delete'])
     def bulk_delete(self, request):
-        """Массовое удаление товаров"""
+        """Массовое мягкое удаление товаров одним UPDATE"""
         ids = request.data.get('ids', [])
         if not ids:
             return Response(
@@ -131,25 +204,187 @@ class ProductViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Получаем товары для мягкого удаления (только не удаленные)
-        products_to_delete = Product.objects.filter(id__in=ids, deleted_at__isnull=True)
-        deleted_count = products_to_delete.count()
+        result = Product.bulk_soft_delete(ids)
+        deleted_count = len(result['deleted'])
+        protected_ids = result['protected']
+        skipped_count = len(set(ids)) - deleted_count - len(protected_ids)
+        logger.info(
+            f"Пользователь {request.user.id} удалил {deleted_count} товаров из {len(ids)} запрошенных "
+            f"(пропущено {skipped_count}, защищено ссылками {len(protected_ids)})"
+        )
         
         if deleted_count == 0:
             return Response(
-                {'error': 'Товары уже удалены или не найдены'}, 
+                {
+                    'error': 'Товары уже удалены, не найдены или используются в счетах',
+                    'protected_ids': protected_ids,
+                }, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Выполняем мягкое удаление
-        for product in products_to_delete:
-            product.delete()
-        
         return Response({
             'message': f'Успешно удалено {deleted_count} товаров',
-            'deleted_count': deleted_count
+            'deleted_count': deleted_count,
+            'skipped_count': skipped_count,
+            'protected_ids': protected_ids,
+        })
+    
+    @action(detail=False, methods=['post'])
+    def bulk_restore(self, request):
+        """Массовое восстановление мягко удаленных товаров одним UPDATE"""
+        ids = request.data.get('ids', [])
+        if not ids:
+            return Response(
+                {'error': 'Не переданы ID товаров для восстановления'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        restored_ids = Product.bulk_restore(ids)
+        logger.info(
+            f"Пользователь {request.user.id} восстановил {len(restored_ids)} товаров из {len(ids)} запрошенных"
+        )
+        
+        if not restored_ids:
+            return Response(
+                {'error': 'Удаленные товары с такими ID не найдены'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response({
+            'message': f'Успешно восстановлено {len(restored_ids)} товаров',
+            'restored_count': len(restored_ids),
+            'skipped_count': len(set(ids)) - len(restored_ids),
+        })
+    
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Пакетное создание и обновление товаров (загрузка из таблицы).
+        Строка с id или ext_id существующего товара обновляет его, иначе создается новый товар.
+        """
+        rows = request.data.get('rows', [])
+        if not isinstance(rows, list) or not rows:
+            return Response(
+                {'error': 'Не передан список rows'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(rows) > self.BATCH_MAX_ROWS:
+            return Response(
+                {'error': f'Можно передать не более {self.BATCH_MAX_ROWS} строк'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        result = upsert_products(rows, user=request.user)
+        return Response({
+            'created_count': len(result['created']),
+            'updated_count': len(result['updated']),
+            'created_ids': result['created'],
+            'updated_ids': result['updated'],
+            'errors': result['errors'],
+        })
+    
+    @action(detail=False, methods=['post'])
+    def lookup(self, request):
+        """Пакетный поиск товаров по списку part number (например, вставка BOM)"""
+        part_numbers = request.data.get('part_numbers', [])
+        if not isinstance(part_numbers, list) or not part_numbers:
+            return Response(
+                {'error': 'Не передан список part_numbers'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(part_numbers) > self.LOOKUP_MAX_ITEMS:
+            return Response(
+                {'error': f'Можно передать не более {self.LOOKUP_MAX_ITEMS} позиций'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        raw_values = [str(value) for value in part_numbers]
+        keys = [TransliterationUtils.normalize_part_number(value) for value in raw_values]
+        
+        # Один запрос по B-tree индексу part_number_key для всего списка
+        matches_by_key = {}
+        products = Product.objects.filter(
+            part_number_key__in={key for key in keys if key}
+        ).values('id', 'name', 'part_number_key', 'brand_id', brand_name=F('brand__name'))
+        for product in products:
+            matches_by_key.setdefault(product.pop('part_number_key'), []).append(product)
+        
+        results = []
+        not_found = []
+        for raw, key in zip(raw_values, keys):
+            matches = matches_by_key.get(key, [])
+            if not matches:
+                not_found.append(raw)
+            results.append({'query': raw, 'key': key, 'matches': matches})
+        
+        return Response({
+            'results': results,
+            'found_count': len(results) - len(not_found),
+            'not_found': not_found,
         })
     
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """Похожие товары (аналоги) по векторной близости: ?limit=10"""
+        product = self.get_object()
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.SIMILAR_LIMIT)), 1), self.SIMILAR_MAX_LIMIT)
+        except ValueError:
+            limit = self.SIMILAR_LIMIT
+        
+        neighbours = find_similar_products(product.pk, limit)
+        similarity = dict(neighbours)
+        rows = {
+            row['id']: row
+            for row in serialize_product_rows(
+                product_list_values(self.get_queryset().filter(id__in=similarity))
+            )
+        }
+        results = [
+            {**rows[product_id], 'similarity': round(similarity[product_id], 4)}
+            for product_id, _similarity in neighbours
+            if product_id in rows
+        ]
+        return Response({'product_id': product.pk, 'results': results})
+    
+    @action(detail=False, methods=['get'])
+    def suggest(self, request):
+        """Быстрые подсказки для автодополнения: только id, название и бренд"""
+        query = request.query_params.get('q', '').strip()
+
+        if not query:
+            return Response({'results': [], 'brands': [], 'query': query})
+
+        cache_key = 'goods:suggest:' + hashlib.md5(query.lower().encode()).hexdigest()
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return Response(cached)
+
+        try:
+            # Один запрос с урезанным набором полей: без подсветки и tech_params
+            response = ProductIndexer.meilisearch_client().index(ProductIndexer.index_name()).search(query, {
+                'limit': self.SUGGEST_LIMIT,
+                'attributesToRetrieve': ['id', 'name', 'brand_name'],
+                'attributesToSearchOn': ['name', 'brand_name', 'transliterated_search', 'transliterated_brand'],
+            })
+        except Exception as e:
+            logger.warning(f"Ошибка подсказок для запроса '{query}': {e}")
+            return Response({'results': [], 'brands': [], 'query': query})
+
+        brands = list(
+            Brand.objects.filter(name__istartswith=query)
+            .order_by('name')
+            .values('id', 'name')[:self.SUGGEST_BRANDS_LIMIT]
+        )
+
+        data = {
+            'results': response['hits'],
+            'brands': brands,
+            'query': query,
+        }
+        cache.set(cache_key, data, settings.GOODS_SUGGEST_CACHE_TTL)
+        return Response(data)
+
     @action(detail=False, methods=['get'])
     def search(self, request):
         """Поиск товаров через MeiliSearch с приоритизированной транслитерацией"""
@@ -158,46 +393,45 @@ class ProductViewSet(viewsets.ModelViewSet):
         if not query:
             return Response({'results': [], 'total': 0, 'query': query})
         
+        # ?debug=1 добавляет в ответ тайминги по вариантам
+        debug = request.query_params.get('debug') in ('1', 'true')
+        timings = SearchTimings()
+        
+        # Параметры поиска: cursor из предыдущего ответа, offset — для совместимости
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.SEARCH_LIMIT)), 1), self.SEARCH_MAX_LIMIT)
+            offset = int(request.query_params.get('offset', 0))
+            search_filters = {
+                param: int(request.query_params[param])
+                for param in self.SEARCH_FILTERS
+                if request.query_params.get(param)
+            }
+        except ValueError:
+            return Response(
+                {'error': 'Параметры limit, offset и фильтры по id должны быть целыми числами'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if offset < 0:
+            return Response(
+                {'error': 'offset не может быть отрицательным'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        cursor = request.query_params.get('cursor')
+        
         try:
             # Подключаемся к MeiliSearch
             client = Client(settings.MEILISEARCH_HOST, settings.MEILISEARCH_API_KEY)
+            index = client.index('products')
             
-            # Подготавливаем запрос с приоритизированными вариантами транслитерации
-            search_data = prepare_search_query(query)
-            
-            # Строим фильтры для поиска
-            filters = []
-            
-            # Фильтр по бренду
-            brand_id = request.query_params.get('brand_id')
-            if brand_id:
-                filters.append(f'brand_id = {brand_id}')
-            
-            # Фильтр по подгруппе
-            subgroup_id = request.query_params.get('subgroup_id')
-            if subgroup_id:
-                filters.append(f'subgroup_id = {subgroup_id}')
-            
-            # Фильтр по менеджеру
-            manager_id = request.query_params.get('manager_id')
-            if manager_id:
-                filters.append(f'product_manager_id = {manager_id}')
-            
-            # Фильтр по группе
-            group_id = request.query_params.get('group_id')
-            if group_id:
-                filters.append(f'group_id = {group_id}')
-            
-            # Объединяем фильтры
+            # Фильтры по бренду, подгруппе, менеджеру и группе
+            filters = [
+                f'{attribute} = {search_filters[param]}'
+                for param, attribute in self.SEARCH_FILTERS.items()
+                if param in search_filters
+            ]
             filter_str = ' AND '.join(filters) if filters else None
             
-            # Параметры поиска
-            limit = int(request.query_params.get('limit', 50))
-            offset = int(request.query_params.get('offset', 0))
-            
             base_search_params = {
-                'limit': limit * 2,  # Увеличиваем лимит для фильтрации дубликатов
-                'offset': 0,  # Начинаем с начала для каждого запроса
                 'attributesToHighlight': ['name', 'brand_name', 'subgroup_name'],
                 'highlightPreTag': '<mark>',
                 'highlightPostTag': '</mark>',
@@ -206,84 +440,137 @@ class ProductViewSet(viewsets.ModelViewSet):
             if filter_str:
                 base_search_params['filter'] = filter_str
             
-            # Выполняем приоритизированный поиск
-            all_results = []
-            seen_ids = set()
-            
-            # Этап 1: Поиск по приоритетным вариантам (оригинал + семантическая транслитерация)
-            priority_results = []
-            for search_variant in search_data['priority_variants']:
-                if search_variant.strip():
-                    try:
-                        variant_results = client.index('products').search(search_variant, base_search_params)
-                        
-                        for hit in variant_results['hits']:
-                            if hit['id'] not in seen_ids:
-                                # Отмечаем как приоритетный результат
-                                hit['_search_priority'] = 'high'
-                                hit['_search_variant'] = search_variant
-                                priority_results.append(hit)
-                                seen_ids.add(hit['id'])
-                    except Exception as variant_error:
-                        print(f"Ошибка поиска для приоритетного варианта '{search_variant}': {variant_error}")
-                        continue
+            pager = MergedSearchPager(
+                index,
+                base_search_params,
+                timings,
+                ProductIndexer.SETTINGS['pagination']['maxTotalHits'],
+            )
             
-            # Если приоритетных результатов достаточно, используем только их
-            if len(priority_results) >= limit:
-                all_results = priority_results
+            if cursor:
+                # Продолжение выдачи: варианты и позиция зафиксированы в курсоре
+                try:
+                    state = decode_search_cursor(cursor)
+                except ValueError as e:
+                    return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+                if state['q'] != query or state.get('f', {}) != search_filters:
+                    return Response(
+                        {'error': 'Курсор относится к другому запросу или другим фильтрам'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                
+                variants = state['v']
+                pager.estimated_total = state.get('t', 0)
+                page_hits, position, variant_offset = pager.fetch(variants, state['i'], state['o'], limit)
+                exhausted_total = None
             else:
-                # Этап 2: Дополняем запасными вариантами (раскладка клавиатуры)
-                all_results = priority_results.copy()
+                # Подготавливаем запрос с приоритизированными вариантами транслитерации
+                search_data = prepare_search_query(query)
+                variants = [[v, 'priority'] for v in search_data['priority_variants'] if v.strip()]
+                fallback_variants = [[v, 'fallback'] for v in search_data['fallback_variants'] if v.strip()]
                 
-                for search_variant in search_data['fallback_variants']:
-                    if search_variant.strip() and len(all_results) < limit * 2:
-                        try:
-                            variant_results = client.index('products').search(search_variant, base_search_params)
-                            
-                            for hit in variant_results['hits']:
-                                if hit['id'] not in seen_ids:
-                                    # Отмечаем как запасной результат
-                                    hit['_search_priority'] = 'low'
-                                    hit['_search_variant'] = search_variant
-                                    all_results.append(hit)
-                                    seen_ids.add(hit['id'])
-                        except Exception as variant_error:
-                            print(f"Ошибка поиска для запасного варианта '{search_variant}': {variant_error}")
-                            continue
-            
-            # Сортируем результаты: сначала приоритетные, потом запасные
-            # В пределах группы сохраняем сортировку MeiliSearch по релевантности
-            priority_results = [r for r in all_results if r.get('_search_priority') == 'high']
-            fallback_results = [r for r in all_results if r.get('_search_priority') == 'low']
-            
-            final_results = priority_results + fallback_results
+                # offset оставлен для совместимости: пропущенные документы тоже приходится выбрать
+                wanted = offset + limit
+                hits, position, variant_offset = pager.fetch(variants, 0, 0, wanted)
+                
+                # Запасные варианты (раскладка клавиатуры) подключаются,
+                # только если приоритетным не хватило документов на страницу
+                if len(hits) < wanted and fallback_variants:
+                    variants = variants + fallback_variants
+                    more_hits, position, variant_offset = pager.fetch(
+                        variants, position, variant_offset, wanted - len(hits)
+                    )
+                    hits += more_hits
+                
+                page_hits = hits[offset:]
+                exhausted_total = len(hits) if position >= len(variants) else None
             
-            # Применяем пагинацию
-            paginated_results = final_results[offset:offset + limit]
+            has_more = position < len(variants)
+            next_cursor = None
+            if has_more:
+                next_cursor = encode_search_cursor({
+                    'q': query,
+                    'f': search_filters,
+                    'v': variants,
+                    'i': position,
+                    'o': variant_offset,
+                    't': pager.estimated_total,
+                })
             
-            # Убираем служебные поля перед отправкой
-            for result in paginated_results:
-                result.pop('_search_priority', None)
-                result.pop('_search_variant', None)
+            priority_count = 0
+            for hit in page_hits:
+                if hit.pop('_search_priority', None) == 'high':
+                    priority_count += 1
+                hit.pop('_search_variant', None)
             
-            return Response({
-                'results': paginated_results,
-                'total': len(final_results),
+            debug_info = timings.finish('meilisearch')
+            data = {
+                'results': page_hits,
+                # Точное число, если выдача исчерпана на первой странице, иначе оценка MeiliSearch
+                'total': exhausted_total if exhausted_total is not None else pager.estimated_total,
                 'query': query,
-                'search_variants': search_data['all_variants'],  # Для отладки
-                'priority_count': len(priority_results),  # Для отладки
-                'fallback_count': len(fallback_results),  # Для отладки
-                'processing_time': 0  # Приблизительное время
-            })
+                'search_variants': [variant for variant, _stage in variants],  # Для отладки
+                'priority_count': priority_count,  # Для отладки
+                'fallback_count': len(page_hits) - priority_count,  # Для отладки
+                'processing_time': debug_info['total_ms'],  # Полное время обработки, мс
+                'source': 'meilisearch',
+                'next_cursor': next_cursor,
+                'has_more': has_more,
+            }
+            if debug:
+                data['debug'] = debug_info
+            return Response(data)
             
+        except (MeilisearchCommunicationError, MeilisearchTimeoutError, MeilisearchApiError) as e:
+            # Нет связи с MeiliSearch или индекс не готов — ищем в базе
+            logger.warning(f"MeiliSearch недоступен, ищем '{query}' в базе данных: {e}")
+            return self._search_in_database(request, query, limit, offset, timings, debug)
         except Exception as e:
+            logger.exception(f"Ошибка поиска товаров по запросу '{query}'")
             return Response(
                 {'error': f'Ошибка поиска: {str(e)}'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    def _search_in_database(self, request, query, limit, offset, timings, debug=False):
+        """Запасной поиск по PostgreSQL (pg_trgm), когда MeiliSearch недоступен"""
+        queryset = filter_products_by_search(self.get_queryset(), query)
+        
+        group_id = request.query_params.get('group_id')
+        if group_id:
+            queryset = queryset.filter(subgroup__group_id=group_id)
+        
+        queryset = rank_products_by_similarity(
+            queryset.select_related(
+                'subgroup__group',
+                'effective_manager',
+            ),
+            query,
+        )
+        results = [build_search_hit(product) for product in queryset[offset:offset + limit]]
+        total = queryset.count()
+        
+        debug_info = timings.finish('database')
+        data = {
+            'results': results,
+            'total': total,
+            'query': query,
+            'search_variants': [query],
+            'priority_count': len(results),
+            'fallback_count': 0,
+            'processing_time': debug_info['total_ms'],
+            'source': 'database',
+            # Курсоры MeiliSearch к базе неприменимы, листать можно через offset
+            'next_cursor': None,
+            'has_more': offset + len(results) < total,
+        }
+        if debug:
+            data['debug'] = debug_info
+        return Response(data)
 
 
-class BrandViewSet(viewsets.ModelViewSet):
+class BrandViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    version_resource = BRANDS_RESOURCE
     queryset = Brand.objects.select_related('product_manager').all()
     serializer_class = BrandSerializer
     permission_classes = [BrandPermission]
@@ -300,7 +587,8 @@ class BrandViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class ProductSubgroupViewSet(viewsets.ModelViewSet):
+class ProductSubgroupViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    version_resource = SUBGROUPS_RESOURCE
     queryset = ProductSubgroup.objects.select_related('group', 'product_manager').all()
     serializer_class = ProductSubgroupSerializer
     permission_classes = [ProductGroupPermission]
@@ -325,7 +613,8 @@ class ProductSubgroupViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class ProductGroupViewSet(viewsets.ModelViewSet):
+class ProductGroupViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    version_resource = GROUPS_RESOURCE
     queryset = ProductGroup.objects.all()
     serializer_class = ProductGroupSerializer
     permission_classes = [ProductGroupPermission]
@@ -339,4 +628,47 @@ class ProductGroupViewSet(viewsets.ModelViewSet):
         if search:
             queryset = queryset.filter(name__icontains=search)
         
-        return queryset 
\ No newline at end of file
+        return queryset
+    
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        """
+        Дерево каталога для навигации: группы, подгруппы и бренды с количеством товаров.
+        Поддерживает If-None-Match: при неизменном дереве отвечает 304 без тела.
+        """
+        etag, tree = get_catalog_tree()
+        not_modified = get_conditional_response(request._request, etag=etag)
+        response = not_modified if not_modified is not None else Response(tree)
+        response['ETag'] = etag
+        # Клиент может хранить ответ, но перед использованием обязан переспросить сервер
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class CatalogChangesViewSet(viewsets.ViewSet):
+    """
+    Лента изменений каталога для инкрементальной синхронизации:
+    GET /changes/?since=<номер>&limit=<размер пачки>.
+    Клиент повторяет запрос с next_since, пока has_more = true.
+    Номера изменениям назначает периодическая задача, запрос только читает.
+    """
+    permission_classes = [ProductGroupPermission]
+    DEFAULT_LIMIT = 1000
+    MAX_LIMIT = 5000
+    
+    def list(self, request):
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = min(int(request.query_params.get('limit', self.DEFAULT_LIMIT)), self.MAX_LIMIT)
+        except ValueError:
+            return Response(
+                {'error': 'Параметры since и limit должны быть целыми числами'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if since < 0 or limit < 1:
+            return Response(
+                {'error': 'since не может быть отрицательным, limit должен быть больше нуля'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(fetch_changes(since, limit))
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from django.db.models import Q
 
+from core.pagination import CursorModePaginationMixin
 from .models import Person
 from .serializers import (
     PersonListSerializer, PersonDetailSerializer,
@@ -12,7 +13,7 @@ from .serializers import (
 from .permissions import PersonPermission
 
 
-class PersonPagination(PageNumberPagination):
+class PersonPagination(CursorModePaginationMixin, PageNumberPagination):
     page_size = 50
     page_size_query_param = 'page_size'
     max_page_size = 200
@@ -1,8 +1,14 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
 from core.mixins import ExtIdMixin
+from core.models import ResourceVersion
+
+# Версия справочника валют (core.ResourceVersion) для условного GET
+CURRENCIES_RESOURCE = 'rfq.currencies'
 
 
 def rfq_file_upload_path(instance, filename):
@@ -615,4 +621,11 @@ class QuotationItem(ExtIdMixin, models.Model):
     @property
     def markup_amount(self):
         """Сумма наценки"""
-        return self.total_price - self.total_cost_price 
\ No newline at end of file
+        return self.total_price - self.total_cost_price 
+
+
+@receiver(post_save, sender=Currency)
+@receiver(post_delete, sender=Currency)
+def bump_currencies_version(sender, instance, **kwargs):
+    """Увеличиваем версию справочника валют при изменении валюты."""
+    ResourceVersion.bump(CURRENCIES_RESOURCE)
@@ -139,7 +139,7 @@ class RFQItemDetailSerializer(serializers.ModelSerializer):
                 'ext_id': obj.product.ext_id,
                 'subgroup': obj.product.subgroup.name,
                 'brand': obj.product.brand.name if obj.product.brand else None,
-                'manager': obj.product.get_manager().get_full_name() if obj.product.get_manager() else None
+                'manager': obj.product.effective_manager.get_full_name() if obj.product.effective_manager else None
             }
         return None
 
@@ -6,8 +6,9 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from django.db.models import Q, Count, Sum
 from django.shortcuts import get_object_or_404
 
+from core.mixins import ConditionalGetMixin
 from .models import (
-    Currency, RFQ, RFQItem, RFQItemFile,
+    CURRENCIES_RESOURCE, Currency, RFQ, RFQItem, RFQItemFile,
     Quotation, QuotationItem
 )
 from .serializers import (
@@ -25,9 +26,10 @@ class RFQPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class CurrencyViewSet(viewsets.ReadOnlyModelViewSet):
+class CurrencyViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet для валют (только чтение)"""
     
+    version_resource = CURRENCIES_RESOURCE
     queryset = Currency.objects.filter(is_active=True)
     serializer_class = CurrencySerializer
     permission_classes = [RFQPermission]
@@ -41,6 +43,7 @@ class RFQViewSet(viewsets.ModelViewSet):
     ).prefetch_related(
         'items__product__brand', 
         'items__product__subgroup',
+        'items__product__effective_manager',
         'items__files',
         'quotations'
     )
@@ -122,7 +125,9 @@ class RFQViewSet(viewsets.ModelViewSet):
     def items(self, request, pk=None):
         """Получение строк RFQ"""
         rfq = self.get_object()
-        items = rfq.items.all().order_by('line_number')
+        items = rfq.items.select_related(
+            'product__brand', 'product__subgroup', 'product__effective_manager'
+        ).order_by('line_number')
         serializer = RFQItemDetailSerializer(items, many=True)
         return Response(serializer.data)
     
@@ -182,7 +187,7 @@ class RFQItemViewSet(viewsets.ModelViewSet):
     """ViewSet для работы со строками RFQ"""
     
     queryset = RFQItem.objects.select_related(
-        'rfq', 'product__brand', 'product__subgroup'
+        'rfq', 'product__brand', 'product__subgroup', 'product__effective_manager'
     ).prefetch_related('files')
     permission_classes = [RFQPermission]
     parser_classes = [MultiPartParser, FormParser]
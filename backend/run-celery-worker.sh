@@ -5,6 +5,12 @@ set -e
 # Установка Django settings module
 export DJANGO_SETTINGS_MODULE=django_react_starter.settings.development
 
+# Процессы пула пишут метрики в общий каталог, сервер метрик воркера
+# (порт WORKER_METRICS_PORT) суммирует их; значения прошлого запуска удаляются
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/celery-metrics}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 # Start the celery workers
 echo "[run-celery-worker] Starting celery worker in 15 seconds..."
 sleep 15
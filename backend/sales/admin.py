@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 from django.utils.html import format_html
+from core.pagination import EstimatedCountPaginator
 from .models import Invoice, InvoiceLine
 
 
@@ -33,6 +34,9 @@ class InvoiceAdmin(admin.ModelAdmin):
     )
     readonly_fields = ('total_amount', 'created_at', 'updated_at')
     inlines = [InvoiceLineInline]
+    # Оценка количества вместо COUNT(*) по всей таблице на каждой странице
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         (_('Основная информация'), {
@@ -107,6 +111,8 @@ class InvoiceLineAdmin(admin.ModelAdmin):
         'invoice__invoice_number', 'product__name', 'product__article', 'ext_id'
     )
     readonly_fields = ('total_price', 'created_at', 'updated_at')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         (_('Основная информация'), {
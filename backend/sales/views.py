@@ -13,6 +13,7 @@ import io
 import json
 from datetime import datetime, date
 
+from core.pagination import CursorModePaginationMixin, EstimatedCountPaginator
 from .models import Invoice, InvoiceLine
 from .serializers import (
     InvoiceSerializer, 
@@ -41,11 +42,12 @@ class InvoiceFilter(filters.FilterSet):
         fields = ['date_from', 'date_to', 'company', 'invoice_type', 'sale_type', 'currency']
 
 
-class InvoicePagination(PageNumberPagination):
+class InvoicePagination(CursorModePaginationMixin, PageNumberPagination):
     """Пагинация для счетов"""
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
+    django_paginator_class = EstimatedCountPaginator  # Без COUNT(*) на больших выборках
 
 
 class InvoiceViewSet(viewsets.ReadOnlyModelViewSet):